@@ -1,87 +1,223 @@
-from flask import Flask
+# app.py
+# Фабрика Flask-приложения.
+#
+#   flask --app app run                     — Flask сам вызывает create_app()
+#   python app.py                           — сервер разработки (debug)
+#   gunicorn -c gunicorn.conf.py wsgi:app   — рабочий режим, см. wsgi.py
+#
+# Маршруты и команды подключаются внутри create_app, тяжёлые модули
+# (marshmallow-схемы, fpdf) импортируются при первом использовании, поэтому
+# импорт модуля и CLI-команды не платят за них. Начальные данные — одна
+# идемпотентная транзакция services.bootstrap.
+import click
+from flask import Flask, Response, abort, current_app, g, request, send_file
+from flask.cli import with_appcontext
 from flask_cors import CORS
+
 from extensions import db, jwt
-from werkzeug.security import generate_password_hash
+from services import metrics
+from services.db_pool import install_statement_timeout
 
-app = Flask(__name__, static_folder='static', static_url_path='/static')
 
-app.config.from_object('config.Config')
+def create_app(config='config.Config'):
+    # config — объект или путь для app.config.from_object
+    app = Flask(__name__, static_folder='static', static_url_path='/static')
 
-app.config['JWT_TOKEN_LOCATION'] = ['headers']
-app.config['JWT_HEADER_NAME'] = 'Authorization'
-app.config['JWT_HEADER_TYPE'] = 'Bearer'
+    app.config.from_object(config)
 
-CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
+    app.config['JWT_TOKEN_LOCATION'] = ['headers']
+    app.config['JWT_HEADER_NAME'] = 'Authorization'
+    app.config['JWT_HEADER_TYPE'] = 'Bearer'
 
-db.init_app(app)
-jwt.init_app(app)
+    CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}}, supports_credentials=True,
+         expose_headers=['X-Next-Cursor', 'Link'])
+
+    db.init_app(app)
+    jwt.init_app(app)
 
-def create_default_statuses():
-    from models import IncidentStatus
-    with app.app_context():
-        if not IncidentStatus.query.first():
-            db.session.add_all([
-                IncidentStatus(id=1, name='новый', description='Инцидент только что создан'),
-                IncidentStatus(id=2, name='в работе', description='Инцидент в процессе расследования'),
-                IncidentStatus(id=3, name='завершён', description='Инцидент завершён'),
-            ])
-            db.session.commit()
-            print("✅ Статусы инцидентов добавлены")
-
-
-# 👤 Создание администратора
-def create_admin():
-    with app.app_context():
-        from models import Employee
-        if not Employee.query.filter_by(email="admin@airport.com").first():
-            admin = Employee(
-                first_name="Админ",
-                last_name="Системы",
-                position="",
-                phone="0000000000",
-                email="admin@airport.com",
-                role="admin",
-                password=generate_password_hash("Pa$$w0rd!")
-            )
-            db.session.add(admin)
-            db.session.commit()
-
-# 📍 Добавление локаций
-def create_locations():
     with app.app_context():
-        from models import Location
-        if not Location.query.first():
-            db.session.add_all([
-                Location(location_name="Терминал A", location_type="пассажирская зона"),
-                Location(location_name="Грузовой отсек", location_type="техническая зона"),
-                Location(location_name="Зона контроля", location_type="безопасность")
-            ])
-            db.session.commit()
+        install_statement_timeout(db.engine, app.config['DB_STATEMENT_TIMEOUT_MS'])
+        metrics.install_sql_metrics(db.engine)
+
+    app.before_request(begin_request_metrics)
+    app.after_request(observe_request_metrics)
+    app.teardown_request(end_request_metrics)
+
+    register_blueprints(app)
+    app.add_url_rule('/static/reports/<path:filename>', view_func=serve_report)
+    app.add_url_rule('/metrics', view_func=get_metrics)
+    for command in COMMANDS:
+        app.cli.add_command(command)
+    return app
+
 
 # Регистрация маршрутов
-from routes.auth import auth_bp
-from routes.employees import employees_bp
-from routes.incidents import incidents_bp
-from routes.locations import locations_bp
-from routes.incident_statuses import incident_statuses_bp
-
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(employees_bp, url_prefix='/api/employees')
-app.register_blueprint(incidents_bp, url_prefix='/api/incidents')
-app.register_blueprint(locations_bp, url_prefix='/api/locations')
-app.register_blueprint(incident_statuses_bp, url_prefix='/api/incident_statuses')
-
-from flask import send_from_directory
-import os
-
-@app.route('/static/reports/<path:filename>')
+def register_blueprints(app):
+    from routes.auth import auth_bp
+    from routes.employees import employees_bp
+    from routes.incidents import incidents_bp
+    from routes.incident_export import incident_export_bp
+    from routes.incident_import import incident_import_bp
+    from routes.locations import locations_bp
+    from routes.incident_statuses import incident_statuses_bp
+    from routes.admin import admin_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(employees_bp, url_prefix='/api/employees')
+    app.register_blueprint(incidents_bp, url_prefix='/api/incidents')
+    app.register_blueprint(incident_export_bp, url_prefix='/api/incidents/export')
+    app.register_blueprint(incident_import_bp, url_prefix='/api/incidents/import')
+    app.register_blueprint(locations_bp, url_prefix='/api/locations')
+    app.register_blueprint(incident_statuses_bp, url_prefix='/api/incident_statuses')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+
+
+# 📈 Метрики запросов: длительность, число SQL и время в БД (services/metrics.py)
+def begin_request_metrics():
+    g.metrics_token = metrics.begin_request()
+
+def observe_request_metrics(response):
+    stats = metrics.current_request()
+    if stats is not None:
+        metrics.observe_request(
+            stats, request.method, request.blueprint, request.endpoint, response.status_code,
+            current_app.config['METRICS_QUERY_BUDGET'], current_app.logger, request.path,
+        )
+    return response
+
+def end_request_metrics(exc):
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        metrics.end_request(token)
+
+
+# 📄 PDF-отчёты: строгий ETag, вечный кеш для имён с хешем, Range; при
+# REPORTS_SENDFILE файл отдаёт веб-сервер
 def serve_report(filename):
-    reports_dir = os.path.join(app.root_path, 'static', 'reports')
-    return send_from_directory(reports_dir, filename)
+    from services import report_files
+
+    path = report_files.report_path(current_app, filename)
+    if path is None:
+        abort(404)
+    headers = report_files.report_headers(filename, path)
+    if report_files.not_modified(request.headers.get('If-None-Match'), headers['ETag']):
+        return Response(status=304, headers=headers)
+
+    offload = report_files.sendfile_headers(current_app, filename, path)
+    if offload is not None:
+        return Response(status=200, mimetype='application/pdf', headers={**headers, **offload})
+
+    resp = send_file(path, mimetype='application/pdf', conditional=True, etag=headers['ETag'].strip('"'))
+    resp.headers['Cache-Control'] = headers['Cache-Control']
+    return resp
+
+
+# 📈 Метрики в формате Prometheus
+def get_metrics():
+    return Response(metrics.render_metrics(), content_type=metrics.CONTENT_TYPE)
+
+
+# 🛠️ CLI-команды (flask --app app <команда>)
+@click.command('bootstrap')
+@with_appcontext
+def bootstrap_command():
+    from services.bootstrap import bootstrap
+    created = bootstrap(current_app._get_current_object())
+    print(f"✅ Начальные данные: {', '.join(created) if created else 'уже есть'}")
+
+@click.command('rebuild-active-incidents')
+@with_appcontext
+def rebuild_active_incidents_command():
+    from services.roster import rebuild_active_incidents
+    rebuild_active_incidents(db.session)
+    db.session.commit()
+    print("✅ Проекция активных инцидентов перестроена")
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    from services.incident_search import rebuild
+    rebuild(db.session)
+    db.session.commit()
+    print("✅ Поисковый индекс перестроен")
+
+@click.command('rebuild-incident-stats')
+@with_appcontext
+def rebuild_incident_stats_command():
+    from services.incident_stats import rebuild
+    rebuild(db.session)
+    db.session.commit()
+    print("✅ Статистика инцидентов пересчитана")
+
+@click.command('rebuild-employee-loads')
+@with_appcontext
+def rebuild_employee_loads_command():
+    from services.assignment import rebuild
+    rebuild(db.session)
+    db.session.commit()
+    print("✅ Нагрузка сотрудников пересчитана")
+
+@click.command('prune-incident-tombstones')
+@click.option('--days', type=int, default=None, help='По умолчанию — TOMBSTONE_RETENTION_DAYS')
+@with_appcontext
+def prune_incident_tombstones_command(days):
+    from services.incident_sync import TOMBSTONE_RETENTION_DAYS, prune_tombstones
+    removed = prune_tombstones(db.session, days or TOMBSTONE_RETENTION_DAYS)
+    db.session.commit()
+    print(f"✅ Удалено записей журнала удалений: {removed}")
+
+@click.command('archive-incidents')
+@click.option('--older-than-days', type=int, default=None, help='По умолчанию — ARCHIVE_AFTER_DAYS')
+@click.option('--batch-size', type=int, default=None, help='По умолчанию — ARCHIVE_BATCH_SIZE')
+@click.option('--max-batches', type=int, default=None, help='По умолчанию — до конца')
+@click.option('--pause', type=float, default=0.0, help='Пауза между порциями, с')
+@with_appcontext
+def archive_incidents_command(older_than_days, batch_size, max_batches, pause):
+    from services.incident_archive import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, archive_completed
+    moved = archive_completed(db.session, older_than_days or ARCHIVE_AFTER_DAYS, batch_size or ARCHIVE_BATCH_SIZE,
+                              max_batches, pause)
+    print(f"✅ Перенесено в архив инцидентов: {moved}")
+
+@click.command('sweep-reports')
+@with_appcontext
+def sweep_reports_command():
+    from services.reports import sweep
+    done, failed = sweep(db.session, current_app._get_current_object())
+    print(f"✅ Перезапущено задач отчётов: готово {done}, с ошибкой {failed}")
+
+@click.command('import-incidents')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None,
+              help='По умолчанию — по расширению файла')
+@click.option('--chunk-size', type=int, default=None)
+@with_appcontext
+def import_incidents_command(path, fmt, chunk_size):
+    from services.incident_import import IMPORT_CHUNK_SIZE, import_incidents
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, 'rb') as stream:
+        report = import_incidents(db.session, stream, fmt, chunk_size or IMPORT_CHUNK_SIZE,
+                                  logger=current_app.logger)
+    for error in report['errors']:
+        print(f"❌ {error}")
+    print(f"✅ Загружено {report['imported']}, с ошибками {report['failed']}, "
+          f"{report['elapsed_s']} с ({report['rows_per_second']} строк/с)")
+
+COMMANDS = (
+    bootstrap_command,
+    rebuild_active_incidents_command,
+    rebuild_search_index_command,
+    rebuild_incident_stats_command,
+    rebuild_employee_loads_command,
+    prune_incident_tombstones_command,
+    archive_incidents_command,
+    sweep_reports_command,
+    import_incidents_command,
+)
+
 
 if __name__ == '__main__':
-    create_admin()
-    create_locations()
-    create_default_statuses()  
-    app.run(debug=True, host="0.0.0.0", port=5000)
+    from services.bootstrap import bootstrap
 
+    app = create_app()
+    bootstrap(app)
+    app.run(debug=True, host="0.0.0.0", port=5000)
@@ -0,0 +1,78 @@
+# asgi/db.py
+# Асинхронный движок и сессии для ASGI-приложения.
+#
+# Строка подключения та же, что у Flask-приложения (DATABASE_URL), драйвер
+# меняется на асинхронный: postgresql -> asyncpg, sqlite -> aiosqlite.
+# Параметры пула берутся из тех же DB_* настроек. Синхронный класс сессии
+# подписан на события services.incident_changes, поэтому проекции и прочие
+# обработчики before_commit работают так же, как во Flask-приложении.
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from services import incident_changes, metrics
+
+_ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+class TrackedSession(Session):
+    pass
+
+
+incident_changes.listen(TrackedSession)
+
+
+def async_database_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend in _ASYNC_DRIVERS and url.drivername != _ASYNC_DRIVERS[backend]:
+        url = url.set(drivername=_ASYNC_DRIVERS[backend])
+    return url
+
+
+def engine_kwargs(config):
+    url = async_database_url(config['SQLALCHEMY_DATABASE_URI'])
+    kwargs = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    if config['DB_USE_NULLPOOL']:
+        kwargs['poolclass'] = NullPool
+    elif url.get_backend_name() != 'sqlite':
+        kwargs.update(
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+        )
+    if config['DB_STATEMENT_TIMEOUT_MS'] and url.get_backend_name() == 'postgresql':
+        # asyncpg выставляет параметр сервера при открытии соединения
+        kwargs['connect_args'] = {
+            'server_settings': {'statement_timeout': str(int(config['DB_STATEMENT_TIMEOUT_MS']))}
+        }
+    return url, kwargs
+
+
+engine = None
+SessionLocal = None
+
+
+def init_engine(config):
+    global engine, SessionLocal
+    url, kwargs = engine_kwargs(config)
+    engine = create_async_engine(url, **kwargs)
+    metrics.install_sql_metrics(engine.sync_engine)
+    # expire_on_commit=False: после коммита объекты сериализуются без повторных запросов
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=TrackedSession)
+    return engine
+
+
+async def dispose_engine():
+    if engine is not None:
+        await engine.dispose()
+
+
+async def get_session():
+    async with SessionLocal() as session:
+        yield session
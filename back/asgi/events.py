@@ -0,0 +1,86 @@
+# asgi/events.py
+# События по инцидентам для ASGI-воркера: LISTEN на канале
+# services.incident_events.EVENTS_CHANNEL (asyncpg, отдельное соединение вне
+# пула) и потоки SSE / WebSocket поверх общей шины bus.
+import asyncio
+import json
+import logging
+
+from services.incident_events import HEARTBEAT_S, RESYNC, RETRY_MS, EVENTS_CHANNEL, bus, format_sse
+from asgi.db import async_database_url
+
+logger = logging.getLogger(__name__)
+
+_listener_task = None
+
+
+async def _listen(dsn):
+    import asyncpg
+
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(dsn)
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            await connection.add_listener(
+                EVENTS_CHANNEL, lambda _conn, _pid, _channel, payload: bus.publish(json.loads(payload))
+            )
+            await closed.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ LISTEN {EVENTS_CHANNEL}: {e}")
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+        # Пока соединения не было, события могли потеряться
+        bus.publish(RESYNC)
+        await asyncio.sleep(1)
+
+
+def start_listener(config):
+    global _listener_task
+    if not config.get('EVENTS_PG_NOTIFY'):
+        return
+    url = async_database_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'postgresql':
+        return
+    dsn = url.set(drivername='postgresql').render_as_string(hide_password=False)
+    _listener_task = asyncio.get_running_loop().create_task(_listen(dsn))
+
+
+async def stop_listener():
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
+
+
+def subscribe(user_id, admin, last_event_id):
+    subscription = bus.subscribe(user_id, admin, loop=asyncio.get_running_loop())
+    return subscription, bus.replay(subscription, last_event_id)
+
+
+async def next_event(subscription):
+    # None — пора отправить пинг
+    try:
+        return await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_S)
+    except asyncio.TimeoutError:
+        return None
+
+
+async def sse_stream(subscription, replay):
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        for event in replay:
+            yield format_sse(event)
+        while True:
+            event = await next_event(subscription)
+            yield ': ping\n\n' if event is None else format_sse(event)
+    finally:
+        bus.unsubscribe(subscription)
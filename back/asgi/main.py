@@ -0,0 +1,86 @@
+# asgi/main.py
+# Асинхронная точка входа: те же /api/auth, /api/employees, /api/incidents,
+# /api/locations и /api/incident_statuses, что и во Flask-приложении, но на
+# asyncpg и асинхронных сессиях SQLAlchemy.
+#
+# Запуск (из каталога back):
+#   uvicorn asgi.main:app --host 0.0.0.0 --port 5000 --workers 4
+#
+# Общие сервисы (services/*) читают настройки через flask.current_app,
+# поэтому каждый запрос выполняется в контексте лёгкого Flask-приложения с
+# той же конфигурацией (без синхронного движка БД и без маршрутов).
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
+from flask import Flask
+from starlette.middleware.cors import CORSMiddleware
+
+from asgi import db, events, metrics
+from asgi.reference import fresh_reference_data, reload_reference_data
+from asgi.security import ApiError
+from extensions import jwt
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+flask_app = Flask('app', root_path=BASE_DIR)
+flask_app.config.from_object('config.Config')
+jwt.init_app(flask_app)
+
+
+class FlaskContextMiddleware:
+    # Открывает app context Flask на время обработки запроса (и lifespan)
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        with flask_app.app_context():
+            await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    db.init_engine(flask_app.config)
+    # справочники статусов и локаций загружаются в память при старте
+    await reload_reference_data()
+    events.start_listener(flask_app.config)
+    yield
+    await events.stop_listener()
+    await db.dispose_engine()
+
+
+# redirect_slashes=False: '/api/employees/' и '/api/employees' — разные маршруты
+app = FastAPI(lifespan=lifespan, redirect_slashes=False, dependencies=[Depends(fresh_reference_data)])
+
+
+@app.exception_handler(ApiError)
+async def api_error_handler(request, exc):
+    return JSONResponse(exc.body, status_code=exc.status_code)
+
+
+from asgi.routers import auth, employees, incidents, incident_export, reference, reports  # noqa: E402
+
+app.include_router(auth.router, prefix='/api/auth')
+app.include_router(employees.router, prefix='/api/employees')
+app.include_router(incident_export.router, prefix='/api/incidents/export')
+app.include_router(incidents.router, prefix='/api/incidents')
+app.include_router(reference.locations_router, prefix='/api/locations')
+app.include_router(reference.statuses_router, prefix='/api/incident_statuses')
+# отчёты — раньше общего /static: нужны ETag, Cache-Control и X-Accel-Redirect
+app.include_router(reports.router, prefix='/static/reports')
+app.include_router(metrics.router)
+
+app.mount('/static', StaticFiles(directory=os.path.join(BASE_DIR, 'static')), name='static')
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=['http://localhost:3000'],
+    allow_credentials=True,
+    allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
+    allow_headers=['Authorization', 'Content-Type'],
+    expose_headers=['X-Next-Cursor', 'Link'],
+)
+app.add_middleware(metrics.MetricsMiddleware, config=flask_app.config)
+app.add_middleware(FlaskContextMiddleware)
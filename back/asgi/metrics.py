@@ -0,0 +1,67 @@
+# asgi/metrics.py
+# Метрики запросов ASGI-приложения (services/metrics.py): middleware и
+# GET /metrics. endpoint именуется как во Flask — "<модуль роутера>.<функция>".
+import logging
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get('/metrics')
+async def get_metrics():
+    return Response(metrics.render_metrics(), media_type=metrics.CONTENT_TYPE)
+
+
+def endpoint_labels(scope):
+    # (blueprint, endpoint) по маршруту, выбранному роутером
+    endpoint = scope.get('endpoint')
+    if endpoint is None:
+        return None, None
+    name = getattr(endpoint, '__name__', None)
+    if name is None:
+        # смонтированное приложение, например StaticFiles
+        return None, type(endpoint).__name__
+    blueprint = endpoint.__module__.rpartition('.')[2]
+    return blueprint, f"{blueprint}.{name}"
+
+
+class MetricsMiddleware:
+    def __init__(self, app, config):
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        token = metrics.begin_request()
+        stats = metrics.current_request()
+        observed = False
+
+        def observe(status):
+            nonlocal observed
+            observed = True
+            blueprint, endpoint = endpoint_labels(scope)
+            metrics.observe_request(
+                stats, scope['method'], blueprint, endpoint, status,
+                self.config['METRICS_QUERY_BUDGET'], logger, scope['path'],
+            )
+
+        async def send_with_metrics(message):
+            if message['type'] == 'http.response.start' and not observed:
+                observe(message['status'])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            if not observed:
+                observe(500)
+            metrics.end_request(token)
@@ -0,0 +1,26 @@
+# asgi/reference.py
+# Справочники (services.reference_data) для ASGI-приложения.
+#
+# Синхронный reference_data при устаревании кеша сам читает БД через
+# db.session. В ASGI-приложении кеш обновляется заранее: при старте и
+# зависимостью fresh_reference_data перед обработкой запроса (чтение идёт
+# через асинхронную сессию, одновременные запросы ждут одну загрузку).
+import asyncio
+
+from asgi import db
+from services import reference_data
+
+_reload_lock = asyncio.Lock()
+
+
+async def reload_reference_data():
+    async with db.SessionLocal() as session:
+        await session.run_sync(reference_data.load)
+
+
+async def fresh_reference_data():
+    if not reference_data.is_stale():
+        return
+    async with _reload_lock:
+        if reference_data.is_stale():
+            await reload_reference_data()
@@ -0,0 +1,80 @@
+# asgi/reports.py
+# Фоновая генерация PDF-отчётов для ASGI-приложения.
+#
+# Рендеринг — в том же пуле процессов services.reports, ожидание — через
+# run_in_executor, так что цикл событий не блокируется. Задача уже записана
+# в report_jobs вместе с завершением инцидента, статус отдаёт
+# /api/incidents/reports/<job_id>; если отправить её не удалось, её
+# перезапустит flask sweep-reports. Пока задачи в пуле, фоновая задача
+# отмечает их heartbeat_at (см. services/reports.py).
+import asyncio
+import logging
+from datetime import datetime
+
+from asgi import db
+from services import reports
+
+logger = logging.getLogger(__name__)
+
+# Ссылки на выполняющиеся задачи, чтобы их не собрал сборщик мусора
+_tasks = set()
+# Задачи, ожидающие пула, и фоновая задача, отмечающая их heartbeat_at
+_inflight = set()
+_heartbeat_task = None
+
+
+async def _heartbeat():
+    while _inflight:
+        await asyncio.sleep(reports.JOB_HEARTBEAT_INTERVAL)
+        job_ids = list(_inflight)
+        if not job_ids:
+            continue
+        try:
+            async with db.SessionLocal() as session:
+                await session.execute(reports.heartbeat_statement(job_ids, datetime.utcnow()))
+                await session.commit()
+        except Exception:
+            logger.exception("💥 Не удалось отметить задачи отчётов в пуле")
+
+
+async def _render(app, job_id, payload):
+    incident_id = payload['id']
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            reports.get_executor(app.config),
+            reports.render_incident_report,
+            payload,
+            reports.reports_dir(app),
+            reports.font_path(app),
+        )
+        pdf_url = f"{reports.REPORTS_URL}/{reports.observe_render(result)}"
+        error = None
+    except Exception as e:
+        logger.exception(f"💥 Ошибка генерации отчёта для инцидента #{incident_id}: {e}")
+        pdf_url, error = None, str(e)
+    finally:
+        _inflight.discard(job_id)
+
+    try:
+        async with db.SessionLocal() as session:
+            await session.run_sync(reports.finish_job, job_id, incident_id, pdf_url, error)
+            await session.commit()
+    except Exception:
+        logger.exception(f"💥 Не удалось сохранить результат задачи {job_id}")
+        return
+    if pdf_url:
+        reports.remove_previous_reports(reports.reports_dir(app), incident_id, pdf_url.rpartition('/')[2])
+        logger.info(f"📎 PDF для инцидента #{incident_id}: {pdf_url}")
+
+
+def submit_report(app, job_id, payload):
+    global _heartbeat_task
+    _inflight.add(job_id)
+    loop = asyncio.get_running_loop()
+    if _heartbeat_task is None or _heartbeat_task.done() or _heartbeat_task.get_loop() is not loop:
+        _heartbeat_task = asyncio.create_task(_heartbeat())
+    task = asyncio.create_task(_render(app, job_id, payload))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_id
@@ -0,0 +1,79 @@
+# asgi/routers/auth.py — /api/auth
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+
+from asgi.db import get_session
+from asgi.security import current_user_id, error, hash_password, issue_token, verify_password
+from models import Employee
+
+router = APIRouter()
+
+
+# 🔐 Регистрация пользователя
+@router.post('/register', status_code=201)
+async def register(request: Request, session=Depends(get_session)):
+    data = await request.json()
+
+    exists = await session.execute(select(Employee.id).where(Employee.email == data['email']))
+    if exists.first():
+        raise error(400, "Пользователь с таким email уже существует")
+
+    new_user = Employee(
+        first_name=data['first_name'],
+        last_name=data['last_name'],
+        email=data['email'],
+        phone=data['phone'],
+        password=await hash_password(data['password']),
+        role='user',  # фиксированно
+        position='Сотрудник'  # фиксированно
+    )
+
+    session.add(new_user)
+    await session.commit()
+
+    return {"message": "Пользователь зарегистрирован"}
+
+
+# 🔐 Вход и выдача JWT
+@router.post('/login')
+async def login(request: Request, session=Depends(get_session)):
+    data = await request.json()
+    email = data.get('email')
+    password = data.get('password')
+
+    user = (await session.execute(select(Employee).where(Employee.email == email))).unique().scalar_one_or_none()
+    if not user or not await verify_password(user.password, password):
+        raise error(401, "Неверный email или пароль")
+
+    return {
+        "access_token": issue_token(user),
+        "user_id": user.id
+    }
+
+
+# 🔐 Получение профиля
+@router.get('/profile')
+async def profile(user_id=Depends(current_user_id), session=Depends(get_session)):
+    user = await session.get(Employee, user_id)
+
+    if not user:
+        raise error(404, "Пользователь не найден")
+
+    return {
+        "id": user.id,
+        "name": f"{user.first_name} {user.last_name}",
+        "email": user.email,
+        "role": user.role
+    }
+
+
+# 🧪 Тестовый маршрут без проверки токена — просто выводит заголовки
+@router.get('/profile-debug')
+async def profile_debug(request: Request):
+    headers = dict(request.headers)
+    print("🧪 RAW HEADERS:", headers)
+
+    return {
+        "message": "Заголовки получены",
+        "headers": headers
+    }
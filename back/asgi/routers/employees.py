@@ -0,0 +1,114 @@
+# asgi/routers/employees.py — /api/employees
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+
+from asgi.db import get_session
+from asgi.security import admin_required, current_user_id, error, hash_password
+from models import Employee
+from schemas import get_employee_schema
+from services.authz import invalidate_role
+from services.incident_batch import apply_changes, plan_reassignment
+from services.roster import parse_roster_fieldset, roster_statement, roster_entry
+
+router = APIRouter()
+
+
+async def _roster(request, session, with_busy=True):
+    # ?fields= / ?expand= — состав полей списка
+    try:
+        fieldset = parse_roster_fieldset(request.query_params, with_busy)
+    except ValueError as e:
+        raise error(400, str(e))
+    rows = (await session.execute(roster_statement(fieldset))).all()
+    return [roster_entry(row, with_busy, fieldset) for row in rows]
+
+
+async def _get_employee(session, employee_id):
+    employee = await session.get(Employee, employee_id)
+    if employee is None:
+        raise error(404, "Not found")
+    return employee
+
+
+# 🔍 Все сотрудники с назначением
+@router.get('/', dependencies=[Depends(admin_required)])
+async def get_all_employees(request: Request, session=Depends(get_session)):
+    return await _roster(request, session)
+
+
+# 🔍 Один сотрудник
+@router.get('', dependencies=[Depends(current_user_id)])
+async def get_employees(request: Request, session=Depends(get_session)):
+    return await _roster(request, session, with_busy=False)
+
+
+# ➕ Создание сотрудника
+@router.post('/', status_code=201, dependencies=[Depends(admin_required)])
+async def create_employee(request: Request, session=Depends(get_session)):
+    data = await request.json()
+    exists = await session.execute(select(Employee.id).where(Employee.email == data.get("email")))
+    if exists.first():
+        raise error(400, "Пользователь с таким email уже существует")
+
+    data["role"] = data.get("role", "user")
+    if "password" not in data:
+        raise error(400, "Пароль обязателен")
+
+    data["password"] = await hash_password(data["password"])
+    try:
+        new_employee = get_employee_schema().load(data, transient=True)
+        session.add(new_employee)
+        await session.commit()
+        # подгружаем assigned_incidents (нужен для is_busy) без ленивой загрузки
+        await session.refresh(new_employee)
+        return get_employee_schema().dump(new_employee)
+    except Exception as e:
+        raise error(400, str(e))
+
+
+# ✏️ Обновление
+@router.put('/{employee_id:int}', dependencies=[Depends(admin_required)])
+async def update_employee(employee_id: int, request: Request, session=Depends(get_session)):
+    employee = await _get_employee(session, employee_id)
+    data = await request.json()
+    if "password" in data:
+        data["password"] = await hash_password(data["password"])
+    try:
+        updated = get_employee_schema().load(data, instance=employee, partial=True)
+        await session.commit()
+        invalidate_role(employee_id)
+        return get_employee_schema().dump(updated)
+    except Exception as e:
+        raise error(400, str(e))
+
+
+# ❌ Удаление
+@router.delete('/{employee_id:int}')
+async def delete_employee(employee_id: int, request: Request,
+                          admin_id=Depends(admin_required), session=Depends(get_session)):
+    employee = await _get_employee(session, employee_id)
+
+    # получаем reassigned_to из тела запроса
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    try:
+        changes, snapshots = await session.run_sync(
+            plan_reassignment, employee_id, (data or {}).get('reassigned_to'), admin_id
+        )
+    except ValueError as e:
+        raise error(400, str(e))
+
+    # все незавершённые инциденты переназначаются одним UPDATE
+    await session.run_sync(apply_changes, changes, snapshots)
+    # assigned_incidents загружен до UPDATE: без перечитывания ORM обнулит новые назначения
+    session.expire(employee, ['assigned_incidents'])
+
+    await session.delete(employee)
+    await session.commit()
+    invalidate_role(employee_id)
+
+    if not changes:
+        return {"message": "Сотрудник удалён"}
+    return {"message": "Сотрудник удалён, инциденты переназначены"}
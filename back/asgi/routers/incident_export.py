@@ -0,0 +1,43 @@
+# asgi/routers/incident_export.py — /api/incidents/export
+# Потоковая выгрузка JSON Lines / CSV: строки читаются серверным курсором
+# (session.stream) порциями по EXPORT_BATCH_SIZE, каждая порция кодируется и
+# сразу уходит клиенту.
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+
+from asgi import db
+from asgi.security import admin_required, error
+from routes.incident_export import _FORMATS, _export_row, _export_statement
+
+router = APIRouter()
+
+
+async def _stream(stmt, encode):
+    # Своя сессия: ответ отдаётся уже после выхода из зависимостей запроса
+    async with db.SessionLocal() as session:
+        result = await session.stream(stmt)
+        header = True
+        async for rows in result.partitions():
+            yield ''.join(encode([_export_row(row) for row in rows], header))
+            header = False
+        if header:
+            yield ''.join(encode([], header))
+
+
+# 📤 Выгрузка всех инцидентов: ?format=jsonl|csv + фильтры как у списка
+@router.get('', dependencies=[Depends(admin_required)])
+async def export_incidents(request: Request):
+    fmt = request.query_params.get('format', 'jsonl')
+    if fmt not in _FORMATS:
+        raise error(400, "Формат должен быть jsonl или csv")
+
+    try:
+        stmt = _export_statement(request.query_params)
+    except ValueError as e:
+        raise error(400, str(e))
+
+    encode, mimetype, filename = _FORMATS[fmt]
+    return StreamingResponse(_stream(stmt, encode), media_type=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no',
+    })
@@ -0,0 +1,326 @@
+# asgi/routers/incidents.py — /api/incidents
+import asyncio
+import logging
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from asgi import events, reports as report_tasks
+from asgi.db import get_session
+from asgi import db as asgi_db
+from asgi.security import ApiError, admin_required, current_user_id, error, is_admin, jwt_claims, stream_claims
+from models import Incident, Employee
+from schemas import get_incident_schema
+from services import assignment, incident_changes, incident_search, incident_stats, incident_sync, reports, reference_data
+from services.incident_batch import parse_operations, run_batch
+from services.incident_queries import apply_filters, page_statement, split_page
+from services.serializers import (
+    dumps, incident_columns, incident_payload, incident_summary_payload, incidents_payload,
+    parse_incident_fieldset, parse_summary_fieldset,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _json(payload, status_code=200):
+    return Response(dumps(payload), status_code=status_code, media_type='application/json')
+
+
+async def _get_incident(session, incident_id, *options, reload=False):
+    incident = await session.get(Incident, incident_id, options=options, populate_existing=reload)
+    if incident is None:
+        raise error(404, "Not found")
+    return incident
+
+
+# 📄 Страница инцидентов; курсор следующей страницы — в заголовке X-Next-Cursor,
+# состав полей — ?fields= и ?expand=
+async def _incident_page(request, session, stmt):
+    args = request.query_params
+    try:
+        stmt, limit, order = page_statement(apply_filters(stmt, args), args)
+        fieldset = parse_incident_fieldset(args)
+    except ValueError as e:
+        raise error(400, str(e))
+
+    rows = (await session.execute(stmt.with_only_columns(*incident_columns(fieldset)))).all()
+    rows, next_cursor = split_page(rows, limit, order)
+
+    # services.serializers работает с синхронной сессией — через run_sync
+    resp = _json(await session.run_sync(incidents_payload, rows, fieldset))
+    if next_cursor:
+        resp.headers['X-Next-Cursor'] = next_cursor
+        resp.headers['Link'] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return resp
+
+
+@router.get('/', dependencies=[Depends(admin_required)])
+async def get_all_incidents(request: Request, session=Depends(get_session)):
+    return await _incident_page(request, session, select(Incident))
+
+
+@router.get('/{incident_id:int}', dependencies=[Depends(current_user_id)])
+async def get_incident(incident_id: int, request: Request, session=Depends(get_session)):
+    try:
+        fieldset = parse_summary_fieldset(request.query_params)
+    except ValueError as e:
+        raise error(400, str(e))
+    payload = await session.run_sync(incident_summary_payload, incident_id, fieldset)
+    if payload is None:
+        raise error(404, "Not found")
+    return _json(payload)
+
+
+@router.post('', status_code=201, dependencies=[Depends(admin_required)])
+async def create_incident(request: Request, session=Depends(get_session)):
+    data = await request.json()
+    data['status_id'] = 1
+    # auto_assign: true — исполнитель выбирается по нагрузке (services/assignment.py)
+    auto_assign = data.pop('auto_assign', False)
+    try:
+        new_incident = get_incident_schema().load(data, transient=True)
+        if auto_assign and new_incident.assigned_employee_id is None:
+            new_incident.assigned_employee_id = await session.run_sync(assignment.pick, new_incident.location_id)
+        session.add(new_incident)
+        await session.flush()
+        incident_changes.track('created', new_incident.id, after=incident_changes.snapshot(new_incident),
+                               session=session)
+        await session.commit()
+        return _json(await session.run_sync(incident_payload, new_incident.id), 201)
+    except Exception as e:
+        logger.error(f"Create incident error: {str(e)}")
+        raise error(400, str(e))
+
+
+@router.put('/{incident_id:int}', dependencies=[Depends(admin_required)])
+async def update_incident(incident_id: int, request: Request, session=Depends(get_session)):
+    incident = await _get_incident(session, incident_id)
+
+    # 🔒 Запрет на редактирование завершённых
+    if reference_data.is_completed(incident.status_id):
+        raise error(403, "Нельзя редактировать завершённый инцидент")
+
+    data = await request.json()
+    before = incident_changes.snapshot(incident)
+    try:
+        updated = get_incident_schema().load(data, instance=incident, partial=True)
+        await session.flush()
+        incident_changes.track('updated', incident.id, before, incident_changes.snapshot(updated), session=session)
+        await session.commit()
+        return _json(await session.run_sync(incident_payload, incident_id))
+    except Exception as e:
+        raise error(400, str(e))
+
+
+@router.delete('/{incident_id:int}', dependencies=[Depends(admin_required)])
+async def delete_incident(incident_id: int, session=Depends(get_session)):
+    incident = await _get_incident(session, incident_id)
+    incident_changes.track('deleted', incident.id, before=incident_changes.snapshot(incident), session=session)
+    await session.delete(incident)
+    await session.commit()
+    return {"message": "Incident deleted"}
+
+
+@router.post('/{incident_id:int}/assign/{employee_id:int}', dependencies=[Depends(admin_required)])
+async def assign_incident(incident_id: int, employee_id: int, session=Depends(get_session)):
+    incident = await _get_incident(session, incident_id)
+    employee = await session.get(Employee, employee_id)
+    if employee is None:
+        raise error(404, "Not found")
+
+    if incident.assigned_employee_id == employee.id:
+        return {"message": "Incident already assigned"}
+
+    if incident.status_id in reference_data.closed_status_ids():
+        raise error(400, "Cannot assign closed incident")
+
+    before = incident_changes.snapshot(incident)
+    incident.assigned_employee_id = employee.id
+    incident_changes.track('updated', incident.id, before, incident_changes.snapshot(incident), session=session)
+    await session.commit()
+    return {
+        "message": f"Incident assigned to {employee.first_name} {employee.last_name}",
+        "incident_id": incident.id,
+        "assigned_to": employee.id
+    }
+
+
+# 📦 Пакет операций: {"operations": [{"incident_id", "employee_id" и/или "status_id"}]}
+@router.post('/batch', dependencies=[Depends(admin_required)])
+async def batch_update_incidents(request: Request, session=Depends(get_session)):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    try:
+        operations = parse_operations(data)
+    except ValueError as e:
+        raise error(400, str(e))
+
+    results = await session.run_sync(run_batch, operations)
+    await session.commit()
+    return {
+        "results": results,
+        "updated": sum(1 for r in results if r['result'] == 'updated'),
+        "failed": sum(1 for r in results if r['result'] == 'error')
+    }
+
+
+# 🔄 Дельта-синхронизация: ?since=<sync_token>&limit= — изменённые и удалённые
+# после токена. Сотрудник получает только свои инциденты
+@router.get('/sync')
+async def sync_incidents(request: Request, claims=Depends(jwt_claims), session=Depends(get_session)):
+    user_id = None if await is_admin(claims, session) else int(claims['sub'])
+    try:
+        params = incident_sync.parse_sync_args(request.query_params)
+        payload = await session.run_sync(
+            lambda sync_session: incident_sync.sync_payload(sync_session, user_id=user_id, **params)
+        )
+    except incident_sync.SyncTokenExpired as e:
+        raise error(410, str(e))
+    except ValueError as e:
+        raise error(400, str(e))
+    return _json(payload)
+
+
+# 📡 Поток событий по инцидентам: SSE (токен в заголовке или ?jwt=)
+@router.get('/events')
+async def incident_events_stream(request: Request, claims=Depends(stream_claims), session=Depends(get_session)):
+    admin = await is_admin(claims, session)
+    # соединение с БД потоку не нужно — возвращаем его в пул сразу
+    await session.close()
+    subscription, replay = events.subscribe(int(claims['sub']), admin, request.headers.get('Last-Event-ID'))
+    return StreamingResponse(events.sse_stream(subscription, replay), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+# 📡 То же через WebSocket: ?jwt=...&last_event_id=..., события — JSON-сообщения
+@router.websocket('/ws')
+async def incident_events_ws(websocket: WebSocket):
+    try:
+        claims = stream_claims(websocket)
+    except ApiError:
+        await websocket.close(code=1008)
+        return
+    async with asgi_db.SessionLocal() as session:
+        admin = await is_admin(claims, session)
+    await websocket.accept()
+    subscription, replay = events.subscribe(int(claims['sub']), admin, websocket.query_params.get('last_event_id'))
+
+    async def forward():
+        for event in replay:
+            await websocket.send_text(dumps(event).decode())
+        while True:
+            event = await events.next_event(subscription)
+            if event is not None:
+                await websocket.send_text(dumps(event).decode())
+
+    sender = asyncio.create_task(forward())
+    try:
+        # входящие сообщения не нужны, чтение лишь ловит отключение клиента
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        events.bus.unsubscribe(subscription)
+
+
+# 📊 Сводка для дашборда: ?days=30&hours=48 — окна для by_day / by_hour
+@router.get('/stats', dependencies=[Depends(admin_required)])
+async def get_incident_stats(request: Request, session=Depends(get_session)):
+    try:
+        return _json(await session.run_sync(incident_stats.stats_payload, request.query_params))
+    except ValueError as e:
+        raise error(400, str(e))
+
+
+# 🔎 Полнотекстовый поиск: ?q=&limit=&offset= и фильтры списка.
+# Сотрудник ищет только по своим инцидентам, администратор — по всем
+@router.get('/search')
+async def search_incidents(request: Request, claims=Depends(jwt_claims), session=Depends(get_session)):
+    if not await session.run_sync(incident_search.is_available):
+        raise error(503, "Поиск не настроен: выполните миграции или flask rebuild-search-index")
+    user_id = None if await is_admin(claims, session) else int(claims['sub'])
+    try:
+        params = incident_search.parse_search_args(request.query_params, user_id)
+    except ValueError as e:
+        raise error(400, str(e))
+    return _json(await session.run_sync(incident_search.search, **params))
+
+
+@router.get('/my')
+async def get_my_incidents(request: Request, user_id=Depends(current_user_id), session=Depends(get_session)):
+    return await _incident_page(request, session, select(Incident).where(Incident.assigned_employee_id == user_id))
+
+
+@router.post('/{incident_id:int}/complete', status_code=202)
+async def complete_incident(incident_id: int, request: Request,
+                            user_id=Depends(current_user_id), session=Depends(get_session)):
+    user = await session.get(Employee, user_id)
+    # populate_existing: инцидент мог попасть в сессию вместе с assigned_incidents пользователя
+    incident = await _get_incident(session, incident_id, selectinload(Incident.location), reload=True)
+
+    logger.warning(f"🧾 Запрос на завершение инцидента #{incident.id}")
+    logger.warning(f"👤 Пользователь: id={user.id}, email={user.email}, role={user.role}")
+    logger.warning(f"📌 Назначен сотрудник: id={incident.assigned_employee_id}")
+
+    if incident.assigned_employee_id != user_id:
+        logger.warning("❌ Отказано в доступе: пользователь не назначен на инцидент")
+        raise error(403, "You are not authorized to complete this incident")
+
+    completed_status_id = reference_data.completed_status_id()
+    if completed_status_id is None:
+        logger.error("❌ Статус 'завершён' не найден")
+        raise error(500, "Status 'завершён' not found")
+
+    try:
+        before = incident_changes.snapshot(incident)
+        incident.status_id = completed_status_id
+        incident.completed_at = datetime.utcnow()
+        incident_changes.track('updated', incident.id, before, incident_changes.snapshot(incident), session=session)
+        # задача на отчёт — в той же транзакции, что и завершение
+        payload = reports.report_payload(incident, user, incident.completed_at)
+        job_id = reports.new_job(session, payload)
+        await session.commit()
+
+        # PDF формируется в фоне, ссылка появится в conclusion после рендеринга
+        report_tasks.submit_report(current_app._get_current_object(), job_id, payload)
+
+        logger.info(f"✅ Инцидент #{incident.id} успешно завершён пользователем {user.email}")
+        logger.info(f"🧾 Отчёт поставлен в очередь: {job_id}")
+
+        return {
+            "message": f"Incident #{incident.id} resolved",
+            "job_id": job_id,
+            "status_url": request.url_for('get_report_job', job_id=job_id).path
+        }
+
+    except Exception as e:
+        logger.exception(f"💥 Ошибка завершения инцидента #{incident.id}: {str(e)}")
+        raise error(500, "Internal server error")
+
+
+# 🧾 Статус фоновой генерации отчёта
+@router.get('/reports/{job_id}', dependencies=[Depends(current_user_id)])
+async def get_report_job(job_id: str, session=Depends(get_session)):
+    job = await session.run_sync(reports.get_job, job_id)
+    if job is None:
+        raise error(404, "Job not found")
+
+    return {
+        "job_id": job['job_id'],
+        "incident_id": job['incident_id'],
+        "status": job['status'],
+        "pdf_url": job['pdf_url'],
+        "error": job['error']
+    }
@@ -0,0 +1,30 @@
+# asgi/routers/reference.py — /api/locations и /api/incident_statuses
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse, Response
+
+from asgi.security import jwt_claims
+from services import reference_data
+
+locations_router = APIRouter(dependencies=[Depends(jwt_claims)])
+statuses_router = APIRouter(dependencies=[Depends(jwt_claims)])
+
+
+def _conditional(request, items, kind):
+    # ETag по содержимому справочника; совпал If-None-Match — 304 без тела
+    etag = f'"{reference_data.etag(kind)}"'
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(items, headers=headers)
+
+
+# 🔍 Получить все локации
+@locations_router.get('')
+async def get_locations(request: Request):
+    return _conditional(request, reference_data.locations(), 'locations')
+
+
+@statuses_router.get('')
+async def get_all_statuses(request: Request):
+    return _conditional(request, reference_data.statuses(), 'statuses')
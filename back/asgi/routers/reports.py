@@ -0,0 +1,27 @@
+# asgi/routers/reports.py — /static/reports/<имя> (см. services/report_files.py)
+from fastapi import APIRouter, Request
+from fastapi.responses import FileResponse, Response
+from flask import current_app
+from starlette.concurrency import run_in_threadpool
+
+from asgi.security import error
+from services import report_files
+
+router = APIRouter()
+
+
+@router.get('/{filename}')
+async def serve_report(filename: str, request: Request):
+    path = report_files.report_path(current_app, filename)
+    if path is None:
+        raise error(404, "Отчёт не найден")
+    # для старых имён ETag считается по содержимому файла
+    headers = await run_in_threadpool(report_files.report_headers, filename, path)
+    if report_files.not_modified(request.headers.get('If-None-Match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+
+    offload = report_files.sendfile_headers(current_app, filename, path)
+    if offload is not None:
+        return Response(media_type='application/pdf', headers={**headers, **offload})
+    # FileResponse сам обрабатывает Range / If-Range
+    return FileResponse(path, media_type='application/pdf', headers=headers)
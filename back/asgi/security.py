@@ -0,0 +1,98 @@
+# asgi/security.py
+# JWT и пароли для ASGI-приложения.
+#
+# Токены выпускаются и проверяются средствами flask_jwt_extended в контексте
+# Flask-приложения с той же конфигурацией, поэтому токен, полученный в одном
+# сервере, принимается другим. Хеширование паролей (scrypt/pbkdf2) — работа
+# для процессора, она выполняется в пуле потоков, а не в цикле событий.
+from fastapi import Depends, Request
+from starlette.requests import HTTPConnection
+from flask_jwt_extended import create_access_token, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import ExpiredSignatureError, InvalidTokenError
+from starlette.concurrency import run_in_threadpool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from asgi.db import get_session
+from services import authz
+
+
+class ApiError(Exception):
+    # Ответ с готовым JSON-телом: {"error": ...} как во Flask-маршрутах,
+    # {"msg": ...} для ошибок токена как у flask_jwt_extended
+    def __init__(self, status_code, body):
+        super().__init__(body)
+        self.status_code = status_code
+        self.body = body
+
+
+def error(status_code, message):
+    return ApiError(status_code, {"error": message})
+
+
+async def hash_password(password):
+    return await run_in_threadpool(generate_password_hash, password)
+
+
+async def verify_password(password_hash, password):
+    return await run_in_threadpool(check_password_hash, password_hash, password)
+
+
+def issue_token(user):
+    # ✅ identity как строка, роль — в claims (как в routes/auth.py)
+    return create_access_token(identity=str(user.id), additional_claims=authz.role_claims(user))
+
+
+def decode_claims(token):
+    try:
+        claims = decode_token(token)
+    except ExpiredSignatureError:
+        raise ApiError(401, {"msg": "Token has expired"})
+    except (InvalidTokenError, JWTExtendedException) as e:
+        raise ApiError(422, {"msg": str(e)})
+    if claims.get('type') != 'access':
+        raise ApiError(422, {"msg": "Only non-refresh tokens are allowed"})
+    return claims
+
+
+def jwt_claims(request: Request):
+    header = request.headers.get('Authorization')
+    if not header:
+        raise ApiError(401, {"msg": "Missing Authorization Header"})
+    parts = header.split()
+    if len(parts) != 2 or parts[0] != 'Bearer':
+        raise ApiError(422, {"msg": "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"})
+    return decode_claims(parts[1])
+
+
+def stream_claims(request: HTTPConnection):
+    # Для EventSource / WebSocket: заголовок или ?jwt= (как JWT_QUERY_STRING_NAME)
+    if request.headers.get('Authorization'):
+        return jwt_claims(request)
+    token = request.query_params.get('jwt')
+    if not token:
+        raise ApiError(401, {"msg": "Missing JWT in headers or query_string"})
+    return decode_claims(token)
+
+
+def current_user_id(claims=Depends(jwt_claims)):
+    return int(claims['sub'])
+
+
+async def is_admin(claims, session):
+    decision = authz.claims_decision(claims)
+    if decision is None:
+        user_id = int(claims['sub'])
+        found, role = authz.cached_role(user_id)
+        if not found:
+            role = (await session.execute(authz.role_statement(user_id))).scalar_one_or_none()
+            authz.remember_role(user_id, role)
+        decision = role == authz.ADMIN_ROLE
+    return decision
+
+
+# 🔒 Проверка роли администратора
+async def admin_required(claims=Depends(jwt_claims), session=Depends(get_session)):
+    if not await is_admin(claims, session):
+        raise error(403, "Доступ запрещён")
+    return int(claims['sub'])
@@ -0,0 +1,75 @@
+# benchmarks/compare.py
+# Сравнение двух результатов benchmarks/load.py: p50/p95/p99, пропускная
+# способность и SQL-запросы на запрос по операциям.
+#
+# Запуск из каталога back/:
+#   python -m benchmarks.compare before.json after.json
+#   python -m benchmarks.compare before.json after.json --fail-over 10   # код 1 при регрессии p95 > 10%
+import argparse
+import json
+import sys
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'queries_per_request')
+# Для этих метрик больше — лучше
+HIGHER_IS_BETTER = {'throughput_rps'}
+
+
+def change(old, new):
+    # Изменение в процентах; None, если сравнивать не с чем
+    if old is None or new is None or old == 0:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(before, after):
+    rows = []
+    names = sorted(set(before['operations']) | set(after['operations']))
+    for name in names + ['ИТОГО']:
+        old = before['total'] if name == 'ИТОГО' else before['operations'].get(name, {})
+        new = after['total'] if name == 'ИТОГО' else after['operations'].get(name, {})
+        for metric in METRICS:
+            a, b = old.get(metric), new.get(metric)
+            if a is None and b is None:
+                continue
+            rows.append((name, metric, a, b, change(a, b)))
+    return rows
+
+
+def regressions(rows, threshold, metric='p95_ms'):
+    return [
+        row for row in rows
+        if row[1] == metric and row[4] is not None
+        and (-row[4] if metric in HIGHER_IS_BETTER else row[4]) > threshold
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение результатов нагрузочного теста')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--fail-over', type=float, default=None,
+                        help='Код возврата 1, если p95 какой-либо операции вырос больше чем на столько процентов')
+    args = parser.parse_args()
+
+    with open(args.before, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(args.after, encoding='utf-8') as f:
+        after = json.load(f)
+
+    print(f"до:    {before['meta'].get('label') or ''} {before['meta'].get('git_revision') or ''}")
+    print(f"после: {after['meta'].get('label') or ''} {after['meta'].get('git_revision') or ''}")
+    rows = compare(before, after)
+    fmt = lambda value: '-' if value is None else f"{value:.1f}"
+    for name, metric, a, b, delta in rows:
+        print(f"{name:16s} {metric:20s} {fmt(a):>10s} {fmt(b):>10s} {'' if delta is None else f'{delta:+.1f}%':>9s}")
+
+    if args.fail_over is not None:
+        failed = regressions(rows, args.fail_over)
+        for name, metric, a, b, delta in failed:
+            print(f"❌ {name}: {metric} {fmt(a)} -> {fmt(b)} ({delta:+.1f}%)")
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+# benchmarks/dataset.py
+# Синтетический набор данных аэропорта для нагрузочных тестов
+# (benchmarks/load.py): сотрудники, локации, инциденты, меры реагирования,
+# источники и вложения.
+#
+# Данные генерируются детерминированно (--seed) и порциями по --chunk-size
+# строк, поэтому 1M инцидентов не держатся в памяти целиком. В PostgreSQL
+# (psycopg2) порции загружаются через COPY, в остальных СУБД — executemany.
+# После загрузки перестраиваются проекции (занятость и нагрузка сотрудников,
+# статистика, поисковый индекс), которые при обычной работе обновляются
+# через incident_changes.
+#
+# База берётся из DATABASE_URL (или --database-url). Для PostgreSQL схему
+# создают миграции (alembic upgrade head); локальную SQLite можно создать
+# прямо здесь (--create-schema, без поискового индекса).
+#
+# Запуск из каталога back/:
+#   python -m benchmarks.dataset --scale 10k --database-url sqlite:///bench.sqlite --create-schema
+#   DATABASE_URL=postgresql://... python -m benchmarks.dataset --scale 1m
+#
+# Все сотрудники набора входят с паролем BENCH_PASSWORD.
+import argparse
+import io
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+BENCH_PASSWORD = 'Bench$Pass1'
+BENCH_EMAIL = 'bench{id}@airport.com'
+
+SCALES = {
+    '10k': {'employees': 100, 'locations': 20, 'incidents': 10_000},
+    '100k': {'employees': 500, 'locations': 50, 'incidents': 100_000},
+    '1m': {'employees': 2000, 'locations': 200, 'incidents': 1_000_000},
+}
+
+# Доли статусов «новый», «в работе», «завершён»
+STATUS_WEIGHTS = (0.5, 0.2, 0.3)
+# Доля неназначенных инцидентов
+UNASSIGNED_SHARE = 0.1
+# Инциденты распределены по последним HISTORY_DAYS дням
+HISTORY_DAYS = 365
+
+INCIDENT_TYPES = ('безопасность', 'пожарная безопасность', 'медицинский', 'технический', 'багаж', 'досмотр')
+TITLES = (
+    'Задымление в зоне {n}', 'Оставленный багаж у выхода {n}', 'Сбой табло в секторе {n}',
+    'Пассажиру плохо у стойки {n}', 'Неисправность рамки досмотра {n}', 'Посторонний в служебной зоне {n}',
+)
+ACTIONS = ('Проверено на месте', 'Вызвана служба безопасности', 'Зона оцеплена', 'Оказана помощь', 'Оборудование перезапущено')
+SOURCE_TYPES = ('человек', 'система', 'камера')
+LOCATION_TYPES = ('пассажирская зона', 'техническая зона', 'безопасность', 'перрон')
+POSITIONS = ('Инспектор', 'Техник', 'Сотрудник СБ', 'Диспетчер', 'Медик')
+
+
+def _counts(args):
+    counts = dict(SCALES[args.scale]) if args.scale else {'employees': 100, 'locations': 20, 'incidents': 10_000}
+    for name in ('employees', 'locations', 'incidents'):
+        if getattr(args, name) is not None:
+            counts[name] = getattr(args, name)
+    return counts
+
+
+def _max_id(session, *models):
+    from sqlalchemy import func, select
+    return max(session.execute(select(func.max(model.id))).scalar() or 0 for model in models)
+
+
+# 📥 Загрузка порций
+def _copy_value(value):
+    # Текстовый формат COPY: \N — NULL, спецсимволы экранируются
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy(session, table, rows):
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(row[c]) for c in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor = session.connection().connection.driver_connection.cursor()
+    cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def load_rows(session, model, rows):
+    if not rows:
+        return
+    bind = session.get_bind()
+    if bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg2':
+        _copy(session, model.__table__, rows)
+    else:
+        session.execute(model.__table__.insert(), rows)
+
+
+def _reset_sequences(session, models):
+    from sqlalchemy import text
+    if session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 1) FROM {table}))"
+        ))
+
+
+# 🏭 Генерация
+def employee_rows(rng, first_id, count, password_hash):
+    return [
+        {
+            'id': id_, 'first_name': f"Сотрудник{id_}", 'last_name': f"Нагрузочный{id_ % 97}",
+            'position': rng.choice(POSITIONS), 'email': BENCH_EMAIL.format(id=id_),
+            'phone': f"7{id_:010d}"[-11:], 'role': 'user', 'password': password_hash,
+        }
+        for id_ in range(first_id, first_id + count)
+    ]
+
+
+def location_rows(rng, first_id, count):
+    return [
+        {'id': id_, 'location_name': f"Зона {id_}", 'location_type': rng.choice(LOCATION_TYPES)}
+        for id_ in range(first_id, first_id + count)
+    ]
+
+
+def incident_chunks(rng, first_id, count, chunk_size, employee_ids, location_ids, status_ids, args, now):
+    # Порции (incidents, responses, sources, attachments)
+    start = now - timedelta(days=HISTORY_DAYS)
+    span = HISTORY_DAYS * 86400
+    new_id, in_progress_id, completed_id = status_ids
+    for chunk_start in range(first_id, first_id + count, chunk_size):
+        incidents, responses, sources, attachments = [], [], [], []
+        for id_ in range(chunk_start, min(chunk_start + chunk_size, first_id + count)):
+            incident_datetime = start + timedelta(seconds=rng.randrange(span))
+            created_at = incident_datetime + timedelta(seconds=rng.randrange(600))
+            status_id = rng.choices((new_id, in_progress_id, completed_id), STATUS_WEIGHTS)[0]
+            updated_at = created_at
+            if status_id == completed_id:
+                updated_at = created_at + timedelta(seconds=rng.randrange(300, 3 * 86400))
+            elif status_id == in_progress_id:
+                updated_at = created_at + timedelta(seconds=rng.randrange(60, 3600))
+            assignee = None if rng.random() < UNASSIGNED_SHARE else rng.choice(employee_ids)
+            incidents.append({
+                'id': id_, 'title': rng.choice(TITLES).format(n=rng.randrange(1, 60)),
+                'description': f"Синтетический инцидент №{id_}: {rng.choice(ACTIONS).lower()}",
+                'incident_type': rng.choice(INCIDENT_TYPES), 'incident_datetime': incident_datetime,
+                'location_id': rng.choice(location_ids), 'assigned_employee_id': assignee,
+                'status_id': status_id, 'conclusion': None,
+                'created_at': created_at, 'updated_at': min(updated_at, now),
+                'completed_at': min(updated_at, now) if status_id == completed_id else None,
+            })
+            for _ in range(_count(rng, args.responses)):
+                responses.append({
+                    'incident_id': id_, 'action_taken': rng.choice(ACTIONS),
+                    'performed_by_id': assignee or rng.choice(employee_ids),
+                    'response_datetime': created_at + timedelta(seconds=rng.randrange(3600)),
+                })
+            for _ in range(_count(rng, args.sources)):
+                sources.append({
+                    'incident_id': id_, 'source_type': rng.choice(SOURCE_TYPES),
+                    'source_description': f"Источник {rng.randrange(1, 500)}",
+                })
+            for n in range(_count(rng, args.attachments)):
+                attachments.append({
+                    'incident_id': id_, 'file_url': f"/static/uploads/bench/{id_}-{n}.jpg",
+                    'uploaded_at': created_at,
+                })
+        yield incidents, responses, sources, attachments
+
+
+def _count(rng, mean):
+    # Целая часть + вероятность ещё одной строки: --responses 1.5 -> 1 или 2
+    whole = int(mean)
+    return whole + (1 if rng.random() < mean - whole else 0)
+
+
+def rebuild_projections(session, log=print):
+    from services import assignment, incident_search, incident_stats
+    from services.roster import rebuild_active_incidents
+
+    rebuild_active_incidents(session)
+    log("✅ Проекция активных инцидентов перестроена")
+    incident_stats.rebuild(session)
+    log("✅ Статистика инцидентов пересчитана")
+    assignment.rebuild(session)
+    log("✅ Нагрузка сотрудников пересчитана")
+    if incident_search.is_available(session):
+        incident_search.rebuild(session)
+        log("✅ Поисковый индекс перестроен")
+
+
+def generate(session, counts, args, log=print):
+    from werkzeug.security import generate_password_hash
+
+    from models import Attachment, Employee, Incident, IncidentArchive, IncidentResponse, IncidentSource, Location
+    from services import reference_data
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    started = time.perf_counter()
+
+    reference_data.load(session)
+    status_ids = tuple(reference_data.status_id(name) for name in ('новый', 'в работе', 'завершён'))
+
+    first_employee = _max_id(session, Employee) + 1
+    load_rows(session, Employee, employee_rows(
+        rng, first_employee, counts['employees'], generate_password_hash(BENCH_PASSWORD)
+    ))
+    employee_ids = list(range(first_employee, first_employee + counts['employees']))
+
+    first_location = _max_id(session, Location) + 1
+    load_rows(session, Location, location_rows(rng, first_location, counts['locations']))
+    location_ids = list(range(first_location, first_location + counts['locations']))
+    session.commit()
+
+    # id перенесённых в архив инцидентов новым не выдаются
+    first_incident = _max_id(session, Incident, IncidentArchive) + 1
+    loaded = 0
+    for incidents, responses, sources, attachments in incident_chunks(
+        rng, first_incident, counts['incidents'], args.chunk_size,
+        employee_ids, location_ids, status_ids, args, now,
+    ):
+        load_rows(session, Incident, incidents)
+        load_rows(session, IncidentResponse, responses)
+        load_rows(session, IncidentSource, sources)
+        load_rows(session, Attachment, attachments)
+        session.commit()
+        loaded += len(incidents)
+        log(f"  {loaded}/{counts['incidents']} инцидентов, {time.perf_counter() - started:.1f} с")
+
+    _reset_sequences(session, (Employee, Location, Incident, IncidentResponse, IncidentSource, Attachment))
+    reference_data.invalidate()
+    rebuild_projections(session, log)
+    session.commit()
+
+    elapsed = time.perf_counter() - started
+    log(f"✅ Загружено: сотрудников {counts['employees']}, локаций {counts['locations']}, "
+        f"инцидентов {counts['incidents']} за {elapsed:.1f} с ({counts['incidents'] / elapsed:.0f} инцидентов/с)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Синтетический набор данных для нагрузочных тестов')
+    parser.add_argument('--scale', choices=sorted(SCALES), default=None)
+    parser.add_argument('--employees', type=int, default=None)
+    parser.add_argument('--locations', type=int, default=None)
+    parser.add_argument('--incidents', type=int, default=None)
+    parser.add_argument('--responses', type=float, default=1.5, help='Мер реагирования на инцидент (в среднем)')
+    parser.add_argument('--sources', type=float, default=1.0, help='Источников на инцидент (в среднем)')
+    parser.add_argument('--attachments', type=float, default=0.25, help='Вложений на инцидент (в среднем)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    parser.add_argument('--database-url', default=None, help='По умолчанию — DATABASE_URL')
+    parser.add_argument('--create-schema', action='store_true', help='db.create_all() (локальная SQLite)')
+    args = parser.parse_args()
+
+    # Config читает DATABASE_URL при импорте
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from app import create_app
+    from extensions import db
+    from services.bootstrap import bootstrap
+
+    app = create_app()
+    if args.create_schema:
+        with app.app_context():
+            db.create_all()
+    bootstrap(app)
+
+    with app.app_context():
+        generate(db.session, _counts(args), args)
+
+
+if __name__ == '__main__':
+    main()
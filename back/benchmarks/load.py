@@ -0,0 +1,349 @@
+# benchmarks/load.py
+# Нагрузочный тест HTTP API на наборе данных benchmarks/dataset.py.
+#
+# --concurrency потоков в течение --duration секунд выполняют случайные
+# операции (веса — OPERATIONS): вход, список сотрудников, список и карточка
+# инцидента, «мои инциденты», назначение и завершение с генерацией PDF.
+# Сервер запускается отдельно (flask / gunicorn / uvicorn asgi.main:app).
+#
+# Результат — JSON-файл (--output): p50/p95/p99, среднее и максимум задержки,
+# пропускная способность и ошибки по операциям, а также число SQL-запросов
+# на запрос — из разницы /metrics до и после прогона (если метрики
+# доступны). Два файла сравниваются benchmarks/compare.py.
+#
+# Запуск из каталога back/:
+#   python -m benchmarks.load --url http://127.0.0.1:5000 --duration 30 --concurrency 16 --output before.json
+import argparse
+import http.client
+import json
+import math
+import random
+import re
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from benchmarks.dataset import BENCH_PASSWORD
+
+# операция -> (вес, endpoint Flask-приложения для счётчиков SQL из /metrics)
+OPERATIONS = {
+    'login': (1, 'auth.login'),
+    'roster': (2, 'employees.get_all_employees'),
+    'incident_list': (4, 'incidents.get_all_incidents'),
+    'incident_detail': (6, 'incidents.get_incident'),
+    'my_incidents': (3, 'incidents.get_my_incidents'),
+    'assign': (2, 'incidents.assign_incident'),
+    'complete': (1, 'incidents.complete_incident'),
+}
+
+PAGE_SIZE = 50
+# Сколько сотрудников набора входят в систему перед прогоном
+DEFAULT_USERS = 20
+# Сколько ждать PDF после завершения инцидента (операция complete_pdf)
+REPORT_WAIT_S = 30
+
+_METRIC_LINE = re.compile(r'^http_request_sql_queries_(sum|count)\{blueprint="[^"]*",endpoint="([^"]+)"\} (\S+)$')
+
+
+class Client:
+    # Одно keep-alive соединение на поток
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        payload = json.dumps(body) if body is not None else None
+        try:
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            # соединение закрыто сервером — одна повторная попытка на новом
+            self.connection.close()
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        return response.status, data
+
+    def json(self, method, path, token=None, body=None):
+        status, data = self.request(method, path, token, body)
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, operation, seconds, ok):
+        with self._lock:
+            self.latencies[operation].append(seconds)
+            if not ok:
+                self.errors[operation] += 1
+
+
+def percentile(values, p):
+    # Ближайший ранг по отсортированному списку
+    if not values:
+        return None
+    index = max(0, math.ceil(p / 100 * len(values)) - 1)
+    return values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'count': len(ordered),
+        'errors': errors,
+        'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else None,
+        'mean_ms': ms(sum(ordered) / len(ordered)) if ordered else None,
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+        'max_ms': ms(ordered[-1]) if ordered else None,
+    }
+
+
+# 📈 SQL-запросы на запрос из /metrics
+def scrape_queries(client):
+    try:
+        status, data = client.request('GET', '/metrics')
+    except OSError:
+        return None
+    if status != 200:
+        return None
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for line in data.decode().splitlines():
+        match = _METRIC_LINE.match(line)
+        if match:
+            kind, endpoint, value = match.groups()
+            totals[endpoint][0 if kind == 'sum' else 1] += float(value)
+    return totals
+
+
+def queries_per_request(before, after, endpoint):
+    if before is None or after is None:
+        return None
+    queries = after[endpoint][0] - before[endpoint][0]
+    requests = after[endpoint][1] - before[endpoint][1]
+    return round(queries / requests, 2) if requests else None
+
+
+# 🎭 Операции
+class Scenario:
+    def __init__(self, args):
+        self.args = args
+        self.admin_token = None
+        self.users = []          # [(id, email, token)]
+        self.incident_ids = []
+        self.open_incident_ids = []
+        self._lock = threading.Lock()
+
+    def prepare(self, client, log=print):
+        status, body = client.json('POST', '/api/auth/login',
+                                   body={'email': self.args.admin_email, 'password': self.args.admin_password})
+        if status != 200:
+            raise SystemExit(f"❌ Не удалось войти администратором: {status} {body}")
+        self.admin_token = body['access_token']
+
+        status, roster = client.json('GET', '/api/employees/', self.admin_token)
+        bench = [e for e in roster or [] if e['email'] and e['email'].startswith('bench')]
+        if not bench:
+            raise SystemExit("❌ Нет сотрудников набора данных: сначала python -m benchmarks.dataset")
+        for employee in random.Random(self.args.seed).sample(bench, min(self.args.users, len(bench))):
+            status, body = client.json('POST', '/api/auth/login',
+                                       body={'email': employee['email'], 'password': BENCH_PASSWORD})
+            if status == 200:
+                self.users.append((employee['id'], employee['email'], body['access_token']))
+
+        status, page = client.json('GET', f"/api/incidents/?limit={self.args.sample_incidents}", self.admin_token)
+        for incident in page or []:
+            self.incident_ids.append(incident['id'])
+            if (incident.get('status') or {}).get('name') != 'завершён':
+                self.open_incident_ids.append(incident['id'])
+        log(f"Подготовка: {len(self.users)} сотрудников, {len(self.incident_ids)} инцидентов в выборке")
+
+    def run(self, name, client, rng, recorder):
+        getattr(self, f"_{name}")(client, rng, recorder)
+
+    def _timed(self, recorder, name, client, method, path, token=None, body=None, ok=(200,)):
+        started = time.perf_counter()
+        try:
+            status, data = client.json(method, path, token, body)
+        except (OSError, http.client.HTTPException):
+            recorder.add(name, time.perf_counter() - started, False)
+            return None, None
+        recorder.add(name, time.perf_counter() - started, status in ok)
+        return status, data
+
+    def _login(self, client, rng, recorder):
+        _, email, _ = rng.choice(self.users)
+        self._timed(recorder, 'login', client, 'POST', '/api/auth/login',
+                    body={'email': email, 'password': BENCH_PASSWORD})
+
+    def _roster(self, client, rng, recorder):
+        self._timed(recorder, 'roster', client, 'GET', '/api/employees/', self.admin_token)
+
+    def _incident_list(self, client, rng, recorder):
+        self._timed(recorder, 'incident_list', client, 'GET', f"/api/incidents/?limit={PAGE_SIZE}", self.admin_token)
+
+    def _incident_detail(self, client, rng, recorder):
+        if self.incident_ids:
+            self._timed(recorder, 'incident_detail', client, 'GET',
+                        f"/api/incidents/{rng.choice(self.incident_ids)}", self.admin_token)
+
+    def _my_incidents(self, client, rng, recorder):
+        _, _, token = rng.choice(self.users)
+        self._timed(recorder, 'my_incidents', client, 'GET', f"/api/incidents/my?limit={PAGE_SIZE}", token)
+
+    def _assign(self, client, rng, recorder):
+        # Назначаем на сотрудников, вошедших в систему, чтобы им было что завершать
+        with self._lock:
+            if not self.open_incident_ids:
+                return
+            incident_id = rng.choice(self.open_incident_ids)
+        employee_id, _, _ = rng.choice(self.users)
+        status, _ = self._timed(recorder, 'assign', client, 'POST',
+                                f"/api/incidents/{incident_id}/assign/{employee_id}", self.admin_token, ok=(200, 400))
+        if status == 400:
+            self._forget(incident_id)
+
+    def _complete(self, client, rng, recorder):
+        _, _, token = rng.choice(self.users)
+        status, page = client.json('GET', f"/api/incidents/my?limit={PAGE_SIZE}", token)
+        candidates = [i['id'] for i in page or [] if (i.get('status') or {}).get('name') != 'завершён']
+        if status != 200 or not candidates:
+            return
+        incident_id = rng.choice(candidates)
+        started = time.perf_counter()
+        status, body = self._timed(recorder, 'complete', client, 'POST',
+                                   f"/api/incidents/{incident_id}/complete", token, ok=(202,))
+        self._forget(incident_id)
+        if status != 202:
+            return
+        # Время до готового PDF — отдельная операция complete_pdf
+        deadline = started + REPORT_WAIT_S
+        while time.perf_counter() < deadline:
+            status, job = client.json('GET', body['status_url'], token)
+            if status != 200 or job['status'] != 'pending':
+                recorder.add('complete_pdf', time.perf_counter() - started, status == 200 and job['status'] == 'done')
+                return
+            time.sleep(0.05)
+        recorder.add('complete_pdf', time.perf_counter() - started, False)
+
+    def _forget(self, incident_id):
+        with self._lock:
+            if incident_id in self.open_incident_ids:
+                self.open_incident_ids.remove(incident_id)
+
+
+def _worker(scenario, args, recorder, deadline, seed):
+    rng = random.Random(seed)
+    client = Client(args.url, args.timeout)
+    names = list(OPERATIONS)
+    weights = [OPERATIONS[name][0] for name in names]
+    while time.perf_counter() < deadline:
+        scenario.run(rng.choices(names, weights)[0], client, rng, recorder)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args, log=print):
+    scenario = Scenario(args)
+    control = Client(args.url, args.timeout)
+    scenario.prepare(control, log)
+    before = scrape_queries(control)
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=_worker, args=(scenario, args, recorder, deadline, args.seed + n), daemon=True)
+        for n in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    after = scrape_queries(control)
+    operations = {}
+    for name in sorted(recorder.latencies):
+        summary = summarize(recorder.latencies[name], recorder.errors[name], elapsed)
+        endpoint = OPERATIONS.get(name, (None, None))[1]
+        summary['queries_per_request'] = queries_per_request(before, after, endpoint) if endpoint else None
+        operations[name] = summary
+
+    all_latencies = [value for name, values in recorder.latencies.items() if name != 'complete_pdf' for value in values]
+    total_errors = sum(count for name, count in recorder.errors.items() if name != 'complete_pdf')
+    return {
+        'meta': {
+            'started_at': datetime.utcnow().replace(microsecond=0).isoformat() + 'Z',
+            'url': args.url,
+            'label': args.label,
+            'git_revision': _git_revision(),
+            'concurrency': args.concurrency,
+            'duration_s': round(elapsed, 2),
+            'seed': args.seed,
+            'metrics_available': before is not None,
+        },
+        'total': summarize(all_latencies, total_errors, elapsed),
+        'operations': operations,
+    }
+
+
+def print_report(result, log=print):
+    log(f"{'операция':16s} {'запросов':>9s} {'ошибок':>7s} {'rps':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'SQL/запр':>9s}")
+    rows = list(result['operations'].items()) + [('ИТОГО', result['total'])]
+    for name, s in rows:
+        fmt = lambda value: '-' if value is None else f"{value:.1f}"
+        log(f"{name:16s} {s['count']:9d} {s['errors']:7d} {fmt(s['throughput_rps']):>8s} {fmt(s['p50_ms']):>8s} "
+            f"{fmt(s['p95_ms']):>8s} {fmt(s['p99_ms']):>8s} {fmt(s.get('queries_per_request')):>9s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест API')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS)
+    parser.add_argument('--sample-incidents', type=int, default=200,
+                        help='Сколько инцидентов взять для карточек и назначений (не больше MAX_PAGE_SIZE)')
+    parser.add_argument('--admin-email', default='admin@airport.com')
+    parser.add_argument('--admin-password', default='Pa$$w0rd!')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default=None, help='Подпись прогона в файле результата')
+    parser.add_argument('--output', default=None, help='JSON-файл результата')
+    args = parser.parse_args()
+
+    result = run(args)
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"✅ Результат: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
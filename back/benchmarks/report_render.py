@@ -0,0 +1,83 @@
+# benchmarks/report_render.py
+# Сравнение времени и размера PDF-отчёта: прежний вариант (add_font на каждый
+# отчёт, полное встраивание подмножества) против services.report_renderer.
+#
+# Запуск из каталога back/:
+#   python -m benchmarks.report_render --reports 200
+import argparse
+import os
+import tempfile
+import time
+
+from fpdf import FPDF
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'static', 'fonts', 'DejaVuSans.ttf')
+
+
+def sample_payload(n):
+    return {
+        'id': n,
+        'title': f"Задымление в зоне {n % 7}",
+        'incident_type': 'пожарная безопасность',
+        'description': f"Датчик №{n} зафиксировал дым у выхода {n % 12}",
+        'location_name': 'Терминал A',
+        'resolved_by': 'Иван Петров',
+        'resolved_at': '2024-01-01 10:00:00',
+    }
+
+
+# Прежний код из complete_incident
+def legacy_render(payload, path):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.add_font('DejaVu', '', FONT_PATH, uni=True)
+    # метрики в DejaVuSans.pkl ссылаются на путь с машины автора
+    pdf.fonts['dejavu']['ttffile'] = FONT_PATH
+    pdf.set_font('DejaVu', '', 14)
+    pdf.cell(200, 10, txt="Incident Resolution Report", ln=True, align="C")
+    pdf.ln(10)
+    pdf.set_font('DejaVu', '', 12)
+    pdf.cell(200, 10, txt=f"Incident ID: {payload['id']}", ln=True)
+    pdf.cell(200, 10, txt=f"Title: {payload['title']}", ln=True)
+    pdf.cell(200, 10, txt=f"Type: {payload['incident_type']}", ln=True)
+    pdf.cell(200, 10, txt=f"Description: {payload['description'] or '-'}", ln=True)
+    pdf.cell(200, 10, txt=f"Location: {payload['location_name']}", ln=True)
+    pdf.cell(200, 10, txt=f"Resolved by: {payload['resolved_by']}", ln=True)
+    pdf.cell(200, 10, txt=f"Resolved at: {payload['resolved_at']} UTC", ln=True)
+    pdf.output(path)
+
+
+def cached_render(payload, path):
+    from services.report_renderer import render_report
+    render_report(payload, path, FONT_PATH)
+
+
+def run(name, render, reports, workdir):
+    sizes = []
+    started = time.perf_counter()
+    for n in range(reports):
+        path = os.path.join(workdir, f"{name}-{n}.pdf")
+        render(sample_payload(n), path)
+        sizes.append(os.path.getsize(path))
+    elapsed = time.perf_counter() - started
+    per_report = elapsed / reports * 1000
+    avg_size = sum(sizes) / len(sizes)
+    print(f"{name:8s} {per_report:8.2f} мс/отчёт  {avg_size / 1024:8.1f} КБ/отчёт")
+    return per_report, avg_size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reports', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        old_time, old_size = run('legacy', legacy_render, args.reports, workdir)
+        new_time, new_size = run('cached', cached_render, args.reports, workdir)
+
+    print(f"ускорение: x{old_time / new_time:.1f}, размер: {new_size / old_size:.0%} от прежнего")
+
+
+if __name__ == '__main__':
+    main()
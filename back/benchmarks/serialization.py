@@ -0,0 +1,152 @@
+# benchmarks/serialization.py
+# Время сериализации списка инцидентов: IncidentSchema (marshmallow + ленивые
+# загрузки + json) против services.serializers (колоночные выборки + orjson),
+# а также прежний Incident.to_dict против incident_summary.
+#
+# Данные генерируются в SQLite в памяти. Запуск из каталога back/:
+#   python -m benchmarks.serialization --incidents 10000
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event, select
+
+from extensions import db
+from models import Employee, Incident, IncidentStatus, Location, IncidentResponse, IncidentSource, Attachment
+from services import reference_data
+
+
+def create_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['REFERENCE_DATA_TTL'] = 3600
+    db.init_app(app)
+    return app
+
+
+def seed(incidents, employees=50):
+    db.create_all()
+    db.session.add_all([
+        IncidentStatus(id=1, name='новый', description='Инцидент только что создан'),
+        IncidentStatus(id=2, name='в работе', description='Инцидент в процессе расследования'),
+        IncidentStatus(id=3, name='завершён', description='Инцидент завершён'),
+        Location(id=1, location_name="Терминал A", location_type="пассажирская зона"),
+        Location(id=2, location_name="Грузовой отсек", location_type="техническая зона"),
+    ])
+    db.session.add_all([
+        Employee(id=n, first_name=f"Имя{n}", last_name=f"Фамилия{n}", position='Сотрудник',
+                 email=f"user{n}@airport.com", phone='0000000000', role='user', password='x' * 100)
+        for n in range(1, employees + 1)
+    ])
+    start = datetime(2024, 1, 1)
+    db.session.execute(Incident.__table__.insert(), [
+        {
+            'id': n, 'title': f"Инцидент {n}", 'description': 'Описание ' * 5, 'incident_type': 'безопасность',
+            'incident_datetime': start + timedelta(minutes=n), 'location_id': n % 2 + 1,
+            'assigned_employee_id': n % employees + 1, 'status_id': n % 3 + 1,
+            'created_at': start, 'updated_at': start,
+        }
+        for n in range(1, incidents + 1)
+    ])
+    db.session.execute(IncidentResponse.__table__.insert(), [
+        {'incident_id': n, 'action_taken': 'Проверено', 'performed_by_id': (n * 7) % employees + 1,
+         'response_datetime': start}
+        for n in range(1, incidents + 1)
+    ])
+    db.session.execute(IncidentSource.__table__.insert(), [
+        {'incident_id': n, 'source_type': 'камера', 'source_description': f"Камера {n % 40}"}
+        for n in range(1, incidents + 1)
+    ])
+    db.session.execute(Attachment.__table__.insert(), [
+        {'incident_id': n, 'file_url': f"/static/uploads/{n}.jpg", 'uploaded_at': start}
+        for n in range(1, incidents + 1, 4)
+    ])
+    db.session.commit()
+
+
+# Прежний Incident.to_dict (статус и локация через ленивые связи)
+def legacy_to_dict(incident):
+    return {
+        'id': incident.id,
+        'title': incident.title,
+        'description': incident.description,
+        'incident_type': incident.incident_type,
+        'incident_datetime': incident.incident_datetime.isoformat() if incident.incident_datetime else None,
+        'location': {
+            'id': incident.location.id,
+            'location_name': incident.location.location_name
+        } if incident.location else None,
+        'status': {
+            'id': incident.status.id,
+            'name': incident.status.name
+        } if incident.status else None,
+        'assigned_employee': {
+            'id': incident.assigned_employee.id,
+            'first_name': incident.assigned_employee.first_name,
+            'last_name': incident.assigned_employee.last_name,
+            'email': incident.assigned_employee.email
+        } if incident.assigned_employee else None,
+        'conclusion': incident.conclusion,
+        'created_at': incident.created_at.isoformat() if incident.created_at else None,
+        'updated_at': incident.updated_at.isoformat() if incident.updated_at else None
+    }
+
+
+def marshmallow_list():
+    from schemas.incident_schema import IncidentSchema
+    incidents = Incident.query.order_by(Incident.id).all()
+    return json.dumps(IncidentSchema(many=True).dump(incidents)).encode()
+
+
+def fast_list():
+    from services.serializers import dumps, incident_rows, incidents_payload
+    rows = incident_rows(db.session, select(Incident).order_by(Incident.id))
+    return dumps(incidents_payload(db.session, rows))
+
+
+def legacy_summaries():
+    return json.dumps([legacy_to_dict(i) for i in Incident.query.order_by(Incident.id).all()]).encode()
+
+
+def fast_summaries():
+    from services.serializers import dumps
+    return dumps([i.to_dict() for i in Incident.query.order_by(Incident.id).all()])
+
+
+def run(name, fn, incidents, queries):
+    db.session.remove()
+    queries.clear()
+    started = time.perf_counter()
+    body = fn()
+    elapsed = time.perf_counter() - started
+    per_10k = elapsed * 10000 / incidents * 1000
+    print(f"{name:20s} {per_10k:10.1f} мс/10k  {len(queries):6d} запросов  {len(body) / 1024:8.0f} КБ")
+    return per_10k
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--incidents', type=int, default=10000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        seed(args.incidents)
+        reference_data.load()
+
+        queries = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: queries.append(a[2]))
+
+        old = run('IncidentSchema', marshmallow_list, args.incidents, queries)
+        new = run('serializers', fast_list, args.incidents, queries)
+        print(f"список: ускорение x{old / new:.1f}")
+
+        old = run('to_dict (прежний)', legacy_summaries, args.incidents, queries)
+        new = run('to_dict', fast_summaries, args.incidents, queries)
+        print(f"to_dict: ускорение x{old / new:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# gunicorn.conf.py — рабочий запуск Flask-приложения (из каталога back):
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Настройки переопределяются переменными окружения:
+#   GUNICORN_BIND        адрес (0.0.0.0:5000)
+#   WEB_CONCURRENCY      число воркеров (по умолчанию 2 * CPU + 1)
+#   GUNICORN_THREADS     потоков в воркере (gthread)
+#   EVENTS_FLASK_STREAMS SSE-соединений /api/incidents/events на воркер (0 —
+#                        поток событий отдаёт только uvicorn asgi.main:app);
+#                        каждое занимает поток на всё время соединения
+#   GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT, GUNICORN_MAX_REQUESTS
+#
+# Плавный перезапуск: kill -HUP <master> — новые воркеры, старые дорабатывают
+# текущие запросы (graceful_timeout). Из-за preload_app новый код так не
+# подхватывается; для обновления кода без простоя: kill -USR2 <master>
+# (стартует новый мастер), затем kill -WINCH и kill -QUIT старому мастеру.
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# SSE не должны занимать все потоки: обычным запросам остаётся
+# threads - EVENTS_FLASK_STREAMS
+if int(os.environ.get('EVENTS_FLASK_STREAMS', 0)) >= threads:
+    raise RuntimeError('EVENTS_FLASK_STREAMS должно быть меньше GUNICORN_THREADS')
+
+# Приложение импортируется в мастере до fork (wsgi.py): быстрый старт
+# воркеров и общие страницы памяти
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Периодический перезапуск воркера ограничивает рост памяти; jitter — чтобы
+# воркеры не перезапускались одновременно
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
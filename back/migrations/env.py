@@ -0,0 +1,55 @@
+# migrations/env.py
+# Alembic работает с тем же db (extensions.db) и конфигурацией, что и приложение.
+from logging.config import fileConfig
+
+from alembic import context
+
+from app import create_app
+from extensions import db
+from services.incident_archive import is_partition
+
+app = create_app()
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = db.metadata
+
+# Таблицы поиска (services/incident_search) создаются сырым SQL и не описаны
+# в моделях; у FTS5 ещё и служебные incident_search_* — autogenerate их не трогает
+SEARCH_TABLE_PREFIX = 'incident_search'
+
+
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        # секции архивных таблиц (incidents_archive_p202401 и т.п.) тоже
+        return not name.startswith(SEARCH_TABLE_PREFIX) and not is_partition(name)
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=app.config['SQLALCHEMY_DATABASE_URI'],
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with app.app_context():
+        with db.engine.connect() as connection:
+            context.configure(connection=connection, target_metadata=target_metadata,
+                              include_name=include_name)
+            with context.begin_transaction():
+                context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,82 @@
+"""baseline: схема, которую создавали модели до появления миграций
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'employees',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('first_name', sa.String(100), nullable=False),
+        sa.Column('last_name', sa.String(100), nullable=False),
+        sa.Column('position', sa.String(100)),
+        sa.Column('email', sa.String(100), unique=True),
+        sa.Column('phone', sa.String(20)),
+        sa.Column('role', sa.String(50)),
+        sa.Column('password', sa.String(200), nullable=False),
+    )
+    op.create_table(
+        'locations',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('location_name', sa.String(100), nullable=False),
+        sa.Column('location_type', sa.String(50)),
+    )
+    op.create_table(
+        'incident_statuses',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(50), nullable=False),
+        sa.Column('description', sa.Text()),
+    )
+    op.create_table(
+        'incidents',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('title', sa.String(150), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('incident_type', sa.String(50), nullable=False),
+        sa.Column('incident_datetime', sa.DateTime()),
+        sa.Column('location_id', sa.Integer(), sa.ForeignKey('locations.id')),
+        sa.Column('assigned_employee_id', sa.Integer(), sa.ForeignKey('employees.id')),
+        sa.Column('status_id', sa.Integer(), sa.ForeignKey('incident_statuses.id'), nullable=False),
+        sa.Column('conclusion', sa.Text()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    op.create_table(
+        'incident_responses',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('incident_id', sa.Integer(), sa.ForeignKey('incidents.id'), nullable=False),
+        sa.Column('action_taken', sa.Text(), nullable=False),
+        sa.Column('performed_by_id', sa.Integer(), sa.ForeignKey('employees.id')),
+        sa.Column('response_datetime', sa.DateTime()),
+    )
+    op.create_table(
+        'incident_sources',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('incident_id', sa.Integer(), sa.ForeignKey('incidents.id'), nullable=False),
+        sa.Column('source_type', sa.String(50)),
+        sa.Column('source_description', sa.Text()),
+    )
+    op.create_table(
+        'attachments',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('incident_id', sa.Integer(), sa.ForeignKey('incidents.id'), nullable=False),
+        sa.Column('file_url', sa.Text(), nullable=False),
+        sa.Column('uploaded_at', sa.DateTime()),
+    )
+
+
+def downgrade():
+    for table in ('attachments', 'incident_sources', 'incident_responses', 'incidents',
+                  'incident_statuses', 'locations', 'employees'):
+        op.drop_table(table)
@@ -0,0 +1,30 @@
+"""проекция employee_active_incidents для списка сотрудников
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'employee_active_incidents',
+        sa.Column('employee_id', sa.Integer(),
+                  sa.ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('incident_id', sa.Integer(),
+                  sa.ForeignKey('incidents.id', ondelete='CASCADE'), nullable=False),
+    )
+    op.create_index('ix_employee_active_incidents_incident_id', 'employee_active_incidents', ['incident_id'])
+
+
+def downgrade():
+    op.drop_index('ix_employee_active_incidents_incident_id', table_name='employee_active_incidents')
+    op.drop_table('employee_active_incidents')
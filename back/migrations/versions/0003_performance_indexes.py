@@ -0,0 +1,48 @@
+"""индексы под запросы из routes/
+
+incidents: составные индексы (фильтр, incident_datetime, id) для keyset-пагинации
+списков, /my, списка сотрудников (оконная функция по assigned_employee_id)
+и выгрузки. Дочерние таблицы: индексы по внешним ключам.
+
+На PostgreSQL индексы строятся CONCURRENTLY, без блокировки записи.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки) — используется также в scripts/explain_queries.py
+PERFORMANCE_INDEXES = (
+    ('ix_incidents_datetime_id', 'incidents', ['incident_datetime', 'id']),
+    ('ix_incidents_status_datetime', 'incidents', ['status_id', 'incident_datetime', 'id']),
+    ('ix_incidents_type_datetime', 'incidents', ['incident_type', 'incident_datetime', 'id']),
+    ('ix_incidents_location_datetime', 'incidents', ['location_id', 'incident_datetime', 'id']),
+    ('ix_incidents_assignee_datetime', 'incidents', ['assigned_employee_id', 'incident_datetime', 'id']),
+    ('ix_incident_responses_incident_id', 'incident_responses', ['incident_id']),
+    ('ix_incident_responses_performed_by_id', 'incident_responses', ['performed_by_id']),
+    ('ix_incident_sources_incident_id', 'incident_sources', ['incident_id']),
+    ('ix_attachments_incident_id', 'attachments', ['incident_id']),
+)
+
+
+def _concurrently():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in PERFORMANCE_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=_concurrently())
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(PERFORMANCE_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=_concurrently())
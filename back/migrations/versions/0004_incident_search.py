@@ -0,0 +1,28 @@
+"""полнотекстовый поиск по инцидентам (incident_search)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+from sqlalchemy.orm import Session
+
+from services.incident_search import create_search_index, drop_search_index, rebuild, ts_config
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # PostgreSQL: tsvector + GIN, SQLite: FTS5. Сразу заполняется по
+    # существующим инцидентам в транзакции миграции
+    bind = op.get_bind()
+    create_search_index(bind, ts_config())
+    rebuild(Session(bind=bind))
+
+
+def downgrade():
+    drop_search_index(op.get_bind())
@@ -0,0 +1,34 @@
+"""агрегаты incident_stats для /api/incidents/stats
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from services.incident_stats import rebuild
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'incident_stats',
+        sa.Column('dimension', sa.String(16), primary_key=True),
+        sa.Column('key', sa.String(64), primary_key=True),
+        sa.Column('incident_count', sa.Integer(), nullable=False),
+        sa.Column('resolved_count', sa.Integer(), nullable=False),
+        sa.Column('resolve_seconds', sa.BigInteger(), nullable=False),
+    )
+    # Заполняется по существующим инцидентам в транзакции миграции
+    rebuild(Session(bind=op.get_bind()))
+
+
+def downgrade():
+    op.drop_table('incident_stats')
@@ -0,0 +1,52 @@
+"""дельта-синхронизация: журнал incident_tombstones и индексы по updated_at
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+SYNC_INDEXES = (
+    ('ix_incidents_updated_at_id', ['updated_at', 'id']),
+    ('ix_incidents_assignee_updated_at', ['assigned_employee_id', 'updated_at', 'id']),
+)
+
+
+def _concurrently():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    op.create_table(
+        'incident_tombstones',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('assigned_employee_id', sa.Integer()),
+        sa.Column('reason', sa.String(16), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_incident_tombstones_deleted_at_id', 'incident_tombstones', ['deleted_at', 'id'])
+    op.create_index('ix_incident_tombstones_employee_deleted_at', 'incident_tombstones',
+                    ['assigned_employee_id', 'deleted_at', 'id'])
+    # Строки без updated_at не попали бы в синхронизацию
+    op.execute("UPDATE incidents SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL")
+
+    with op.get_context().autocommit_block():
+        for name, columns in SYNC_INDEXES:
+            op.create_index(name, 'incidents', columns, postgresql_concurrently=_concurrently())
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, columns in reversed(SYNC_INDEXES):
+            op.drop_index(name, table_name='incidents', postgresql_concurrently=_concurrently())
+    op.drop_index('ix_incident_tombstones_employee_deleted_at', table_name='incident_tombstones')
+    op.drop_index('ix_incident_tombstones_deleted_at_id', table_name='incident_tombstones')
+    op.drop_table('incident_tombstones')
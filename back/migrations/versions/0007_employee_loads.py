@@ -0,0 +1,46 @@
+"""нагрузка сотрудников employee_loads и закреплённая локация для автоназначения
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from services.assignment import rebuild
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('employees') as batch:
+        batch.add_column(sa.Column('location_id', sa.Integer()))
+        batch.create_foreign_key('employees_location_id_fkey', 'locations', ['location_id'], ['id'])
+
+    op.create_table(
+        'employee_loads',
+        sa.Column('employee_id', sa.Integer(),
+                  sa.ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('eligible', sa.Boolean(), nullable=False),
+        sa.Column('location_id', sa.Integer()),
+        sa.Column('open_count', sa.Integer(), nullable=False),
+    )
+    op.create_index('ix_employee_loads_pick', 'employee_loads', ['eligible', 'open_count', 'employee_id'])
+    op.create_index('ix_employee_loads_location_pick', 'employee_loads',
+                    ['eligible', 'location_id', 'open_count', 'employee_id'])
+    # Заполняется по существующим сотрудникам и инцидентам в транзакции миграции
+    rebuild(Session(bind=op.get_bind()))
+
+
+def downgrade():
+    op.drop_index('ix_employee_loads_location_pick', table_name='employee_loads')
+    op.drop_index('ix_employee_loads_pick', table_name='employee_loads')
+    op.drop_table('employee_loads')
+    with op.batch_alter_table('employees') as batch:
+        batch.drop_constraint('employees_location_id_fkey', type_='foreignkey')
+        batch.drop_column('location_id')
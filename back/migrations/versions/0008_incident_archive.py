@@ -0,0 +1,127 @@
+"""архив завершённых инцидентов: таблицы *_archive (секции по completed_at в PostgreSQL)
+
+Поисковые документы архивных инцидентов остаются в incident_search, поэтому
+внешний ключ incident_search -> incidents снимается. Откат возвращает
+архивные строки в горячие таблицы.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+PARTITIONING = {'postgresql_partition_by': 'RANGE (completed_at)'}
+
+# (горячая таблица, колонки) — архивная таблица: <горячая>_archive + completed_at
+ARCHIVED_TABLES = (
+    ('incidents', ('id', 'title', 'description', 'incident_type', 'incident_datetime', 'location_id',
+                   'assigned_employee_id', 'status_id', 'conclusion', 'created_at', 'updated_at')),
+    ('incident_responses', ('id', 'incident_id', 'action_taken', 'performed_by_id', 'response_datetime')),
+    ('incident_sources', ('id', 'incident_id', 'source_type', 'source_description')),
+    ('attachments', ('id', 'incident_id', 'file_url', 'uploaded_at')),
+)
+
+ARCHIVE_INDEXES = (
+    ('ix_incidents_archive_id', 'incidents_archive', ['id']),
+    ('ix_incidents_archive_datetime_id', 'incidents_archive', ['incident_datetime', 'id']),
+    ('ix_incidents_archive_assignee', 'incidents_archive', ['assigned_employee_id']),
+    ('ix_incident_responses_archive_incident_id', 'incident_responses_archive', ['incident_id']),
+    ('ix_incident_responses_archive_performed_by_id', 'incident_responses_archive', ['performed_by_id']),
+    ('ix_incident_sources_archive_incident_id', 'incident_sources_archive', ['incident_id']),
+    ('ix_attachments_archive_incident_id', 'attachments_archive', ['incident_id']),
+)
+
+
+def _is_postgresql():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _completed_at():
+    return sa.Column('completed_at', sa.DateTime(), primary_key=True)
+
+
+def upgrade():
+    op.create_table(
+        'incidents_archive',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('title', sa.String(150), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('incident_type', sa.String(50), nullable=False),
+        sa.Column('incident_datetime', sa.DateTime()),
+        sa.Column('location_id', sa.Integer()),
+        sa.Column('assigned_employee_id', sa.Integer()),
+        sa.Column('status_id', sa.Integer(), nullable=False),
+        sa.Column('conclusion', sa.Text()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+        _completed_at(),
+        **PARTITIONING,
+    )
+    op.create_table(
+        'incident_responses_archive',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('action_taken', sa.Text(), nullable=False),
+        sa.Column('performed_by_id', sa.Integer()),
+        sa.Column('response_datetime', sa.DateTime()),
+        _completed_at(),
+        **PARTITIONING,
+    )
+    op.create_table(
+        'incident_sources_archive',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('source_type', sa.String(50)),
+        sa.Column('source_description', sa.Text()),
+        _completed_at(),
+        **PARTITIONING,
+    )
+    op.create_table(
+        'attachments_archive',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('file_url', sa.Text(), nullable=False),
+        sa.Column('uploaded_at', sa.DateTime()),
+        _completed_at(),
+        **PARTITIONING,
+    )
+    for name, table, columns in ARCHIVE_INDEXES:
+        op.create_index(name, table, columns)
+
+    if _is_postgresql():
+        op.execute("ALTER TABLE IF EXISTS incident_search DROP CONSTRAINT IF EXISTS incident_search_incident_id_fkey")
+
+    # Отбор кандидатов на архивацию: завершённые по updated_at
+    with op.get_context().autocommit_block():
+        op.create_index('ix_incidents_status_updated_at', 'incidents', ['status_id', 'updated_at', 'id'],
+                        postgresql_concurrently=_is_postgresql())
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_incidents_status_updated_at', table_name='incidents',
+                      postgresql_concurrently=_is_postgresql())
+
+    # Архив возвращается в горячие таблицы: сначала инциденты, потом дочерние
+    for table, columns in ARCHIVED_TABLES:
+        column_list = ', '.join(columns)
+        op.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {table}_archive")
+
+    if _is_postgresql():
+        op.execute(
+            "ALTER TABLE IF EXISTS incident_search ADD CONSTRAINT incident_search_incident_id_fkey"
+            " FOREIGN KEY (incident_id) REFERENCES incidents (id) ON DELETE CASCADE"
+        )
+
+    for name, table, columns in reversed(ARCHIVE_INDEXES):
+        op.drop_index(name, table_name=table)
+    # в PostgreSQL секции удаляются вместе с родительской таблицей
+    for table, _ in reversed(ARCHIVED_TABLES):
+        op.drop_table(f"{table}_archive")
@@ -0,0 +1,38 @@
+"""задачи генерации PDF-отчётов report_jobs
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'report_jobs',
+        sa.Column('id', sa.String(64), primary_key=True),
+        sa.Column('incident_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(16), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('content_digest', sa.String(64), nullable=False),
+        sa.Column('pdf_url', sa.Text()),
+        sa.Column('error', sa.Text()),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_report_jobs_incident_created', 'report_jobs', ['incident_id', 'created_at'])
+    op.create_index('ix_report_jobs_status_updated', 'report_jobs', ['status', 'updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_report_jobs_status_updated', table_name='report_jobs')
+    op.drop_index('ix_report_jobs_incident_created', table_name='report_jobs')
+    op.drop_table('report_jobs')
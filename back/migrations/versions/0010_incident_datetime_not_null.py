@@ -0,0 +1,33 @@
+"""incidents.incident_datetime NOT NULL
+
+Ключ постраничной выдачи (incident_datetime, id) не должен содержать NULL:
+курсор с пустой датой не разбирается, а сравнение кортежей отбрасывает
+такие строки. Пустые значения заполняются created_at.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "UPDATE incidents SET incident_datetime = COALESCE(created_at, CURRENT_TIMESTAMP) "
+        "WHERE incident_datetime IS NULL"
+    )
+    # SQLite: batch пересоздаёт таблицу вместе с индексами
+    with op.batch_alter_table('incidents') as batch:
+        batch.alter_column('incident_datetime', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('incidents') as batch:
+        batch.alter_column('incident_datetime', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,33 @@
+"""report_jobs.heartbeat_at: отметки живого процесса вместо времени постановки
+
+Задача считается потерянной, только если процесс, который её держит, давно
+не отмечался: очередь в пуле больше не принимается за сбой.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('report_jobs', sa.Column('heartbeat_at', sa.DateTime()))
+    op.execute("UPDATE report_jobs SET heartbeat_at = updated_at")
+    with op.batch_alter_table('report_jobs') as batch:
+        batch.alter_column('heartbeat_at', existing_type=sa.DateTime(), nullable=False)
+    op.drop_index('ix_report_jobs_status_updated', table_name='report_jobs')
+    op.create_index('ix_report_jobs_status_heartbeat', 'report_jobs', ['status', 'heartbeat_at'])
+
+
+def downgrade():
+    op.drop_index('ix_report_jobs_status_heartbeat', table_name='report_jobs')
+    op.create_index('ix_report_jobs_status_updated', 'report_jobs', ['status', 'updated_at'])
+    with op.batch_alter_table('report_jobs') as batch:
+        batch.drop_column('heartbeat_at')
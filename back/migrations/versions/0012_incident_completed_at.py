@@ -0,0 +1,37 @@
+"""incidents.completed_at: время завершения отдельно от updated_at
+
+updated_at сдвигается и после завершения (ссылка на отчёт, обнуление
+исполнителя при удалении сотрудника), поэтому время завершения для
+статистики и архивации хранится в своей колонке. Для уже завершённых
+инцидентов она заполняется updated_at — тем, что использовалось до сих пор;
+агрегаты incident_stats пересчитываются.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from services.incident_stats import rebuild
+
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('incidents', sa.Column('completed_at', sa.DateTime()))
+    op.execute(
+        "UPDATE incidents SET completed_at = updated_at "
+        "WHERE status_id IN (SELECT id FROM incident_statuses WHERE name = 'завершён')"
+    )
+    rebuild(Session(bind=op.get_bind()))
+
+
+def downgrade():
+    with op.batch_alter_table('incidents') as batch:
+        batch.drop_column('completed_at')
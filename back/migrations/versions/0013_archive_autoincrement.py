@@ -0,0 +1,50 @@
+"""архивация по completed_at; AUTOINCREMENT для горячих таблиц в SQLite
+
+Кандидаты на архивацию отбираются по времени завершения (completed_at,
+миграция 0012), а не по updated_at. В SQLite горячие таблицы пересоздаются
+с AUTOINCREMENT: без него id перенесённой в архив строки достаётся новой.
+PostgreSQL id из последовательности не переиспользует.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+HOT_TABLES = ('incidents', 'incident_responses', 'incident_sources', 'attachments')
+
+
+def _is_postgresql():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _set_autoincrement(value):
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in HOT_TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': value}):
+            pass
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_incidents_status_completed_at', 'incidents', ['status_id', 'completed_at', 'id'],
+                        postgresql_concurrently=_is_postgresql())
+        op.drop_index('ix_incidents_status_updated_at', table_name='incidents',
+                      postgresql_concurrently=_is_postgresql())
+    _set_autoincrement(True)
+
+
+def downgrade():
+    _set_autoincrement(False)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_incidents_status_updated_at', 'incidents', ['status_id', 'updated_at', 'id'],
+                        postgresql_concurrently=_is_postgresql())
+        op.drop_index('ix_incidents_status_completed_at', table_name='incidents',
+                      postgresql_concurrently=_is_postgresql())
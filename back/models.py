@@ -12,6 +12,7 @@ class Employee(db.Model):
     phone = db.Column(db.String(20))
     role = db.Column(db.String(50))  # 'admin' или 'user'
     password = db.Column(db.String(200), nullable=False)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.id'))  # закреплённая локация, для автоназначения
 
     assigned_incidents = db.relationship(
         'Incident',
@@ -41,13 +42,19 @@ class IncidentStatus(db.Model):
     incidents = db.relationship('Incident', backref='status', lazy=True)
 
 
+# Горячие таблицы, строки которых уходят в архив: SQLite без AUTOINCREMENT
+# выдал бы id перенесённой строки новой
+_HOT_TABLE_ARGS = {'sqlite_autoincrement': True}
+
+
 class Incident(db.Model):
     __tablename__ = 'incidents'
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text)
     incident_type = db.Column(db.String(50), nullable=False)
-    incident_datetime = db.Column(db.DateTime, default=datetime.utcnow)
+    # ключ постраничной выдачи (services/incident_queries.py) — без NULL
+    incident_datetime = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     location_id = db.Column(db.Integer, db.ForeignKey('locations.id'))
     assigned_employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'))
@@ -57,59 +64,212 @@ class Incident(db.Model):
     conclusion = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # время завершения: ставит только /complete, другие правки его не сдвигают
+    completed_at = db.Column(db.DateTime)
 
     assigned_employee = db.relationship('Employee', back_populates='assigned_incidents', foreign_keys=[assigned_employee_id])
     responses = db.relationship('IncidentResponse', backref='incident', lazy=True)
     sources = db.relationship('IncidentSource', backref='incident', lazy=True)
     attachments = db.relationship('Attachment', backref='incident', lazy=True)
 
+    # Составные индексы под постраничную выдачу по (incident_datetime, id) с фильтрами
+    __table_args__ = (
+        db.Index('ix_incidents_datetime_id', 'incident_datetime', 'id'),
+        db.Index('ix_incidents_status_datetime', 'status_id', 'incident_datetime', 'id'),
+        db.Index('ix_incidents_type_datetime', 'incident_type', 'incident_datetime', 'id'),
+        db.Index('ix_incidents_location_datetime', 'location_id', 'incident_datetime', 'id'),
+        db.Index('ix_incidents_assignee_datetime', 'assigned_employee_id', 'incident_datetime', 'id'),
+        # Дельта-синхронизация (/api/incidents/sync) по (updated_at, id)
+        db.Index('ix_incidents_updated_at_id', 'updated_at', 'id'),
+        db.Index('ix_incidents_assignee_updated_at', 'assigned_employee_id', 'updated_at', 'id'),
+        # Отбор завершённых инцидентов для архивации (services/incident_archive.py)
+        db.Index('ix_incidents_status_completed_at', 'status_id', 'completed_at', 'id'),
+        _HOT_TABLE_ARGS,
+    )
+
     def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'incident_type': self.incident_type,
-            'incident_datetime': self.incident_datetime.isoformat() if self.incident_datetime else None,
-            'location': {
-                'id': self.location.id,
-                'location_name': self.location.location_name
-            } if self.location else None,
-            'status': {
-                'id': self.status.id,
-                'name': self.status.name
-            } if self.status else None,
-            'assigned_employee': {
-                'id': self.assigned_employee.id,
-                'first_name': self.assigned_employee.first_name,
-                'last_name': self.assigned_employee.last_name,
-                'email': self.assigned_employee.email
-            } if self.assigned_employee else None,
-            'conclusion': self.conclusion,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        # статус и локация — из кеша справочников, без загрузки связей
+        from services.serializers import incident_summary, employee_ref
+        return incident_summary(self, employee_ref(self.assigned_employee))
+
+
+# Проекция «текущий незавершённый инцидент сотрудника» для быстрого списка сотрудников
+class EmployeeActiveIncident(db.Model):
+    __tablename__ = 'employee_active_incidents'
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True)
+    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id', ondelete='CASCADE'), nullable=False, index=True)
+
+
+# Нагрузка сотрудника для автоназначения (services/assignment.py): число
+# открытых назначенных инцидентов, eligible — role = 'user', location_id —
+# копия employees.location_id
+class EmployeeLoad(db.Model):
+    __tablename__ = 'employee_loads'
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id', ondelete='CASCADE'), primary_key=True)
+    eligible = db.Column(db.Boolean, nullable=False, default=False)
+    location_id = db.Column(db.Integer)
+    open_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_employee_loads_pick', 'eligible', 'open_count', 'employee_id'),
+        db.Index('ix_employee_loads_location_pick', 'eligible', 'location_id', 'open_count', 'employee_id'),
+    )
+
+
+# Агрегаты для /api/incidents/stats: счётчики по измерению (status, type,
+# location, assignee, day, hour, total) и сумма времени до завершения
+class IncidentStat(db.Model):
+    __tablename__ = 'incident_stats'
+    dimension = db.Column(db.String(16), primary_key=True)
+    key = db.Column(db.String(64), primary_key=True)
+    incident_count = db.Column(db.Integer, nullable=False, default=0)
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)
+    resolve_seconds = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+# Журнал удалений для /api/incidents/sync: инцидент удалён (reason='deleted'),
+# снят с сотрудника assigned_employee_id (reason='unassigned') или перенесён
+# в архив (reason='archived')
+class IncidentTombstone(db.Model):
+    __tablename__ = 'incident_tombstones'
+    id = db.Column(db.Integer, primary_key=True)
+    incident_id = db.Column(db.Integer, nullable=False)
+    assigned_employee_id = db.Column(db.Integer)
+    reason = db.Column(db.String(16), nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_incident_tombstones_deleted_at_id', 'deleted_at', 'id'),
+        db.Index('ix_incident_tombstones_employee_deleted_at', 'assigned_employee_id', 'deleted_at', 'id'),
+    )
+
+
+# Задачи генерации PDF-отчётов (services/reports.py). Пишутся в той же
+# транзакции, что и завершение инцидента; payload — данные для рендеринга,
+# content_digest — их хеш. Внешнего ключа нет: инцидент может уйти в архив.
+# heartbeat_at — последняя отметка процесса, который держит задачу в пуле
+class ReportJob(db.Model):
+    __tablename__ = 'report_jobs'
+    id = db.Column(db.String(64), primary_key=True)
+    incident_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='pending')
+    payload = db.Column(db.JSON, nullable=False)
+    content_digest = db.Column(db.String(64), nullable=False)
+    pdf_url = db.Column(db.Text)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_report_jobs_incident_created', 'incident_id', 'created_at'),
+        db.Index('ix_report_jobs_status_heartbeat', 'status', 'heartbeat_at'),
+    )
 
 
 class IncidentResponse(db.Model):
     __tablename__ = 'incident_responses'
     id = db.Column(db.Integer, primary_key=True)
-    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id'), nullable=False)
+    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id'), nullable=False, index=True)
     action_taken = db.Column(db.Text, nullable=False)
-    performed_by_id = db.Column(db.Integer, db.ForeignKey('employees.id'))
+    performed_by_id = db.Column(db.Integer, db.ForeignKey('employees.id'), index=True)
     response_datetime = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = _HOT_TABLE_ARGS
+
 
 class IncidentSource(db.Model):
     __tablename__ = 'incident_sources'
     id = db.Column(db.Integer, primary_key=True)
-    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id'), nullable=False)
+    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id'), nullable=False, index=True)
     source_type = db.Column(db.String(50))  # "человек", "система", "камера"
     source_description = db.Column(db.Text)
 
+    __table_args__ = _HOT_TABLE_ARGS
+
 
 class Attachment(db.Model):
     __tablename__ = 'attachments'
     id = db.Column(db.Integer, primary_key=True)
-    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id'), nullable=False)
+    incident_id = db.Column(db.Integer, db.ForeignKey('incidents.id'), nullable=False, index=True)
     file_url = db.Column(db.Text, nullable=False)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = _HOT_TABLE_ARGS
+
+
+# 🗄 Архив завершённых инцидентов (services/incident_archive.py): колонки те
+# же, что у горячих таблиц, и completed_at — время завершения инцидента
+# (в дочерних таблицах — копия из incidents).
+# В PostgreSQL таблицы секционированы по completed_at (секция на месяц),
+# поэтому completed_at входит в первичный ключ. Внешних ключей нет: архив
+# хранит историю как есть.
+_ARCHIVE_PARTITIONING = {'postgresql_partition_by': 'RANGE (completed_at)'}
+
+
+class IncidentArchive(db.Model):
+    __tablename__ = 'incidents_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(150), nullable=False)
+    description = db.Column(db.Text)
+    incident_type = db.Column(db.String(50), nullable=False)
+    incident_datetime = db.Column(db.DateTime)
+    location_id = db.Column(db.Integer)
+    assigned_employee_id = db.Column(db.Integer)
+    status_id = db.Column(db.Integer, nullable=False)
+    conclusion = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime, primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_incidents_archive_id', 'id'),
+        db.Index('ix_incidents_archive_datetime_id', 'incident_datetime', 'id'),
+        db.Index('ix_incidents_archive_assignee', 'assigned_employee_id'),
+        _ARCHIVE_PARTITIONING,
+    )
+
+
+class IncidentResponseArchive(db.Model):
+    __tablename__ = 'incident_responses_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    incident_id = db.Column(db.Integer, nullable=False)
+    action_taken = db.Column(db.Text, nullable=False)
+    performed_by_id = db.Column(db.Integer)
+    response_datetime = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime, primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_incident_responses_archive_incident_id', 'incident_id'),
+        db.Index('ix_incident_responses_archive_performed_by_id', 'performed_by_id'),
+        _ARCHIVE_PARTITIONING,
+    )
+
+
+class IncidentSourceArchive(db.Model):
+    __tablename__ = 'incident_sources_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    incident_id = db.Column(db.Integer, nullable=False)
+    source_type = db.Column(db.String(50))
+    source_description = db.Column(db.Text)
+    completed_at = db.Column(db.DateTime, primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_incident_sources_archive_incident_id', 'incident_id'),
+        _ARCHIVE_PARTITIONING,
+    )
+
+
+class AttachmentArchive(db.Model):
+    __tablename__ = 'attachments_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    incident_id = db.Column(db.Integer, nullable=False)
+    file_url = db.Column(db.Text, nullable=False)
+    uploaded_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime, primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_attachments_archive_incident_id', 'incident_id'),
+        _ARCHIVE_PARTITIONING,
+    )
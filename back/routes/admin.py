@@ -0,0 +1,14 @@
+# routes/admin.py
+from flask import Blueprint, jsonify
+from extensions import db
+from services.authz import admin_required
+from services.db_pool import pool_stats
+
+admin_bp = Blueprint('admin', __name__)
+
+
+# 📊 Состояние пула соединений с БД
+@admin_bp.route('/pool', methods=['GET'])
+@admin_required
+def get_pool_stats():
+    return jsonify(pool_stats(db.engine)), 200
@@ -3,6 +3,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from models import Employee
 from extensions import db
+from services.authz import role_claims
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -42,7 +43,7 @@ def login():
         return jsonify({"error": "Неверный email или пароль"}), 401
 
     # ✅ Передаём identity как строку!
-    access_token = create_access_token(identity=str(user.id))
+    access_token = create_access_token(identity=str(user.id), additional_claims=role_claims(user))
 
     return jsonify({
         "access_token": access_token,
@@ -0,0 +1,158 @@
+# routes/incident_export.py
+# Потоковая выгрузка истории инцидентов (JSON Lines / CSV, вместе с
+# архивными) и архива PDF-отчётов.
+#
+# Строки читаются курсором на стороне сервера порциями по EXPORT_BATCH_SIZE
+# и сериализуются по одной, поэтому потребление памяти не зависит от
+# количества инцидентов в таблице.
+import csv
+import io
+import json
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context, current_app
+from sqlalchemy import select
+
+from extensions import db
+from models import Location, Employee
+from services import reference_data
+from services.authz import admin_required
+from services.incident_archive import across_archive
+from services.incident_queries import apply_filters
+from services.report_archive import archive_statement, plan_archive, stream_archive
+
+incident_export_bp = Blueprint('incident_export', __name__)
+
+EXPORT_BATCH_SIZE = 1000
+# Размер куска chunked-ответа: строки склеиваются, чтобы не писать в сокет по одной
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_COLUMNS = (
+    'id', 'title', 'description', 'incident_type', 'incident_datetime',
+    'location_id', 'location_name', 'status_id', 'status_name',
+    'assigned_employee_id', 'assigned_employee_email',
+    'conclusion', 'created_at', 'updated_at',
+)
+
+
+def _export_select(model, args):
+    return apply_filters(
+        select(
+            model.id.label('id'),  # SQLite: ORDER BY объединения — по имени колонки
+            model.title,
+            model.description,
+            model.incident_type,
+            model.incident_datetime,
+            model.location_id,
+            Location.location_name,
+            model.status_id,
+            model.assigned_employee_id,
+            Employee.email.label('assigned_employee_email'),
+            model.conclusion,
+            model.created_at,
+            model.updated_at,
+        )
+        .outerjoin(Location, Location.id == model.location_id)
+        .outerjoin(Employee, Employee.id == model.assigned_employee_id),
+        args, model,
+    )
+
+
+def _export_statement(args=None):
+    # Горячие и архивные инциденты (services/incident_archive.py) по id;
+    # ValueError — на некорректные фильтры
+    stmt = across_archive(lambda model: _export_select(model, args or {}))
+    return stmt.order_by(stmt.selected_columns.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def _export_row(row):
+    item = {
+        key: value.isoformat() if hasattr(value, 'isoformat') else value
+        for key, value in row._mapping.items()
+    }
+    item['status_name'] = reference_data.status_name(row.status_id)
+    return item
+
+
+def _iter_rows(stmt):
+    for row in db.session.execute(stmt):
+        yield _export_row(row)
+
+
+def _jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def _csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _chunked(pieces):
+    chunk, size = [], 0
+    for piece in pieces:
+        chunk.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+_FORMATS = {
+    'jsonl': (_jsonl, 'application/x-ndjson', 'incidents.jsonl'),
+    'csv': (_csv, 'text/csv; charset=utf-8', 'incidents.csv'),
+}
+
+
+# 📤 Выгрузка всех инцидентов: ?format=jsonl|csv + фильтры как у списка
+@incident_export_bp.route('', methods=['GET'])
+@admin_required
+def export_incidents():
+    fmt = request.args.get('format', 'jsonl')
+    if fmt not in _FORMATS:
+        return jsonify({"error": "Формат должен быть jsonl или csv"}), 400
+
+    try:
+        stmt = _export_statement(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    encode, mimetype, filename = _FORMATS[fmt]
+    resp = Response(stream_with_context(_chunked(encode(_iter_rows(stmt)))), mimetype=mimetype)
+    resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+
+# 🗜 ZIP-архив PDF-отчётов: {"ids": [...]} и/или фильтры как у списка
+@incident_export_bp.route('/reports', methods=['POST'])
+@admin_required
+def export_reports():
+    params = dict(request.args.to_dict(), **(request.get_json(silent=True) or {}))
+    ids = params.get('ids')
+    if ids is not None and not (isinstance(ids, list) and all(isinstance(i, int) for i in ids)):
+        return jsonify({"error": "ids должен быть списком целых чисел"}), 400
+
+    try:
+        stmt = archive_statement(ids, params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    app = current_app._get_current_object()
+    ready, missing = plan_archive(app, stmt)
+    if not ready and not missing:
+        return jsonify({"error": "Нет завершённых инцидентов по заданным условиям"}), 404
+
+    resp = Response(stream_with_context(stream_archive(app, ready, missing)), mimetype='application/zip')
+    resp.headers['Content-Disposition'] = 'attachment; filename="incident-reports.zip"'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
@@ -0,0 +1,45 @@
+# routes/incident_import.py
+# Массовый импорт инцидентов: тело запроса (CSV / JSON Lines) или файл в
+# multipart-поле file. Разбор и вставка — services.incident_import.
+import os
+
+from flask import Blueprint, request, jsonify, current_app
+
+from extensions import db
+from services.authz import admin_required
+from services.incident_import import IMPORT_FORMATS, import_incidents
+
+incident_import_bp = Blueprint('incident_import', __name__)
+
+_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+}
+
+
+def _detect_format(filename=None):
+    if request.args.get('format'):
+        return request.args['format']
+    if filename:
+        ext = os.path.splitext(filename)[1].lstrip('.').lower()
+        if ext in IMPORT_FORMATS:
+            return ext
+    return _CONTENT_TYPES.get(request.mimetype, 'jsonl')
+
+
+# 📥 Импорт: ?format=csv|jsonl (иначе по расширению файла или Content-Type)
+@incident_import_bp.route('', methods=['POST'])
+@admin_required
+def import_incidents_route():
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    fmt = _detect_format(upload.filename if upload else None)
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": "Формат должен быть jsonl или csv"}), 400
+
+    report = import_incidents(db.session, stream, fmt, logger=current_app.logger)
+    current_app.logger.info(
+        f"📥 Импорт инцидентов: загружено {report['imported']}, с ошибками {report['failed']}"
+    )
+    return jsonify(report), 200 if report['imported'] or not report['failed'] else 400
@@ -1,50 +1,72 @@
-from flask import Blueprint, request, jsonify, current_app as app, make_response
-from models import Incident, Employee, IncidentStatus
-from schemas.incident_schema import IncidentSchema
+from flask import Blueprint, request, jsonify, current_app as app, make_response, url_for, abort, Response
+from sqlalchemy import select
+from models import Incident, Employee
+from schemas import get_incident_schema
 from extensions import db
+from services import incident_changes, incident_events, incident_search, incident_stats, incident_sync
+from services.incident_batch import parse_operations, run_batch
+from services.incident_queries import apply_filters, page_statement, split_page
+from services.serializers import (
+    incident_payload, incident_rows, incident_summary_payload, incidents_payload, json_response,
+    parse_incident_fieldset, parse_summary_fieldset,
+)
+from services import assignment, reports, reference_data
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from functools import wraps
+from services.authz import admin_required, is_admin
 from datetime import datetime
-import os
-from fpdf import FPDF
 
 incidents_bp = Blueprint('incidents', __name__)
-incident_schema = IncidentSchema()
-incident_list_schema = IncidentSchema(many=True)
-
-def admin_required(fn):
-    @wraps(fn)
-    @jwt_required()
-    def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = Employee.query.get(user_id)
-        if not user or user.role != 'admin':
-            return jsonify({"error": "Access denied"}), 403
-        return fn(*args, **kwargs)
-    return wrapper
+
+# 📄 Страница инцидентов; курсор следующей страницы — в заголовке X-Next-Cursor,
+# состав полей — ?fields= и ?expand=
+def _incident_page(stmt):
+    try:
+        stmt, limit, order = page_statement(apply_filters(stmt, request.args), request.args)
+        fieldset = parse_incident_fieldset(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows, next_cursor = split_page(incident_rows(db.session, stmt, fieldset), limit, order)
+    resp = json_response(incidents_payload(db.session, rows, fieldset))
+    if next_cursor:
+        resp.headers['X-Next-Cursor'] = next_cursor
+        args = dict(request.args.to_dict(), cursor=next_cursor)
+        resp.headers['Link'] = f'<{url_for(request.endpoint, _external=True, **args)}>; rel="next"'
+    return resp, 200
 
 @incidents_bp.route('/', methods=['GET'])
 @admin_required
 def get_all_incidents():
-    incidents = Incident.query.order_by(Incident.incident_datetime.desc()).all()
-    return jsonify(incident_list_schema.dump(incidents)), 200
+    return _incident_page(select(Incident))
 
 @incidents_bp.route('/<int:incident_id>', methods=['GET'])
 @jwt_required()
 def get_incident(incident_id):
-    incident = Incident.query.get_or_404(incident_id)
-    return jsonify(incident.to_dict()), 200
+    try:
+        fieldset = parse_summary_fieldset(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    payload = incident_summary_payload(db.session, incident_id, fieldset)
+    if payload is None:
+        abort(404)
+    return json_response(payload)
 
 @incidents_bp.route('', methods=['POST'])
 @admin_required
 def create_incident():
     data = request.get_json()
     data['status_id'] = 1
+    # auto_assign: true — исполнитель выбирается по нагрузке (services/assignment.py)
+    auto_assign = data.pop('auto_assign', False)
     try:
-        new_incident = incident_schema.load(data)
+        new_incident = get_incident_schema().load(data)
+        if auto_assign and new_incident.assigned_employee_id is None:
+            new_incident.assigned_employee_id = assignment.pick(db.session, new_incident.location_id)
         db.session.add(new_incident)
+        db.session.flush()
+        incident_changes.track('created', new_incident.id, after=incident_changes.snapshot(new_incident))
         db.session.commit()
-        return incident_schema.dump(new_incident), 201
+        return json_response(incident_payload(db.session, new_incident.id), 201)
     except Exception as e:
         app.logger.error(f"Create incident error: {str(e)}")
         return jsonify({"error": str(e)}), 400
@@ -55,14 +77,17 @@ def update_incident(incident_id):
     incident = Incident.query.get_or_404(incident_id)
 
     # 🔒 Запрет на редактирование завершённых
-    if incident.status and incident.status.name.lower() == 'завершён':
+    if reference_data.is_completed(incident.status_id):
         return jsonify({"error": "Нельзя редактировать завершённый инцидент"}), 403
 
     data = request.get_json()
+    before = incident_changes.snapshot(incident)
     try:
-        updated = incident_schema.load(data, instance=incident, partial=True)
+        updated = get_incident_schema().load(data, instance=incident, partial=True)
+        db.session.flush()
+        incident_changes.track('updated', incident.id, before, incident_changes.snapshot(updated))
         db.session.commit()
-        return incident_schema.dump(updated), 200
+        return json_response(incident_payload(db.session, updated.id))
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -71,6 +96,7 @@ def update_incident(incident_id):
 @admin_required
 def delete_incident(incident_id):
     incident = Incident.query.get_or_404(incident_id)
+    incident_changes.track('deleted', incident.id, before=incident_changes.snapshot(incident))
     db.session.delete(incident)
     db.session.commit()
     return jsonify({"message": "Incident deleted"}), 200
@@ -84,10 +110,12 @@ def assign_incident(incident_id, employee_id):
     if incident.assigned_employee_id == employee.id:
         return jsonify({"message": "Incident already assigned"}), 200
 
-    if incident.status.name.lower() in ['завершён', 'закрыт']:
+    if incident.status_id in reference_data.closed_status_ids():
         return jsonify({"error": "Cannot assign closed incident"}), 400
 
+    before = incident_changes.snapshot(incident)
     incident.assigned_employee_id = employee.id
+    incident_changes.track('updated', incident.id, before, incident_changes.snapshot(incident))
     db.session.commit()
     return jsonify({
         "message": f"Incident assigned to {employee.first_name} {employee.last_name}",
@@ -95,12 +123,89 @@ def assign_incident(incident_id, employee_id):
         "assigned_to": employee.id
     }), 200
 
+# 📦 Пакет операций: {"operations": [{"incident_id", "employee_id" и/или "status_id"}]}
+@incidents_bp.route('/batch', methods=['POST'])
+@admin_required
+def batch_update_incidents():
+    try:
+        operations = parse_operations(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = run_batch(db.session, operations)
+    db.session.commit()
+    return jsonify({
+        "results": results,
+        "updated": sum(1 for r in results if r['result'] == 'updated'),
+        "failed": sum(1 for r in results if r['result'] == 'error')
+    }), 200
+
+# 🔄 Дельта-синхронизация: ?since=<sync_token>&limit= — изменённые и удалённые
+# после токена. Сотрудник получает только свои инциденты
+@incidents_bp.route('/sync', methods=['GET'])
+@jwt_required()
+def sync_incidents():
+    user_id = None if is_admin() else int(get_jwt_identity())
+    try:
+        payload = incident_sync.sync_payload(db.session, user_id=user_id, **incident_sync.parse_sync_args(request.args))
+    except incident_sync.SyncTokenExpired as e:
+        return jsonify({"error": str(e)}), 410
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_response(payload)
+
+# 📡 Поток событий по инцидентам (Server-Sent Events) вместо опроса списков.
+# EventSource не умеет заголовки, поэтому токен можно передать в ?jwt=.
+# Соединение держит поток воркера, поэтому их число ограничено
+# EVENTS_FLASK_STREAMS; по умолчанию поток отдаёт только асинхронный сервер
+@incidents_bp.route('/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def incident_events_stream():
+    limit = app.config['EVENTS_FLASK_STREAMS']
+    if not limit:
+        return jsonify({"error": "Поток событий отдаёт асинхронный сервер (uvicorn asgi.main:app)"}), 503
+    if not incident_events.stream_limit.acquire(limit):
+        return jsonify({"error": "Все потоки событий заняты, повторите позже"}), 503, {
+            'Retry-After': str(incident_events.RETRY_MS // 1000),
+        }
+    incident_events.ensure_listener(app._get_current_object())
+    subscription = incident_events.bus.subscribe(int(get_jwt_identity()), is_admin())
+    replay = incident_events.bus.replay(subscription, request.headers.get('Last-Event-ID'))
+    response = Response(incident_events.sse_stream(subscription, replay), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    response.call_on_close(incident_events.stream_limit.release)
+    return response
+
+# 📊 Сводка для дашборда: ?days=30&hours=48 — окна для by_day / by_hour
+@incidents_bp.route('/stats', methods=['GET'])
+@admin_required
+def get_incident_stats():
+    try:
+        return json_response(incident_stats.stats_payload(db.session, request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+# 🔎 Полнотекстовый поиск: ?q=&limit=&offset= и фильтры списка.
+# Сотрудник ищет только по своим инцидентам, администратор — по всем
+@incidents_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_incidents():
+    if not incident_search.is_available(db.session):
+        return jsonify({"error": "Поиск не настроен: выполните миграции или flask rebuild-search-index"}), 503
+    user_id = None if is_admin() else int(get_jwt_identity())
+    try:
+        params = incident_search.parse_search_args(request.args, user_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_response(incident_search.search(db.session, **params))
+
 @incidents_bp.route('/my', methods=['GET'])
 @jwt_required()
 def get_my_incidents():
-    user_id = get_jwt_identity()
-    assigned = Incident.query.filter_by(assigned_employee_id=user_id).order_by(Incident.incident_datetime.desc()).all()
-    return jsonify(incident_list_schema.dump(assigned)), 200
+    user_id = int(get_jwt_identity())
+    return _incident_page(select(Incident).where(Incident.assigned_employee_id == user_id))
 
 @incidents_bp.route('/<int:incident_id>/complete', methods=['POST'])
 @jwt_required()
@@ -117,50 +222,55 @@ def complete_incident(incident_id):
         app.logger.warning("❌ Отказано в доступе: пользователь не назначен на инцидент")
         return jsonify({"error": "You are not authorized to complete this incident"}), 403
 
-    status = IncidentStatus.query.filter_by(name='завершён').first()
-    if not status:
+    completed_status_id = reference_data.completed_status_id()
+    if completed_status_id is None:
         app.logger.error("❌ Статус 'завершён' не найден")
         return jsonify({"error": "Status 'завершён' not found"}), 500
 
     try:
-        # PDF
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.add_font('DejaVu', '', os.path.join(app.root_path, 'static', 'fonts', 'DejaVuSans.ttf'), uni=True)
-        pdf.set_font('DejaVu', '', 14)
-        pdf.cell(200, 10, txt="Incident Resolution Report", ln=True, align="C")
-        pdf.ln(10)
-        pdf.set_font('DejaVu', '', 12)
-        pdf.cell(200, 10, txt=f"Incident ID: {incident.id}", ln=True)
-        pdf.cell(200, 10, txt=f"Title: {incident.title}", ln=True)
-        pdf.cell(200, 10, txt=f"Type: {incident.incident_type}", ln=True)
-        pdf.cell(200, 10, txt=f"Description: {incident.description or '-'}", ln=True)
-        pdf.cell(200, 10, txt=f"Location: {incident.location.location_name}", ln=True)
-        pdf.cell(200, 10, txt=f"Resolved by: {user.first_name} {user.last_name}", ln=True)
-        pdf.cell(200, 10, txt=f"Resolved at: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC", ln=True)
-
-        reports_dir = os.path.join(app.root_path, 'static', 'reports')
-        os.makedirs(reports_dir, exist_ok=True)
-        pdf_path = os.path.join(reports_dir, f'incident-{incident.id}.pdf')
-        pdf.output(pdf_path)
-
-        incident.status_id = status.id
-        incident.conclusion = f"/static/reports/incident-{incident.id}.pdf"
+        before = incident_changes.snapshot(incident)
+        incident.status_id = completed_status_id
+        incident.completed_at = datetime.utcnow()
+        incident_changes.track('updated', incident.id, before, incident_changes.snapshot(incident))
+        # задача на отчёт — в той же транзакции, что и завершение
+        payload = reports.report_payload(incident, user, incident.completed_at)
+        job_id = reports.new_job(db.session, payload)
         db.session.commit()
 
+        # PDF формируется в фоне, ссылка появится в conclusion после рендеринга
+        reports.submit_report(app._get_current_object(), job_id, payload)
+
         app.logger.info(f"✅ Инцидент #{incident.id} успешно завершён пользователем {user.email}")
-        app.logger.info(f"📎 PDF: {incident.conclusion}")
+        app.logger.info(f"🧾 Отчёт поставлен в очередь: {job_id}")
 
         return jsonify({
             "message": f"Incident #{incident.id} resolved",
-            "pdf_url": incident.conclusion
-        }), 200
+            "job_id": job_id,
+            "status_url": url_for('incidents.get_report_job', job_id=job_id)
+        }), 202
 
     except Exception as e:
         app.logger.exception(f"💥 Ошибка завершения инцидента #{incident.id}: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
 
+# 🧾 Статус фоновой генерации отчёта
+@incidents_bp.route('/reports/<job_id>', methods=['GET'])
+@jwt_required()
+def get_report_job(job_id):
+    job = reports.get_job(db.session, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify({
+        "job_id": job['job_id'],
+        "incident_id": job['incident_id'],
+        "status": job['status'],
+        "pdf_url": job['pdf_url'],
+        "error": job['error']
+    }), 200
+
+
 @incidents_bp.route('', methods=['OPTIONS'])
 @incidents_bp.route('/<int:incident_id>', methods=['OPTIONS'])
 def preflight_incident(incident_id=None):
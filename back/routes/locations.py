@@ -1,18 +1,15 @@
 # routes/locations.py
-from flask import Blueprint, jsonify
-from models import Location
-from schemas.incident_schema import LocationSchema
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
+from services import reference_data
 
 locations_bp = Blueprint('locations', __name__)
 
-location_schema = LocationSchema()
-location_list_schema = LocationSchema(many=True)
-
 # 🔍 Получить все локации
 @locations_bp.route('', methods=['GET', 'OPTIONS'])
 @jwt_required()
 def get_locations():
-    print("📥 GET /api/locations")
-    locations = Location.query.all()
-    return jsonify(location_list_schema.dump(locations)), 200
+    resp = jsonify(reference_data.locations())
+    resp.set_etag(reference_data.etag('locations'))
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp.make_conditional(request)
@@ -0,0 +1,17 @@
+# schemas — marshmallow-схемы моделей (schemas/incident_schema.py).
+# Построение auto-схем по моделям дорогое, поэтому маршруты получают
+# экземпляры через эти функции: модуль импортируется при первом создании
+# или изменении записи, а не при старте приложения.
+import functools
+
+
+@functools.cache
+def get_incident_schema():
+    from schemas.incident_schema import IncidentSchema
+    return IncidentSchema()
+
+
+@functools.cache
+def get_employee_schema():
+    from schemas.incident_schema import EmployeeSchema
+    return EmployeeSchema()
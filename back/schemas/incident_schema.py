@@ -2,6 +2,7 @@ from marshmallow_sqlalchemy import SQLAlchemyAutoSchema, auto_field
 from marshmallow import fields
 from models import Incident, Employee, IncidentStatus, Location, IncidentResponse, IncidentSource, Attachment
 from extensions import db
+from services import reference_data
 
 
 # Вспомогательные схемы для вложенных объектов (read-only)
@@ -12,6 +13,8 @@ class EmployeeSchema(SQLAlchemyAutoSchema):
         sqla_session = db.session
         include_fk = True
 
+    # хеш пароля только принимается, в ответы не попадает
+    password = auto_field(load_only=True)
     full_name = fields.Method("get_full_name")
     is_busy = fields.Method("get_is_busy")
 
@@ -20,10 +23,8 @@ class EmployeeSchema(SQLAlchemyAutoSchema):
 
     def get_is_busy(self, obj):
         # Учитываем только инциденты, не завершённые
-        return any(
-            inc.status and inc.status.name.lower() != 'завершён'
-            for inc in obj.assigned_incidents
-        )
+        completed_id = reference_data.completed_status_id()
+        return any(inc.status_id != completed_id for inc in obj.assigned_incidents)
 
 
 class IncidentStatusSchema(SQLAlchemyAutoSchema):
@@ -73,7 +74,7 @@ class IncidentSchema(SQLAlchemyAutoSchema):
         load_instance = True
         sqla_session = db.session
         include_fk = True
-        dump_only = ("id", "created_at", "updated_at")
+        dump_only = ("id", "created_at", "updated_at", "completed_at")
 
     # Поля, которые можно передавать при создании/редактировании
     title = auto_field(required=True)
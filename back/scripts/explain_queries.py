@@ -0,0 +1,136 @@
+# scripts/explain_queries.py
+# Планы выполнения (EXPLAIN) для запросов, которые выполняют маршруты API,
+# без индексов из миграции 0003 и с ними.
+#
+# Индексы удаляются/создаются внутри транзакции, которая затем
+# откатывается, поэтому схема БД не меняется. DDL берёт блокировки на
+# таблицы — запускать на копии базы, а не на рабочей.
+#
+# Запуск из каталога back/:
+#   python -m scripts.explain_queries [--analyze]
+import argparse
+import importlib.util
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, inspect, text
+
+from app import create_app
+from extensions import db
+from models import Incident, IncidentResponse, IncidentSource, Attachment
+from services import reference_data
+from services.incident_queries import DEFAULT_PAGE_SIZE
+from services.report_archive import archive_statement
+from services.roster import roster_statement, open_incidents_query
+
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'migrations', 'versions', '0003_performance_indexes.py')
+
+
+def _performance_indexes():
+    spec = importlib.util.spec_from_file_location('performance_indexes', MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.PERFORMANCE_INDEXES
+
+
+def _page(*criteria):
+    return (
+        select(Incident)
+        .where(*criteria)
+        .order_by(Incident.incident_datetime.desc(), Incident.id.desc())
+        .limit(DEFAULT_PAGE_SIZE + 1)
+    )
+
+
+def endpoint_queries():
+    from routes.incident_export import _export_statement
+
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    return [
+        ("GET /api/employees (список сотрудников)", roster_statement()),
+        ("GET /api/incidents/", _page()),
+        ("GET /api/incidents/?status_id=", _page(Incident.status_id == 1)),
+        ("GET /api/incidents/?incident_type=", _page(Incident.incident_type == 'fire')),
+        ("GET /api/incidents/?location_id=", _page(Incident.location_id == 1)),
+        ("GET /api/incidents/my", _page(Incident.assigned_employee_id == 1)),
+        ("GET /api/incidents/?date_from=", _page(Incident.incident_datetime >= week_ago)),
+        ("GET /api/incidents/export", _export_statement()),
+        ("POST /api/incidents/export/reports", archive_statement([1, 2, 3])),
+        ("DELETE /api/employees/<id> (открытые инциденты)", open_incidents_query(1).statement),
+        ("IncidentSchema.responses", select(IncidentResponse).where(IncidentResponse.incident_id == 1)),
+        ("IncidentSchema.sources", select(IncidentSource).where(IncidentSource.incident_id == 1)),
+        ("IncidentSchema.attachments", select(Attachment).where(Attachment.incident_id == 1)),
+    ]
+
+
+def _explain_prefix(dialect, analyze):
+    if dialect == 'sqlite':
+        return 'EXPLAIN QUERY PLAN'
+    if dialect == 'postgresql' and analyze:
+        return 'EXPLAIN (ANALYZE, BUFFERS)'
+    return 'EXPLAIN'
+
+
+def print_plans(connection, title, analyze):
+    prefix = _explain_prefix(connection.dialect.name, analyze)
+    print(f"\n===== {title} =====")
+    for name, stmt in endpoint_queries():
+        sql = str(stmt.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+        print(f"\n--- {name}")
+        for row in connection.execute(text(f"{prefix} {sql}")):
+            print('   ', ' | '.join(str(value) for value in row))
+
+
+def _existing_indexes(connection, indexes):
+    names = {
+        index['name']
+        for table in {table for _, table, _ in indexes}
+        for index in inspect(connection).get_indexes(table)
+    }
+    return [name for name, _, _ in indexes if name in names]
+
+
+# SQLite (pysqlite) выполняет DDL вне транзакции, поэтому после отката
+# набор индексов приводится к исходному явно
+def _restore_indexes(connection, indexes, existing):
+    connection.rollback()
+    current = set(_existing_indexes(connection, indexes))
+    connection.rollback()
+    with connection.begin():
+        for name, table, columns in indexes:
+            if name in existing and name not in current:
+                connection.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+            elif name not in existing and name in current:
+                connection.execute(text(f"DROP INDEX {name}"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (только PostgreSQL)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        reference_data.load()
+        indexes = _performance_indexes()
+        with db.engine.connect() as connection:
+            existing = _existing_indexes(connection, indexes)
+            connection.rollback()
+            try:
+                with connection.begin() as transaction:
+                    for name in existing:
+                        connection.execute(text(f"DROP INDEX {name}"))
+                    print_plans(connection, "БЕЗ индексов 0003", args.analyze)
+
+                    for name, table, columns in indexes:
+                        connection.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+                    if connection.dialect.name == 'postgresql':
+                        connection.execute(text("ANALYZE"))
+                    print_plans(connection, "С индексами 0003", args.analyze)
+                    transaction.rollback()
+            finally:
+                _restore_indexes(connection, indexes, existing)
+
+if __name__ == '__main__':
+    main()
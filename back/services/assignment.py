@@ -0,0 +1,175 @@
+# services/assignment.py
+# Автоматическое назначение инцидентов наименее загруженному сотруднику.
+#
+# Таблица employee_loads — индекс нагрузки: по строке на сотрудника с числом
+# открытых (незавершённых) назначенных ему инцидентов, признаком eligible
+# (role = 'user') и закреплённой локацией. Счётчики меняются на разницу
+# «до/после» в обработчике incident_changes перед коммитом, поэтому
+# назначение, переназначение, завершение и удаление инцидента стоят одного
+# UPDATE. Строки сотрудников создаются и обновляются событиями маппера
+# Employee.
+#
+# Выбор — проход по индексу (eligible, [location_id,] open_count,
+# employee_id) с LIMIT, т.е. O(log n) от числа сотрудников. Индекс общий для
+# всех воркеров; в PostgreSQL строки читаются FOR UPDATE SKIP LOCKED, и
+# параллельные запросы не отдают инциденты одному и тому же сотруднику.
+#
+# Пакет инцидентов (переназначение при удалении сотрудника) раскладывается
+# кучей в памяти: из индекса читаются не больше N наименее загруженных
+# сотрудников, каждый инцидент уходит вершине кучи, её нагрузка растёт на 1.
+import heapq
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import case, delete, event, func, insert, inspect, select, update
+
+from models import Employee, EmployeeLoad, Incident
+from services import incident_changes, reference_data
+from services.roster import open_incident_filter
+
+ELIGIBLE_ROLE = 'user'
+
+
+def _candidates(session, limit, location_id=None, exclude=()):
+    # [(нагрузка, employee_id)] по возрастанию нагрузки
+    stmt = select(EmployeeLoad.open_count, EmployeeLoad.employee_id).where(EmployeeLoad.eligible.is_(True))
+    if location_id is not None:
+        stmt = stmt.where(EmployeeLoad.location_id == location_id)
+    if exclude:
+        stmt = stmt.where(EmployeeLoad.employee_id.not_in(list(exclude)))
+    stmt = stmt.order_by(EmployeeLoad.open_count, EmployeeLoad.employee_id).limit(limit)
+    if session.get_bind().dialect.name == 'postgresql':
+        stmt = stmt.with_for_update(skip_locked=True)
+    return [tuple(row) for row in session.execute(stmt)]
+
+
+class _Pool:
+    # Куча (нагрузка, employee_id). Нагрузка сотрудника общая для всех куч
+    # (loads): устаревшая запись на вершине перекладывается с текущим значением
+    def __init__(self, loads, rows):
+        self.loads = loads
+        self.heap = []
+        for load, employee_id in rows:
+            self.heap.append((loads.setdefault(employee_id, load), employee_id))
+        heapq.heapify(self.heap)
+
+    def take(self):
+        while self.heap:
+            load, employee_id = heapq.heappop(self.heap)
+            current = self.loads[employee_id]
+            if load != current:
+                heapq.heappush(self.heap, (current, employee_id))
+                continue
+            self.loads[employee_id] = current + 1
+            heapq.heappush(self.heap, (current + 1, employee_id))
+            return employee_id
+        return None
+
+
+def distribute(session, location_ids, exclude=()):
+    # location_ids — локации инцидентов по порядку; возвращает employee_id
+    # для каждого (None — подходящих сотрудников нет). При
+    # ASSIGNMENT_BY_LOCATION сначала выбираются сотрудники той же локации
+    loads = {}
+    pools = {}
+    if current_app.config.get('ASSIGNMENT_BY_LOCATION'):
+        wanted = Counter(location_id for location_id in location_ids if location_id is not None)
+        for location_id, count in wanted.items():
+            pools[location_id] = _Pool(loads, _candidates(session, count, location_id, exclude))
+
+    common = None
+    targets = []
+    for location_id in location_ids:
+        pool = pools.get(location_id)
+        employee_id = pool.take() if pool is not None else None
+        if employee_id is None:
+            if common is None:
+                common = _Pool(loads, _candidates(session, len(location_ids), exclude=exclude))
+            employee_id = common.take()
+        targets.append(employee_id)
+    return targets
+
+
+def pick(session, location_id=None, exclude=()):
+    return distribute(session, [location_id], exclude)[0]
+
+
+# 🔁 Поддержка employee_loads
+def _load_deltas(changes):
+    deltas = Counter()
+    for change in changes:
+        for state, sign in ((change['before'], -1), (change['after'], 1)):
+            if state and state['assigned_employee_id'] is not None \
+                    and not reference_data.is_completed(state['status_id']):
+                deltas[state['assigned_employee_id']] += sign
+    return {employee_id: delta for employee_id, delta in deltas.items() if delta}
+
+
+@incident_changes.on_before_commit
+def _maintain_loads(session, changes):
+    deltas = _load_deltas(changes)
+    if not deltas:
+        return
+    session.execute(
+        update(EmployeeLoad)
+        .where(EmployeeLoad.employee_id.in_(list(deltas)))
+        .values(open_count=EmployeeLoad.open_count + case(deltas, value=EmployeeLoad.employee_id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _open_count(connection, employee_id):
+    return connection.execute(
+        select(func.count()).select_from(Incident)
+        .where(Incident.assigned_employee_id == employee_id, open_incident_filter())
+    ).scalar()
+
+
+def _sync_employee(connection, employee, count_open=False):
+    values = {'eligible': employee.role == ELIGIBLE_ROLE, 'location_id': employee.location_id}
+    result = connection.execute(
+        update(EmployeeLoad).where(EmployeeLoad.employee_id == employee.id).values(**values)
+    )
+    if result.rowcount == 0:
+        # строки нет — сотрудник добавлен в обход ORM (seed, загрузка набора)
+        open_count = _open_count(connection, employee.id) if count_open else 0
+        connection.execute(insert(EmployeeLoad).values(employee_id=employee.id, open_count=open_count, **values))
+
+
+@event.listens_for(Employee, 'after_insert')
+def _employee_created(mapper, connection, target):
+    _sync_employee(connection, target)
+
+
+@event.listens_for(Employee, 'after_update')
+def _employee_updated(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.role.history.has_changes() or state.attrs.location_id.history.has_changes():
+        _sync_employee(connection, target, count_open=True)
+
+
+@event.listens_for(Employee, 'after_delete')
+def _employee_deleted(mapper, connection, target):
+    connection.execute(delete(EmployeeLoad).where(EmployeeLoad.employee_id == target.id))
+
+
+def rebuild(session):
+    reference_data.load(session)
+    counts = (
+        select(Incident.assigned_employee_id.label('employee_id'), func.count().label('open_count'))
+        .where(Incident.assigned_employee_id.is_not(None), open_incident_filter())
+        .group_by(Incident.assigned_employee_id)
+        .subquery()
+    )
+    session.execute(delete(EmployeeLoad))
+    session.execute(
+        insert(EmployeeLoad).from_select(
+            ['employee_id', 'eligible', 'location_id', 'open_count'],
+            select(
+                Employee.id,
+                case((Employee.role == ELIGIBLE_ROLE, True), else_=False),
+                Employee.location_id,
+                func.coalesce(counts.c.open_count, 0),
+            ).outerjoin(counts, counts.c.employee_id == Employee.id)
+        )
+    )
@@ -0,0 +1,92 @@
+# services/authz.py
+# Проверка прав администратора.
+#
+# Роль кладётся в claims access-токена при входе. Если включена живая
+# проверка (AUTHZ_LIVE_CHECK), роль дополнительно сверяется с кешем
+# identity -> role в памяти процесса (TTL + LRU), который сбрасывается при
+# изменении или удалении сотрудника. На горячем пути запросов к БД нет.
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from sqlalchemy import select
+
+from extensions import db
+from models import Employee
+
+ADMIN_ROLE = 'admin'
+
+_roles = OrderedDict()
+_roles_lock = threading.Lock()
+
+
+def role_claims(user):
+    return {'role': user.role}
+
+
+def role_statement(user_id):
+    # Только колонка role: без joined-загрузки assigned_incidents
+    return select(Employee.role).where(Employee.id == user_id)
+
+
+def cached_role(user_id):
+    # (найдено ли в кеше, роль)
+    with _roles_lock:
+        cached = _roles.get(user_id)
+        if cached and cached[1] > time.monotonic():
+            _roles.move_to_end(user_id)
+            return True, cached[0]
+    return False, None
+
+
+def remember_role(user_id, role):
+    ttl = current_app.config.get('AUTHZ_ROLE_CACHE_TTL', 60)
+    with _roles_lock:
+        _roles[user_id] = (role, time.monotonic() + ttl)
+        _roles.move_to_end(user_id)
+        while len(_roles) > current_app.config.get('AUTHZ_ROLE_CACHE_SIZE', 10000):
+            _roles.popitem(last=False)
+
+
+def get_role(user_id):
+    found, role = cached_role(user_id)
+    if found:
+        return role
+    role = db.session.execute(role_statement(user_id)).scalar_one_or_none()
+    remember_role(user_id, role)
+    return role
+
+
+def invalidate_role(user_id):
+    with _roles_lock:
+        _roles.pop(user_id, None)
+
+
+def claims_decision(claims):
+    # True/False — решение по claims токена, None — нужна живая проверка роли
+    if 'role' in claims and claims['role'] != ADMIN_ROLE:
+        return False
+    if 'role' in claims and not current_app.config.get('AUTHZ_LIVE_CHECK', True):
+        return True
+    return None
+
+
+def is_admin():
+    decision = claims_decision(get_jwt())
+    if decision is not None:
+        return decision
+    return get_role(int(get_jwt_identity())) == ADMIN_ROLE
+
+
+# 🔒 Проверка роли администратора
+def admin_required(fn):
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if not is_admin():
+            return jsonify({"error": "Доступ запрещён"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,88 @@
+# services/bootstrap.py
+# Начальные данные и прогрев процесса перед запуском сервера.
+#
+# seed — одна транзакция: статусы инцидентов, локации по умолчанию и
+# учётная запись администратора. Каждая часть добавляется, только если её
+# ещё нет, поэтому повторный запуск ничего не меняет. В PostgreSQL
+# транзакция сначала берёт advisory-блокировку: одновременный старт
+# нескольких процессов не создаст дубликатов.
+#
+# warm_up импортирует тяжёлые модули (marshmallow-схемы, fpdf), которые
+# иначе загружаются при первом использовании. gunicorn с preload_app
+# вызывает его в мастер-процессе до fork, и воркеры (а также процессы
+# пула PDF) делят эти страницы памяти.
+from sqlalchemy import insert, select, text
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models import Employee, IncidentStatus, Location
+from services import reference_data
+
+DEFAULT_STATUSES = (
+    {'id': 1, 'name': 'новый', 'description': 'Инцидент только что создан'},
+    {'id': 2, 'name': 'в работе', 'description': 'Инцидент в процессе расследования'},
+    {'id': 3, 'name': 'завершён', 'description': 'Инцидент завершён'},
+)
+
+DEFAULT_LOCATIONS = (
+    {'location_name': 'Терминал A', 'location_type': 'пассажирская зона'},
+    {'location_name': 'Грузовой отсек', 'location_type': 'техническая зона'},
+    {'location_name': 'Зона контроля', 'location_type': 'безопасность'},
+)
+
+ADMIN = {
+    'first_name': 'Админ',
+    'last_name': 'Системы',
+    'position': '',
+    'phone': '0000000000',
+    'email': 'admin@airport.com',
+    'role': 'admin',
+}
+ADMIN_PASSWORD = 'Pa$$w0rd!'
+
+# Ключ pg_advisory_xact_lock для seed
+_SEED_LOCK_KEY = 0x1A4B0075
+
+
+def _is_empty(session, column):
+    return session.execute(select(column).limit(1)).first() is None
+
+
+def seed(session):
+    # Возвращает список добавленного: 'statuses', 'locations', 'admin'
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': _SEED_LOCK_KEY})
+
+    created = []
+    if _is_empty(session, IncidentStatus.id):
+        session.execute(insert(IncidentStatus), list(DEFAULT_STATUSES))
+        created.append('statuses')
+    if _is_empty(session, Location.id):
+        session.execute(insert(Location), list(DEFAULT_LOCATIONS))
+        created.append('locations')
+    if session.execute(select(Employee.id).where(Employee.email == ADMIN['email'])).first() is None:
+        # хеш пароля считается, только если администратора нет
+        session.execute(insert(Employee), [dict(ADMIN, password=generate_password_hash(ADMIN_PASSWORD))])
+        created.append('admin')
+    return created
+
+
+def bootstrap(app):
+    with app.app_context():
+        try:
+            created = seed(db.session)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if created:
+            reference_data.invalidate()
+        # справочники статусов и локаций загружаются в память при старте
+        reference_data.load(db.session)
+        db.session.remove()
+    return created
+
+
+def warm_up():
+    import schemas.incident_schema  # noqa: F401
+    import services.report_renderer  # noqa: F401
@@ -0,0 +1,89 @@
+# services/db_pool.py
+# Пул соединений с БД: параметры из окружения, таймаут запросов и статистика.
+#
+# TimedQueuePool — обычный QueuePool, который дополнительно считает, сколько
+# запросов ждали свободное соединение, суммарное/максимальное время ожидания
+# и число таймаутов. Эти данные отдаёт /api/admin/pool.
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        QueuePool.__init__(self, *args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return QueuePool._do_get(self)
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def wait_stats(self):
+        with self._stats_lock:
+            return {
+                'checkouts': self._checkouts,
+                'wait_total_ms': round(self._wait_total * 1000, 3),
+                'wait_avg_ms': round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                'wait_max_ms': round(self._wait_max * 1000, 3),
+                'timeouts': self._timeouts,
+            }
+
+
+def engine_options(pool_size, max_overflow, pool_timeout, pool_recycle, pre_ping, use_nullpool):
+    if use_nullpool:
+        # за pgbouncer пулом управляет он сам
+        return {'poolclass': NullPool, 'pool_pre_ping': pre_ping}
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pre_ping,
+    }
+
+
+def install_statement_timeout(engine, timeout_ms):
+    if not timeout_ms or engine.dialect.name != 'postgresql':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_statement_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET statement_timeout = {int(timeout_ms)}")
+        cursor.close()
+        dbapi_connection.commit()
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+            'timeout_s': pool.timeout(),
+        })
+    if isinstance(pool, TimedQueuePool):
+        stats.update(pool.wait_stats())
+    return stats
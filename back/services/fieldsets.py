@@ -0,0 +1,80 @@
+# services/fieldsets.py
+# Разреженные наборы полей ответа: ?fields= и ?expand=.
+#
+#   ?fields=id,title,status                     — только эти поля
+#   ?fields=title,assigned_employee.full_name   — связь с выбранными подполями
+#   ?expand=responses,sources                   — связи целиком
+#
+# Без параметров ответ прежний: все поля и связи по умолчанию. Если задан
+# только fields, из связей попадают лишь перечисленные в нём. Набор решает и
+# что сериализовать, и что читать из базы: колонки вне набора не попадают в
+# SELECT, связи вне набора не загружаются (services/serializers.py,
+# services/roster.py).
+
+
+class Fieldset:
+    __slots__ = ('fields', 'expand')
+
+    def __init__(self, fields, expand):
+        self.fields = frozenset(fields)  # поля верхнего уровня
+        self.expand = expand             # {связь: frozenset подполей или None — все}
+
+    def wants(self, name):
+        return name in self.fields
+
+    def expands(self, name):
+        return name in self.expand
+
+    def subfields(self, relation):
+        return self.expand.get(relation)
+
+    def wants_sub(self, relation, name):
+        sub = self.expand.get(relation)
+        return relation in self.expand and (sub is None or name in sub)
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def parse_fieldset(args, scalars, relations, default_expand=None):
+    # scalars — допустимые поля, relations — {связь: допустимые подполя},
+    # default_expand — связи без параметров (None — все).
+    # ValueError — на неизвестные имена
+    raw_fields = args.get('fields')
+    raw_expand = args.get('expand')
+    if raw_fields is None and raw_expand is None:
+        return Fieldset(scalars, {name: None for name in (relations if default_expand is None else default_expand)})
+
+    expand = {}
+
+    def add(relation, sub=None):
+        if relation not in relations:
+            raise ValueError(f"Неизвестная связь: {relation}")
+        if sub is None:
+            expand[relation] = None
+        elif sub not in relations[relation]:
+            raise ValueError(f"Неизвестное поле: {relation}.{sub}")
+        elif relation not in expand:
+            expand[relation] = {sub}
+        elif expand[relation] is not None:
+            expand[relation].add(sub)
+
+    fields = set() if raw_fields is not None else set(scalars)
+    for name in _names(raw_fields or ''):
+        relation, dot, sub = name.partition('.')
+        if dot:
+            add(relation, sub)
+        elif name in relations:
+            add(name)
+        elif name in scalars:
+            fields.add(name)
+        else:
+            raise ValueError(f"Неизвестное поле: {name}")
+    for name in _names(raw_expand or ''):
+        relation, dot, sub = name.partition('.')
+        add(relation, sub if dot else None)
+
+    return Fieldset(fields, {
+        relation: None if sub is None else frozenset(sub) for relation, sub in expand.items()
+    })
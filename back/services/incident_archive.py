@@ -0,0 +1,181 @@
+# services/incident_archive.py
+# Архивация завершённых инцидентов.
+#
+# Инциденты, завершённые (completed_at) больше ARCHIVE_AFTER_DAYS дней назад, вместе с
+# мерами реагирования, источниками и вложениями переносятся из горячих таблиц
+# в таблицы *_archive (models.py). Перенос идёт порциями по batch_size
+# инцидентов, каждая порция — отдельная транзакция: INSERT ... SELECT в архив
+# и DELETE из горячих таблиц. Запускается командой flask archive-incidents
+# (cron, systemd-таймер); в PostgreSQL строки порции блокируются FOR UPDATE
+# SKIP LOCKED, поэтому параллельные запуски не мешают друг другу.
+#
+# В PostgreSQL архивные таблицы секционированы по completed_at: секция
+# <таблица>_pYYYYMM создаётся перед первой записью за месяц, а старую историю
+# можно отсоединить (ALTER TABLE ... DETACH PARTITION) целиком.
+#
+# Архивация не проходит через incident_changes: для проекций, статистики и
+# уведомлений инцидент не меняется, документы поиска остаются на месте.
+# GET /api/incidents/<id>, выгрузка и поиск читают горячие и архивные
+# таблицы вместе (across_archive), списки и синхронизация — только горячие:
+# для /sync перенос записывается в журнал удалений (reason='archived').
+import re
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, inspect, insert, select, text, union_all, update
+
+from models import (
+    Attachment, AttachmentArchive, Employee, Incident, IncidentArchive,
+    IncidentResponse, IncidentResponseArchive, IncidentSource, IncidentSourceArchive,
+    IncidentTombstone,
+)
+from services import reference_data
+
+ARCHIVE_AFTER_DAYS = 180
+ARCHIVE_BATCH_SIZE = 500
+
+# (горячая таблица, архивная); инциденты — первыми
+ARCHIVE_MODELS = (
+    (Incident, IncidentArchive),
+    (IncidentResponse, IncidentResponseArchive),
+    (IncidentSource, IncidentSourceArchive),
+    (Attachment, AttachmentArchive),
+)
+
+_PARTITION_SUFFIX = re.compile(r'_p\d{6}$')
+
+
+def is_partition(table_name):
+    # Секции создаются на лету и не описаны в моделях (migrations/env.py)
+    return any(table_name.startswith(archive.__tablename__) for _, archive in ARCHIVE_MODELS) \
+        and bool(_PARTITION_SUFFIX.search(table_name))
+
+
+def is_available(session):
+    # Архивные таблицы создаёт миграция 0008; пересчёты из более ранних
+    # миграций (поиск, статистика) вызываются ещё без них
+    return _has_archive(session.connection())
+
+
+def _has_archive(connection):
+    return inspect(connection).has_table(IncidentArchive.__tablename__)
+
+
+def across_archive(build):
+    # build(модель) -> select по Incident или IncidentArchive с одинаковыми
+    # колонками; результат — UNION ALL обоих
+    return union_all(build(Incident), build(IncidentArchive))
+
+
+# 🧱 Секции PostgreSQL
+def _month(value):
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(month):
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def ensure_partitions(session, completed_at_values):
+    if session.get_bind().dialect.name != 'postgresql':
+        return
+    for month in sorted({_month(value) for value in completed_at_values}):
+        for _, archive in ARCHIVE_MODELS:
+            name = f"{archive.__tablename__}_p{month:%Y%m}"
+            # to_regclass не берёт блокировок: DDL только для новой секции
+            if session.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar() is not None:
+                continue
+            session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {archive.__tablename__}"
+                f" FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+            ))
+
+
+# 🗄 Перенос
+def _archive_source(hot, incident_ids):
+    if hot is Incident:
+        return select(*Incident.__table__.c).where(Incident.id.in_(incident_ids))
+    return (
+        select(*hot.__table__.c, Incident.completed_at)
+        .join_from(hot, Incident, Incident.id == hot.incident_id)
+        .where(hot.incident_id.in_(incident_ids))
+    )
+
+
+def archive_batch(session, cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    # Одна порция: возвращает число перенесённых инцидентов, коммит — за
+    # вызывающим
+    completed_id = reference_data.completed_status_id()
+    if completed_id is None:
+        return 0
+
+    stmt = (
+        select(Incident.id, Incident.assigned_employee_id, Incident.completed_at)
+        .where(Incident.status_id == completed_id, Incident.completed_at < cutoff)
+        .order_by(Incident.completed_at, Incident.id)
+        .limit(batch_size)
+    )
+    if session.get_bind().dialect.name == 'postgresql':
+        stmt = stmt.with_for_update(skip_locked=True)
+    rows = session.execute(stmt).all()
+    if not rows:
+        return 0
+
+    incident_ids = [row.id for row in rows]
+    ensure_partitions(session, [row.completed_at for row in rows])
+    for hot, archive in ARCHIVE_MODELS:
+        columns = [column.name for column in hot.__table__.c]
+        session.execute(insert(archive).from_select(
+            columns if hot is Incident else columns + ['completed_at'],
+            _archive_source(hot, incident_ids),
+        ))
+    for hot, _ in reversed(ARCHIVE_MODELS):
+        key = hot.id if hot is Incident else hot.incident_id
+        session.execute(delete(hot).where(key.in_(incident_ids)).execution_options(synchronize_session=False))
+    # Клиенты /sync удаляют перенесённые инциденты из локальной копии
+    now = datetime.utcnow()
+    session.execute(insert(IncidentTombstone), [
+        {'incident_id': row.id, 'assigned_employee_id': row.assigned_employee_id,
+         'reason': 'archived', 'deleted_at': now}
+        for row in rows
+    ])
+    return len(incident_ids)
+
+
+def archive_completed(session, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                      max_batches=None, pause=0.0, log=print):
+    # Порции до исчерпания (или max_batches); pause — секунды между
+    # порциями, чтобы не занимать базу целиком. Возвращает число инцидентов
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        try:
+            moved = archive_batch(session, cutoff, batch_size)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        if not moved:
+            break
+        total += moved
+        batches += 1
+        log(f"  перенесено {total}")
+        if pause:
+            time.sleep(pause)
+    return total
+
+
+# Ссылки на удалённого сотрудника обнуляются, как ORM делает это в горячих
+# таблицах (если архив уже создан миграцией 0008)
+@event.listens_for(Employee, 'after_delete')
+def _employee_deleted(mapper, connection, target):
+    if not _has_archive(connection):
+        return
+    connection.execute(
+        update(IncidentArchive).where(IncidentArchive.assigned_employee_id == target.id)
+        .values(assigned_employee_id=None)
+    )
+    connection.execute(
+        update(IncidentResponseArchive).where(IncidentResponseArchive.performed_by_id == target.id)
+        .values(performed_by_id=None)
+    )
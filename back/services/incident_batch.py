@@ -0,0 +1,169 @@
+# services/incident_batch.py
+# Пакетное назначение инцидентов и смена статусов.
+#
+# Текущее состояние всех инцидентов пакета читается одним SELECT (с
+# блокировкой строк), проверки выполняются в памяти, а изменения применяются
+# одним UPDATE ... SET col = CASE id WHEN ... END WHERE id IN (...).
+# Правила те же, что у одиночных маршрутов: завершённый инцидент не
+# редактируется, закрытый — не переназначается, завершение — только через
+# /complete (там формируется отчёт).
+from datetime import datetime
+
+from sqlalchemy import select, update, case
+
+from models import Incident, Employee
+from services import assignment, incident_changes, reference_data
+from services.roster import open_incident_filter
+
+BATCH_MAX_OPERATIONS = 1000
+
+_SNAPSHOT_COLUMNS = tuple(Incident.__table__.c[field] for field in incident_changes.SNAPSHOT_FIELDS)
+
+
+def load_snapshots(session, incident_ids):
+    if not incident_ids:
+        return {}
+    stmt = select(*_SNAPSHOT_COLUMNS).where(Incident.id.in_(incident_ids)).with_for_update()
+    return {row['id']: dict(row) for row in session.execute(stmt).mappings()}
+
+
+def apply_changes(session, changes, snapshots):
+    # changes: {incident_id: {колонка: новое значение}} -> один UPDATE
+    if not changes:
+        return
+    values = {}
+    for column in ('assigned_employee_id', 'status_id'):
+        mapping = {incident_id: change[column] for incident_id, change in changes.items() if column in change}
+        if mapping:
+            values[column] = case(mapping, value=Incident.id, else_=getattr(Incident, column))
+    # completed_at следует за статусом: время завершения или NULL
+    now = datetime.utcnow()
+    for change in changes.values():
+        if 'status_id' in change:
+            change['completed_at'] = now if reference_data.is_completed(change['status_id']) else None
+    completed = {incident_id: change['completed_at'] for incident_id, change in changes.items() if 'completed_at' in change}
+    if completed:
+        values['completed_at'] = case(completed, value=Incident.id, else_=Incident.completed_at)
+    session.execute(
+        update(Incident)
+        .where(Incident.id.in_(list(changes)))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    for incident_id, change in changes.items():
+        before = snapshots[incident_id]
+        incident_changes.track('updated', incident_id, before, dict(before, **change), session=session)
+
+
+def _parse_int(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError
+    return value
+
+
+def parse_operations(data):
+    operations = (data or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations должен быть непустым списком")
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise ValueError(f"Не больше {BATCH_MAX_OPERATIONS} операций за запрос")
+    return operations
+
+
+def run_batch(session, operations):
+    # Возвращает результаты по каждой операции в порядке запроса
+    results = [None] * len(operations)
+    parsed = {}
+    for index, op in enumerate(operations):
+        try:
+            if not isinstance(op, dict):
+                raise ValueError
+            incident_id = _parse_int(op.get('incident_id'))
+            employee_id = _parse_int(op['employee_id']) if op.get('employee_id') is not None else None
+            status_id = _parse_int(op['status_id']) if op.get('status_id') is not None else None
+        except ValueError:
+            results[index] = {'index': index, 'result': 'error',
+                              'error': "Ожидается {incident_id, employee_id и/или status_id} — целые числа"}
+            continue
+        if employee_id is None and status_id is None:
+            results[index] = {'index': index, 'incident_id': incident_id, 'result': 'error',
+                              'error': "Нужно указать employee_id или status_id"}
+            continue
+        parsed[index] = (incident_id, employee_id, status_id)
+
+    snapshots = load_snapshots(session, {incident_id for incident_id, _, _ in parsed.values()})
+    employee_ids = {employee_id for _, employee_id, _ in parsed.values() if employee_id is not None}
+    known_employees = set(session.execute(
+        select(Employee.id).where(Employee.id.in_(employee_ids))
+    ).scalars()) if employee_ids else set()
+
+    completed_id = reference_data.completed_status_id()
+    closed_ids = reference_data.closed_status_ids()
+    changes = {}
+    for index, (incident_id, employee_id, status_id) in parsed.items():
+        result = {'index': index, 'incident_id': incident_id}
+        results[index] = result
+        current = snapshots.get(incident_id)
+        error = None
+        if current is None:
+            error = "Incident not found"
+        elif incident_id in changes:
+            error = "Инцидент уже изменяется в этом пакете"
+        elif reference_data.is_completed(current['status_id']):
+            error = "Нельзя редактировать завершённый инцидент"
+        elif employee_id is not None and employee_id not in known_employees:
+            error = "Employee not found"
+        elif employee_id is not None and current['status_id'] in closed_ids \
+                and employee_id != current['assigned_employee_id']:
+            error = "Cannot assign closed incident"
+        elif status_id is not None and reference_data.status_name(status_id) is None:
+            error = "Status not found"
+        elif status_id is not None and status_id == completed_id:
+            error = "Завершение инцидента — через /complete"
+        if error:
+            result.update(result='error', error=error)
+            continue
+
+        change = {}
+        if employee_id is not None and employee_id != current['assigned_employee_id']:
+            change['assigned_employee_id'] = employee_id
+        if status_id is not None and status_id != current['status_id']:
+            change['status_id'] = status_id
+        if change:
+            changes[incident_id] = change
+            result.update(result='updated', **change)
+        else:
+            result['result'] = 'unchanged'
+
+    apply_changes(session, changes, snapshots)
+    return results
+
+
+# ♻️ Переназначение открытых инцидентов удаляемого сотрудника
+def plan_reassignment(session, employee_id, reassigned_to, admin_id):
+    # Возвращает ({incident_id: {'assigned_employee_id': ...}}, снимки);
+    # ValueError — если reassigned_to не существует.
+    # reassigned_to получает все инциденты, иначе они распределяются по
+    # наименее загруженным сотрудникам (services.assignment); если таких
+    # нет — администратору
+    open_incidents = session.execute(
+        select(Incident.id, Incident.location_id)
+        .where(Incident.assigned_employee_id == employee_id, open_incident_filter())
+        .order_by(Incident.id)
+    ).all()
+    if not open_incidents:
+        return {}, {}
+    open_ids = [row.id for row in open_incidents]
+
+    if reassigned_to:
+        if session.get(Employee, reassigned_to) is None:
+            raise ValueError("Неверный reassigned_to ID")
+        targets = [reassigned_to] * len(open_ids)
+    else:
+        targets = assignment.distribute(
+            session, [row.location_id for row in open_incidents], exclude=(employee_id,)
+        )
+        targets = [target if target is not None else admin_id for target in targets]
+
+    snapshots = load_snapshots(session, open_ids)
+    return {incident_id: {'assigned_employee_id': target} for incident_id, target in zip(open_ids, targets)}, snapshots
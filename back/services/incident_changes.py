@@ -0,0 +1,104 @@
+# services/incident_changes.py
+# Учёт изменений инцидентов в рамках одной транзакции.
+#
+# Маршруты, меняющие инциденты, вызывают track() с «снимками» строки до и
+# после изменения. Перед коммитом накопленные изменения передаются
+# зарегистрированным обработчикам (проекции, счётчики и т.п.), которые
+# обновляют производные данные в той же транзакции. После успешного коммита
+# те же изменения получают обработчики on_after_commit (уведомления и т.п.).
+# При откате изменения просто отбрасываются.
+import logging
+
+from sqlalchemy import event
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Колонки, которые попадают в снимок инцидента
+SNAPSHOT_FIELDS = (
+    'id', 'status_id', 'incident_type', 'location_id',
+    'assigned_employee_id', 'incident_datetime', 'created_at', 'updated_at', 'completed_at',
+)
+
+_SESSION_KEY = 'incident_changes'
+_COMMITTED_KEY = 'incident_changes_committed'
+
+_before_commit_handlers = []
+_after_commit_handlers = []
+
+
+def snapshot(incident):
+    if incident is None:
+        return None
+    return {field: getattr(incident, field) for field in SNAPSHOT_FIELDS}
+
+
+def track(kind, incident_id, before=None, after=None, session=None):
+    # kind: 'created' | 'updated' | 'deleted'
+    session = session or db.session
+    session.info.setdefault(_SESSION_KEY, []).append({
+        'kind': kind,
+        'incident_id': incident_id,
+        'before': before,
+        'after': after,
+    })
+
+
+def on_before_commit(handler):
+    # Обработчик получает (session, changes) и может писать в ту же сессию
+    _before_commit_handlers.append(handler)
+    return handler
+
+
+def on_after_commit(handler):
+    # Обработчик получает (session, changes) уже после коммита; писать в БД
+    # в нём нельзя, ошибки только пишутся в лог
+    _after_commit_handlers.append(handler)
+    return handler
+
+
+def affected_employee_ids(changes):
+    ids = set()
+    for change in changes:
+        for state in (change['before'], change['after']):
+            if state and state.get('assigned_employee_id'):
+                ids.add(state['assigned_employee_id'])
+    return ids
+
+
+def _dispatch_before_commit(session):
+    changes = session.info.pop(_SESSION_KEY, None)
+    if not changes:
+        return
+    session.flush()
+    for handler in _before_commit_handlers:
+        handler(session, changes)
+    session.info.setdefault(_COMMITTED_KEY, []).extend(changes)
+
+
+def _dispatch_after_commit(session):
+    changes = session.info.pop(_COMMITTED_KEY, None)
+    if not changes:
+        return
+    for handler in _after_commit_handlers:
+        # транзакция уже закоммичена: ошибка обработчика не должна дойти до запроса
+        try:
+            handler(session, changes)
+        except Exception:
+            logger.exception(f"💥 Обработчик {handler.__name__} после коммита")
+
+
+def _discard(session, *args):
+    session.info.pop(_SESSION_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
+
+
+def listen(target):
+    # target — сессия или класс сессии (например, синхронный класс AsyncSession)
+    event.listen(target, 'before_commit', _dispatch_before_commit)
+    event.listen(target, 'after_commit', _dispatch_after_commit)
+    event.listen(target, 'after_soft_rollback', _discard)
+
+
+listen(db.session)
@@ -0,0 +1,301 @@
+# services/incident_events.py
+# Push-уведомления об изменениях инцидентов (SSE / WebSocket).
+#
+# После коммита изменения из incident_changes превращаются в события
+# (created, updated, assigned, completed, deleted) и публикуются во
+# внутрипроцессную шину bus. Подписчик — открытое SSE- или WebSocket-
+# соединение — получает только то, что ему видно: администратор — все
+# события, сотрудник — события по инцидентам, назначенным на него сейчас или
+# до изменения.
+#
+# Несколько воркеров: при EVENTS_PG_NOTIFY события отправляются через
+# pg_notify в той же транзакции (доставляются только после коммита), а
+# каждый воркер слушает канал EVENTS_CHANNEL и публикует их в свою шину.
+#
+# Шина хранит последние EVENT_BUFFER_SIZE событий: клиент, переподключившись
+# с Last-Event-ID, получает пропущенное. Если пропущенного уже нет в буфере
+# (или очередь подписчика переполнилась), приходит событие resync — список
+# инцидентов нужно перечитать.
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import Text, bindparam, create_engine, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.pool import NullPool
+
+from services import incident_changes, reference_data
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = 'incident_events'
+EVENT_BUFFER_SIZE = 1000
+SUBSCRIBER_QUEUE_SIZE = 256
+# Комментарий-пинг в SSE, чтобы прокси не закрывали простаивающее соединение
+HEARTBEAT_S = 15
+RETRY_MS = 3000
+
+RESYNC = {'type': 'resync'}
+
+
+def event_type(before, after, completed_id):
+    if before is None:
+        return 'created'
+    if after is None:
+        return 'deleted'
+    if after['status_id'] == completed_id and before['status_id'] != completed_id:
+        return 'completed'
+    if after['assigned_employee_id'] != before['assigned_employee_id']:
+        return 'assigned'
+    return 'updated'
+
+
+def build_events(changes):
+    completed_id = reference_data.completed_status_id()
+    at = datetime.utcnow().isoformat()
+    events = []
+    for change in changes:
+        before, after = change['before'], change['after']
+        state = after or before
+        events.append({
+            'type': event_type(before, after, completed_id),
+            'incident_id': change['incident_id'],
+            'status_id': state['status_id'],
+            'assigned_employee_id': state['assigned_employee_id'],
+            'previous_assigned_employee_id': before['assigned_employee_id'] if before else None,
+            'at': at,
+        })
+    return events
+
+
+class Subscription:
+    # loop — цикл asyncio для ASGI-подписчика (очередь asyncio.Queue), иначе
+    # обычная потокобезопасная queue.Queue
+    def __init__(self, user_id, admin, loop=None):
+        self.user_id = user_id
+        self.admin = admin
+        self.loop = loop
+        # публикуют из разных потоков: переполнение обрабатывается целиком под блокировкой
+        self._lock = threading.Lock()
+        if loop is None:
+            self.queue = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        else:
+            self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def accepts(self, event):
+        if event['type'] == 'resync' or self.admin:
+            return True
+        return self.user_id in (event.get('assigned_employee_id'), event.get('previous_assigned_employee_id'))
+
+    def put(self, event):
+        if self.loop is None:
+            self._put(event)
+        else:
+            self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        with self._lock:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except (queue.Full, asyncio.QueueFull):
+                pass
+            # клиент не успевает читать: очищаем очередь и просим перечитать
+            # список. Читатель может забрать событие одновременно с нами,
+            # поэтому пустая очередь — просто конец очистки
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except (queue.Empty, asyncio.QueueEmpty):
+                    break
+            self.queue.put_nowait(RESYNC)
+
+
+class EventBus:
+    def __init__(self, buffer_size=EVENT_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._buffer = deque(maxlen=buffer_size)
+        self._seq = 0
+        # id события — "<процесс>-<номер>": после перезапуска или переподключения
+        # к другому воркеру старый Last-Event-ID не совпадёт и придёт resync
+        self._boot = f"{os.getpid():x}{int(time.time()):x}"
+
+    def publish(self, event):
+        with self._lock:
+            self._seq += 1
+            event = dict(event, id=f"{self._boot}-{self._seq}")
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription.accepts(event):
+                continue
+            try:
+                subscription.put(event)
+            except Exception:
+                # например, цикл событий ASGI-подписчика уже закрыт
+                logger.exception("⚠️ Подписчик событий отключён")
+                self.unsubscribe(subscription)
+        return event
+
+    def subscribe(self, user_id, admin, loop=None):
+        subscription = Subscription(user_id, admin, loop)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def replay(self, subscription, last_event_id):
+        # События после last_event_id; [RESYNC], если восстановить их нельзя
+        if not last_event_id:
+            return []
+        boot, _, seq = last_event_id.rpartition('-')
+        with self._lock:
+            buffered = list(self._buffer)
+        if boot != self._boot or not seq.isdigit():
+            return [RESYNC]
+        seq = int(seq)
+        if seq > self._seq or (buffered and seq < int(buffered[0]['id'].rpartition('-')[2]) - 1):
+            return [RESYNC]
+        return [e for e in buffered if int(e['id'].rpartition('-')[2]) > seq and subscription.accepts(e)]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+bus = EventBus()
+
+
+def format_sse(event):
+    lines = [f"event: {event['type']}"]
+    if 'id' in event:
+        lines.insert(0, f"id: {event['id']}")
+    lines.append(f"data: {json.dumps(event, ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+# 🚦 Во Flask каждое SSE-соединение держит поток gthread-воркера до отключения
+# клиента, поэтому их число на процесс ограничено EVENTS_FLASK_STREAMS
+# (0 — поток событий отдаёт только асинхронный сервер)
+class StreamLimit:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def acquire(self, limit):
+        with self._lock:
+            if self.active >= limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+stream_limit = StreamLimit()
+
+
+def sse_stream(subscription, replay):
+    # Генератор для Flask: блокирует поток воркера на время соединения
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        for event in replay:
+            yield format_sse(event)
+        while True:
+            try:
+                event = subscription.queue.get(timeout=HEARTBEAT_S)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            yield format_sse(event)
+    finally:
+        bus.unsubscribe(subscription)
+
+
+# 📣 Публикация
+def notify_enabled(session):
+    return current_app.config.get('EVENTS_PG_NOTIFY') and session.get_bind().dialect.name == 'postgresql'
+
+
+# Один запрос на всю транзакцию, по уведомлению на событие
+_NOTIFY = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload"
+).bindparams(bindparam('payloads', type_=ARRAY(Text)))
+
+
+@incident_changes.on_before_commit
+def _notify(session, changes):
+    # pg_notify внутри транзакции: другие воркеры получат события только после коммита
+    if not notify_enabled(session):
+        return
+    session.execute(_NOTIFY, {
+        'channel': EVENTS_CHANNEL,
+        'payloads': [json.dumps(event, ensure_ascii=False) for event in build_events(changes)],
+    })
+
+
+@incident_changes.on_after_commit
+def _publish(session, changes):
+    # Коммит уже состоялся: сбой доставки не должен превращаться в ошибку запроса
+    try:
+        if notify_enabled(session):
+            return
+        for event in build_events(changes):
+            bus.publish(event)
+    except Exception:
+        logger.exception("💥 Не удалось опубликовать события по инцидентам")
+
+
+# 👂 LISTEN для Flask-воркера (psycopg2); в ASGI — asgi/events.py на asyncpg
+_listener_started = False
+_listener_lock = threading.Lock()
+
+
+def _listen(url):
+    import select
+    engine = create_engine(url, poolclass=NullPool)
+    while True:
+        try:
+            connection = engine.raw_connection()
+            try:
+                driver_connection = connection.driver_connection
+                driver_connection.autocommit = True
+                driver_connection.cursor().execute(f"LISTEN {EVENTS_CHANNEL}")
+                while True:
+                    if select.select([driver_connection], [], [], HEARTBEAT_S) == ([], [], []):
+                        continue
+                    driver_connection.poll()
+                    while driver_connection.notifies:
+                        bus.publish(json.loads(driver_connection.notifies.pop(0).payload))
+            finally:
+                connection.close()
+        except Exception:
+            # Пока соединения не было, события могли потеряться
+            bus.publish(RESYNC)
+            time.sleep(1)
+
+
+def ensure_listener(app):
+    # Слушатель запускается при первой подписке в процессе
+    global _listener_started
+    if not app.config.get('EVENTS_PG_NOTIFY'):
+        return
+    with _listener_lock:
+        if _listener_started:
+            return
+        _listener_started = True
+    url = app.config['SQLALCHEMY_DATABASE_URI']
+    threading.Thread(target=_listen, args=(url,), name='incident-events-listener', daemon=True).start()
@@ -0,0 +1,223 @@
+# services/incident_import.py
+# Массовый импорт инцидентов из CSV / JSON Lines.
+#
+# Файл читается потоково, строки проверяются лёгким валидатором (без
+# marshmallow и ORM-объектов) и вставляются порциями по IMPORT_CHUNK_SIZE:
+# один INSERT ... RETURNING на порцию (executemany/insertmanyvalues) и
+# отдельная транзакция на порцию. Ошибочные строки не прерывают импорт и
+# попадают в отчёт с номером строки файла.
+#
+# Колонки совпадают с выгрузкой /api/incidents/export, поэтому её можно
+# загрузить обратно: вместо location_id / status_id / assigned_employee_id
+# допускаются location_name / status_name / assigned_employee_email.
+import csv
+import io
+import json
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select
+
+from models import Incident, Employee
+from services import incident_changes, reference_data
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # pragma: no cover
+    _loads = json.loads
+
+IMPORT_CHUNK_SIZE = 5000
+# Сколько ошибок по строкам возвращать в отчёте (считаются все)
+IMPORT_MAX_ERRORS = 1000
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+DEFAULT_STATUS = 'новый'
+
+_MAX_LENGTH = {'title': 150, 'incident_type': 50}
+
+
+class _Context:
+    # Справочники для проверки ссылок, загружаются один раз на импорт
+    def __init__(self, session):
+        self.location_ids = {l['id'] for l in reference_data.locations()}
+        self.location_names = {l['location_name'].lower(): l['id'] for l in reference_data.locations()}
+        self.status_ids = {s['id'] for s in reference_data.statuses()}
+        self.default_status_id = reference_data.status_id(DEFAULT_STATUS)
+        self.employee_emails = {
+            (email or '').lower(): id_
+            for id_, email in session.execute(select(Employee.id, Employee.email))
+        }
+        self.employee_ids = set(self.employee_emails.values())
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _int(value, name, errors):
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        errors[name] = "Должно быть целым числом"
+
+
+def _datetime(value, name, errors):
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        errors[name] = "Некорректная дата"
+        return None
+    # колонки хранят UTC без пояса: время со смещением переводится в UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def validate_row(raw, ctx, now):
+    # Возвращает (значения для INSERT, ошибки по полям)
+    if not isinstance(raw, dict):
+        return None, {'_row': "Ожидается объект"}
+    errors = {}
+    row = {
+        'title': _text(raw.get('title')),
+        'description': _text(raw.get('description')),
+        'incident_type': _text(raw.get('incident_type')),
+        'conclusion': _text(raw.get('conclusion')),
+    }
+    for name, limit in _MAX_LENGTH.items():
+        if not row[name]:
+            errors[name] = "Обязательное поле"
+        elif len(row[name]) > limit:
+            errors[name] = f"Не длиннее {limit} символов"
+
+    row['incident_datetime'] = _datetime(raw.get('incident_datetime'), 'incident_datetime', errors) or now
+    row['created_at'] = _datetime(raw.get('created_at'), 'created_at', errors) or now
+    row['updated_at'] = now
+
+    location_id = _int(raw.get('location_id'), 'location_id', errors)
+    location_name = _text(raw.get('location_name'))
+    if location_id is None and location_name:
+        location_id = ctx.location_names.get(location_name.lower())
+        if location_id is None:
+            errors['location_name'] = "Неизвестная локация"
+    elif location_id is not None and location_id not in ctx.location_ids:
+        errors['location_id'] = "Неизвестная локация"
+    row['location_id'] = location_id
+
+    status_id = _int(raw.get('status_id'), 'status_id', errors)
+    status_name = _text(raw.get('status_name'))
+    if status_id is None and status_name:
+        status_id = reference_data.status_id(status_name)
+        if status_id is None:
+            errors['status_name'] = "Неизвестный статус"
+    elif status_id is not None and status_id not in ctx.status_ids:
+        errors['status_id'] = "Неизвестный статус"
+    row['status_id'] = status_id if status_id is not None else ctx.default_status_id
+    completed_at = _datetime(raw.get('completed_at'), 'completed_at', errors)
+    row['completed_at'] = (completed_at or now) if reference_data.is_completed(row['status_id']) else None
+
+    employee_id = _int(raw.get('assigned_employee_id'), 'assigned_employee_id', errors)
+    employee_email = _text(raw.get('assigned_employee_email'))
+    if employee_id is None and employee_email:
+        employee_id = ctx.employee_emails.get(employee_email.lower())
+        if employee_id is None:
+            errors['assigned_employee_email'] = "Неизвестный сотрудник"
+    elif employee_id is not None and employee_id not in ctx.employee_ids:
+        errors['assigned_employee_id'] = "Неизвестный сотрудник"
+    row['assigned_employee_id'] = employee_id
+
+    return row, errors
+
+
+def _text_stream(stream):
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def iter_records(stream, fmt):
+    # (номер строки файла, dict или ошибка разбора)
+    text = _text_stream(stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, _loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"Некорректный JSON: {e}")
+
+
+# Core-вставка по таблице: без ORM-обработки каждой строки. RETURNING отдаёт
+# сразу колонки снимка, поэтому порядок возвращённых строк не важен
+_INSERT = insert(Incident.__table__).returning(
+    *(Incident.__table__.c[field] for field in incident_changes.SNAPSHOT_FIELDS)
+)
+
+
+def _insert_chunk(session, rows):
+    inserted = session.execute(_INSERT, rows).mappings().all()
+    for after in inserted:
+        incident_changes.track('created', after['id'], after=dict(after), session=session)
+    session.commit()
+    return len(inserted)
+
+
+def import_incidents(session, stream, fmt, chunk_size=IMPORT_CHUNK_SIZE, logger=None):
+    started = time.perf_counter()
+    ctx = _Context(session)
+    report = {'imported': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+
+    def add_error(entry, count=1):
+        report['failed'] += count
+        if len(report['errors']) < IMPORT_MAX_ERRORS:
+            report['errors'].append(entry)
+        else:
+            report['errors_truncated'] = True
+
+    def flush(rows, lines):
+        try:
+            report['imported'] += _insert_chunk(session, rows)
+        except Exception as e:
+            session.rollback()
+            if logger:
+                logger.exception(f"💥 Ошибка вставки строк {lines[0]}-{lines[-1]}: {e}")
+            add_error({'lines': [lines[0], lines[-1]], 'errors': {'_db': str(e)}}, len(rows))
+
+    rows, lines = [], []
+    now = datetime.utcnow()
+    for line_no, record in iter_records(stream, fmt):
+        if isinstance(record, Exception):
+            add_error({'line': line_no, 'errors': {'_row': str(record)}})
+            continue
+        row, errors = validate_row(record, ctx, now)
+        if errors:
+            add_error({'line': line_no, 'errors': errors})
+            continue
+        rows.append(row)
+        lines.append(line_no)
+        if len(rows) >= chunk_size:
+            flush(rows, lines)
+            rows, lines = [], []
+            now = datetime.utcnow()
+    if rows:
+        flush(rows, lines)
+
+    elapsed = time.perf_counter() - started
+    report['elapsed_s'] = round(elapsed, 3)
+    report['rows_per_second'] = int(report['imported'] / elapsed) if elapsed else None
+    return report
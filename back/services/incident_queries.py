@@ -0,0 +1,107 @@
+# services/incident_queries.py
+# Фильтры и постраничная выдача инцидентов по курсору (keyset).
+#
+# Страница определяется парой (incident_datetime, id) последней отданной
+# строки, поэтому запрос следующей страницы — это диапазонное чтение по
+# составному индексу, а не OFFSET по всей таблице. incident_datetime не
+# бывает NULL (миграция 0010), иначе такие строки выпали бы из сравнения.
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from models import Incident
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Параметры запроса — фильтры по равенству одноимённой колонки
+_INT_FILTERS = ('status_id', 'location_id', 'assigned_employee_id')
+
+
+def _parse_datetime(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Некорректная дата в параметре {name}: {value}")
+
+
+def _parse_int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Параметр {name} должен быть целым числом")
+
+
+def encode_cursor(incident_datetime, incident_id, order):
+    payload = json.dumps({
+        'dt': incident_datetime.isoformat(),
+        'id': incident_id,
+        'o': order,
+    })
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload['dt']), int(payload['id']), payload['o']
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Некорректный курсор")
+
+
+def apply_filters(query, args, model=Incident):
+    # model — Incident или IncidentArchive (те же имена колонок)
+    for name in _INT_FILTERS:
+        if args.get(name):
+            query = query.filter(getattr(model, name) == _parse_int(args[name], name))
+    if args.get('incident_type'):
+        query = query.filter(model.incident_type == args['incident_type'])
+    if args.get('date_from'):
+        query = query.filter(model.incident_datetime >= _parse_datetime(args['date_from'], 'date_from'))
+    if args.get('date_to'):
+        query = query.filter(model.incident_datetime < _parse_datetime(args['date_to'], 'date_to'))
+    return query
+
+
+def page_statement(query, args):
+    # Добавляет к запросу (Query или select) условие курсора, сортировку и LIMIT.
+    # Возвращает (запрос, размер страницы, порядок)
+    order = args.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("Параметр order должен быть asc или desc")
+
+    limit = _parse_int(args.get('limit', DEFAULT_PAGE_SIZE), 'limit')
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    key = tuple_(Incident.incident_datetime, Incident.id)
+    if args.get('cursor'):
+        cursor_dt, cursor_id, cursor_order = decode_cursor(args['cursor'])
+        if cursor_order != order:
+            raise ValueError("Курсор получен для другого порядка сортировки")
+        bound = tuple_(cursor_dt, cursor_id)
+        query = query.filter(key < bound if order == 'desc' else key > bound)
+
+    if order == 'desc':
+        query = query.order_by(Incident.incident_datetime.desc(), Incident.id.desc())
+    else:
+        query = query.order_by(Incident.incident_datetime.asc(), Incident.id.asc())
+
+    return query.limit(limit + 1), limit, order
+
+
+def split_page(rows, limit, order):
+    # Лишняя (limit + 1)-я строка означает, что есть следующая страница
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.incident_datetime, last.id, order)
+
+
+def paginate(query, args):
+    # Возвращает (инциденты страницы, курсор следующей страницы или None)
+    query, limit, order = page_statement(query, args)
+    return split_page(query.all(), limit, order)
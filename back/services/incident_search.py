@@ -0,0 +1,318 @@
+# services/incident_search.py
+# Полнотекстовый поиск по инцидентам.
+#
+# Поисковый документ инцидента — заголовок и текст (описание, действия из
+# incident_responses, описания источников). Хранится в отдельной таблице
+# incident_search:
+#   PostgreSQL — tsvector (заголовок с весом A, текст с весом B) и GIN-индекс,
+#                ранжирование ts_rank_cd, подсветка ts_headline;
+#   SQLite     — виртуальная таблица FTS5, ранжирование bm25, подсветка snippet.
+# Таблица создаётся миграцией 0004 (или командой flask rebuild-search-index)
+# и обновляется в той же транзакции, что и инциденты, через incident_changes.
+# Если таблицы нет, запись инцидентов работает как раньше, а поиск отвечает
+# ошибкой. Документы архивированных инцидентов (services/incident_archive.py)
+# остаются в таблице, поиск соединяет их с архивными таблицами.
+import threading
+import time
+
+from flask import current_app
+from markupsafe import escape
+from sqlalchemy import bindparam, cast, column, func, inspect, literal, literal_column, select, table, text
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from models import (
+    Incident, IncidentArchive, IncidentResponse, IncidentResponseArchive, IncidentSource, IncidentSourceArchive,
+)
+from services import incident_archive, incident_changes
+from services.incident_queries import _parse_int, apply_filters
+
+SEARCH_TABLE = 'incident_search'
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+# В SQL подсветка ставит символы из области частного использования Unicode;
+# теги подставляются вместо них уже после экранирования текста
+_MARK_START = '\ue000'
+_MARK_STOP = '\ue001'
+_MARKS = str.maketrans('', '', _MARK_START + _MARK_STOP)
+
+# база -> (есть ли таблица поиска, когда проверено). Отсутствие
+# перепроверяется раз в _RECHECK_S: миграцию могли выполнить другим процессом
+_available = {}
+_available_lock = threading.Lock()
+_RECHECK_S = 60
+
+
+def ts_config():
+    return current_app.config.get('SEARCH_TS_CONFIG', 'russian')
+
+
+def _dialect(bind):
+    return bind.get_bind().dialect.name if hasattr(bind, 'get_bind') else bind.dialect.name
+
+
+def supported(dialect):
+    return dialect in ('postgresql', 'sqlite')
+
+
+def _key(bind):
+    # Без драйвера: синхронный и асинхронный движки к одной базе — один ключ
+    return str(bind.engine.url.set(drivername=bind.dialect.name))
+
+
+def is_available(session):
+    bind = session.get_bind()
+    key = _key(bind)
+    with _available_lock:
+        found, checked_at = _available.get(key, (False, None))
+        if checked_at is None or (not found and time.monotonic() - checked_at > _RECHECK_S):
+            # через соединение сессии: отдельное соединение во время записи
+            # упрётся в блокировку (SQLite) или займёт лишнее место в пуле
+            found = supported(bind.dialect.name) and inspect(session.connection()).has_table(SEARCH_TABLE)
+            _available[key] = (found, time.monotonic())
+        return found
+
+
+def _mark_available(bind, value):
+    with _available_lock:
+        _available[_key(bind)] = (value, time.monotonic())
+
+
+# 🧱 Структура таблицы (миграция 0004 и rebuild-search-index)
+def create_search_index(connection, config='russian'):
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            " incident_id INTEGER PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)"
+        ))
+    elif dialect == 'sqlite':
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            " title, content, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+    else:
+        raise RuntimeError(f"Полнотекстовый поиск не поддерживается для {dialect}")
+
+
+def drop_search_index(connection):
+    connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+
+
+# 📄 Документы
+# Таблицы документа: инцидент, меры реагирования, источники — горячие или архивные
+_SOURCES = (Incident, IncidentResponse, IncidentSource)
+_ARCHIVE_SOURCES = (IncidentArchive, IncidentResponseArchive, IncidentSourceArchive)
+
+
+def _clean(value):
+    # маркеры подсветки в самом тексте подделали бы теги
+    return value.translate(_MARKS)
+
+
+def _documents(session, incident_ids, sources=_SOURCES):
+    # {incident_id: (title, content)} для существующих инцидентов
+    incidents, responses, incident_sources = sources
+    docs = {}
+    rows = session.execute(
+        select(incidents.id, incidents.title, incidents.description).where(incidents.id.in_(incident_ids))
+    )
+    for incident_id, title, description in rows:
+        docs[incident_id] = [title or '', [description] if description else []]
+    for model, column in ((responses, responses.action_taken),
+                          (incident_sources, incident_sources.source_description)):
+        rows = session.execute(
+            select(model.incident_id, column)
+            .where(model.incident_id.in_(list(docs)), column.is_not(None))
+            .order_by(model.id)
+        )
+        for incident_id, value in rows:
+            docs[incident_id][1].append(value)
+    return {
+        incident_id: (_clean(title), _clean('\n'.join(parts))) for incident_id, (title, parts) in docs.items()
+    }
+
+
+def _insert_statement(dialect, config):
+    if dialect == 'postgresql':
+        return text(
+            f"INSERT INTO {SEARCH_TABLE} (incident_id, title, content, document) VALUES ("
+            " :incident_id, :title, :content,"
+            " setweight(to_tsvector(CAST(:config AS regconfig), :title), 'A') ||"
+            " setweight(to_tsvector(CAST(:config AS regconfig), :content), 'B'))"
+        ).bindparams(config=config)
+    return text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, title, content) VALUES (:incident_id, :title, :content)"
+    )
+
+
+def _delete_statement(dialect):
+    key = 'incident_id' if dialect == 'postgresql' else 'rowid'
+    return text(f"DELETE FROM {SEARCH_TABLE} WHERE {key} IN :ids").bindparams(bindparam('ids', expanding=True))
+
+
+def refresh(session, incident_ids, config=None, sources=_SOURCES):
+    incident_ids = list(incident_ids)
+    if not incident_ids:
+        return
+    dialect = _dialect(session)
+    session.execute(_delete_statement(dialect), {'ids': incident_ids})
+    docs = _documents(session, incident_ids, sources)
+    if docs:
+        session.execute(_insert_statement(dialect, config or ts_config()), [
+            {'incident_id': incident_id, 'title': title, 'content': content}
+            for incident_id, (title, content) in docs.items()
+        ])
+
+
+def rebuild(session, config=None, batch_size=5000):
+    bind = session.get_bind()
+    create_search_index(session.connection(), config or ts_config())
+    session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    # архивные инциденты тоже ищутся (services/incident_archive.py)
+    groups = (_SOURCES, _ARCHIVE_SOURCES) if incident_archive.is_available(session) else (_SOURCES,)
+    for sources in groups:
+        incidents = sources[0]
+        last_id = 0
+        while True:
+            ids = session.execute(
+                select(incidents.id).where(incidents.id > last_id).order_by(incidents.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            refresh(session, ids, config, sources)
+            last_id = ids[-1]
+    _mark_available(bind, True)
+
+
+@incident_changes.on_before_commit
+def _maintain_search_index(session, changes):
+    if not is_available(session):
+        return
+    refresh(session, {change['incident_id'] for change in changes})
+
+
+# 🔎 Поиск
+# Подсветка — HTML: текст инцидента экранируется (markupsafe.escape), найденные
+# слова обрамляются HIGHLIGHT_START/STOP. Фронтенд может вставлять её как есть.
+def highlight_html(value):
+    if value is None:
+        return None
+    return str(escape(value)).replace(_MARK_START, HIGHLIGHT_START).replace(_MARK_STOP, HIGHLIGHT_STOP)
+
+
+def _fts5_query(q):
+    # Каждое слово — отдельная фраза в кавычках: спецсинтаксис FTS5 пользователю не нужен
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in q.split())
+
+
+def _postgresql_statement(q, restrict, limit, offset, config):
+    st = table(SEARCH_TABLE, column('incident_id'), column('title'), column('content'), column('document'))
+    regconfig = cast(literal(config), REGCONFIG)
+    tsquery = func.websearch_to_tsquery(regconfig, q)
+    rank = func.ts_rank_cd(st.c.document, tsquery).label('rank')
+    matched = incident_archive.across_archive(lambda model: restrict(
+        select(st.c.incident_id, rank)
+        .join_from(st, model, model.id == st.c.incident_id)
+        .where(st.c.document.op('@@')(tsquery)),
+        model,
+    )).subquery()
+    ranked = (
+        select(matched)
+        .order_by(matched.c.rank.desc(), matched.c.incident_id.desc())
+        .limit(limit).offset(offset)
+        .subquery()
+    )
+
+    # ts_headline дорогой — считается только для строк страницы
+    selectors = f'StartSel="{_MARK_START}", StopSel="{_MARK_STOP}"'
+    return (
+        select(
+            ranked.c.incident_id,
+            ranked.c.rank,
+            func.ts_headline(regconfig, st.c.title, tsquery, f"HighlightAll=true, {selectors}").label('title_highlight'),
+            func.ts_headline(regconfig, st.c.content, tsquery,
+                             f"MaxFragments=2, MaxWords=20, MinWords=5, {selectors}").label('snippet'),
+        )
+        .join_from(ranked, st, st.c.incident_id == ranked.c.incident_id)
+        .order_by(ranked.c.rank.desc(), ranked.c.incident_id.desc())
+    )
+
+
+def _sqlite_statement(q, restrict, limit, offset):
+    st = table(SEARCH_TABLE, column('rowid'), column('title'), column('content'))
+    fts = literal_column(SEARCH_TABLE)
+    # bm25: чем меньше, тем релевантнее (в ответе знак меняется, как у
+    # ts_rank_cd); заголовок весит больше текста
+    rank = func.bm25(fts, 10.0, 1.0)
+    matched = incident_archive.across_archive(lambda model: restrict(
+        select(
+            st.c.rowid.label('incident_id'),
+            (-rank).label('rank'),
+            func.highlight(fts, 0, _MARK_START, _MARK_STOP).label('title_highlight'),
+            func.snippet(fts, 1, _MARK_START, _MARK_STOP, '…', 12).label('snippet'),
+        )
+        .join_from(st, model, model.id == st.c.rowid)
+        .where(fts.op('MATCH')(_fts5_query(q))),
+        model,
+    )).subquery()
+    return (
+        select(matched)
+        .order_by(matched.c.rank.desc(), matched.c.incident_id.desc())
+        .limit(limit).offset(offset)
+    )
+
+
+def search_statement(dialect, q, restrict=lambda stmt, model: stmt, limit=DEFAULT_SEARCH_LIMIT, offset=0,
+                     config='russian'):
+    # restrict(select, model) добавляет условия по колонкам model — Incident
+    # или IncidentArchive (фильтры, права); ищется в обоих
+    if dialect == 'postgresql':
+        return _postgresql_statement(q, restrict, limit, offset, config)
+    return _sqlite_statement(q, restrict, limit, offset)
+
+
+def parse_search_args(args, user_id=None):
+    # ?q=&limit=&offset=, ?fields=/?expand= и фильтры списка инцидентов; user_id —
+    # только свои инциденты. Возвращает kwargs для search(); ValueError — на
+    # некорректные параметры
+    from services.serializers import parse_summary_fieldset
+
+    q = (args.get('q') or '').strip()
+    if not q:
+        raise ValueError("Параметр q обязателен")
+    limit = max(1, min(_parse_int(args.get('limit', DEFAULT_SEARCH_LIMIT), 'limit'), MAX_SEARCH_LIMIT))
+    offset = max(0, _parse_int(args.get('offset', 0), 'offset'))
+
+    def restrict(stmt, model):
+        stmt = apply_filters(stmt, args, model)
+        if user_id is not None:
+            stmt = stmt.where(model.assigned_employee_id == user_id)
+        return stmt
+
+    restrict(select(Incident.id), Incident)  # фильтры проверяются сразу, до запроса
+    fieldset = parse_summary_fieldset(args)
+    return {'q': q, 'restrict': restrict, 'limit': limit, 'offset': offset, 'fieldset': fieldset}
+
+
+def search(session, q, restrict=lambda stmt, model: stmt, limit=DEFAULT_SEARCH_LIMIT, offset=0, fieldset=None):
+    from services.serializers import FULL_SUMMARY, incident_summaries
+
+    rows = session.execute(search_statement(_dialect(session), q, restrict, limit, offset, ts_config())).all()
+    summaries = incident_summaries(session, [row.incident_id for row in rows], fieldset or FULL_SUMMARY)
+    return [
+        dict(summaries[row.incident_id], rank=float(row.rank), highlight={
+            'title': highlight_html(row.title_highlight),
+            'snippet': highlight_html(row.snippet),
+        })
+        for row in rows if row.incident_id in summaries
+    ]
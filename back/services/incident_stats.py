@@ -0,0 +1,249 @@
+# services/incident_stats.py
+# Агрегаты по инцидентам для дашборда (/api/incidents/stats).
+#
+# Таблица incident_stats хранит по строке на (измерение, значение): число
+# инцидентов, число завершённых и сумму секунд от created_at до завершения.
+# Измерения: total, status, type, location, assignee, day и hour (по
+# incident_datetime). Таблица обновляется в той же транзакции, что и
+# инциденты, через incident_changes: снимок «до» вычитается, снимок «после»
+# прибавляется, итоговые приращения применяются одним UPSERT. Поэтому
+# дашборд читает несколько сотен строк вместо полного прохода по incidents.
+#
+# Время завершения — completed_at: его ставит только /complete, поэтому
+# запись ссылки на отчёт и обнуление исполнителя при удалении сотрудника,
+# сдвигающие updated_at, на длительность не влияют.
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, inspect, insert, literal, or_, select, update
+
+from models import Employee, Incident, IncidentStat
+from services import incident_archive, incident_changes, reference_data
+
+# Измерения без окна по времени; day и hour отдаются за последние days/hours
+FIXED_DIMENSIONS = ('total', 'status', 'type', 'location', 'assignee')
+
+DEFAULT_STATS_DAYS = 30
+MAX_STATS_DAYS = 366
+DEFAULT_STATS_HOURS = 48
+MAX_STATS_HOURS = 24 * 31
+
+_DAY_FORMAT = '%Y-%m-%d'
+_HOUR_FORMAT = '%Y-%m-%dT%H'
+
+_STATE_COLUMNS = tuple(Incident.__table__.c[field] for field in incident_changes.SNAPSHOT_FIELDS)
+
+
+def _key(value):
+    return '' if value is None else str(value)
+
+
+def _contributions(state):
+    # [(dimension, key), ...] для снимка инцидента
+    keys = [
+        ('total', ''),
+        ('status', _key(state['status_id'])),
+        ('type', _key(state['incident_type'])),
+        ('location', _key(state['location_id'])),
+        ('assignee', _key(state['assigned_employee_id'])),
+    ]
+    if state['incident_datetime'] is not None:
+        keys.append(('day', state['incident_datetime'].strftime(_DAY_FORMAT)))
+        keys.append(('hour', state['incident_datetime'].strftime(_HOUR_FORMAT)))
+    return keys
+
+
+def _resolve_seconds(state, resolved_at):
+    if resolved_at is None or state['created_at'] is None:
+        return 0
+    return max(0, int((resolved_at - state['created_at']).total_seconds()))
+
+
+def _add(deltas, state, sign, resolved_at=None):
+    # resolved_at задаётся только для завершённых инцидентов
+    resolved = resolved_at is not None
+    seconds = _resolve_seconds(state, resolved_at)
+    for key in _contributions(state):
+        delta = deltas[key]
+        delta[0] += sign
+        if resolved:
+            delta[1] += sign
+            delta[2] += sign * seconds
+
+
+def _upsert(session, rows):
+    dialect = session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(IncidentStat)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=['dimension', 'key'],
+            set_={
+                'incident_count': IncidentStat.incident_count + stmt.excluded.incident_count,
+                'resolved_count': IncidentStat.resolved_count + stmt.excluded.resolved_count,
+                'resolve_seconds': IncidentStat.resolve_seconds + stmt.excluded.resolve_seconds,
+            },
+        ), rows)
+        return
+    for row in rows:
+        result = session.execute(
+            update(IncidentStat)
+            .where(IncidentStat.dimension == row['dimension'], IncidentStat.key == row['key'])
+            .values(
+                incident_count=IncidentStat.incident_count + row['incident_count'],
+                resolved_count=IncidentStat.resolved_count + row['resolved_count'],
+                resolve_seconds=IncidentStat.resolve_seconds + row['resolve_seconds'],
+            )
+        )
+        if result.rowcount == 0:
+            session.execute(insert(IncidentStat), [row])
+
+
+def _apply(session, deltas):
+    # Строки в одном порядке во всех транзакциях — без взаимных блокировок
+    rows = [
+        {'dimension': dimension, 'key': key,
+         'incident_count': count, 'resolved_count': resolved, 'resolve_seconds': seconds}
+        for (dimension, key), (count, resolved, seconds) in sorted(deltas.items())
+        if count or resolved or seconds
+    ]
+    if rows:
+        _upsert(session, rows)
+
+
+def _new_deltas():
+    return defaultdict(lambda: [0, 0, 0])
+
+
+def _resolved_at(state, completed_id):
+    return state['completed_at'] if state['status_id'] == completed_id else None
+
+
+# 🔁 Поддержка агрегатов
+@incident_changes.on_before_commit
+def _maintain_stats(session, changes):
+    completed_id = reference_data.completed_status_id()
+    deltas = _new_deltas()
+    for change in changes:
+        before, after = change['before'], change['after']
+        if before:
+            _add(deltas, before, -1, _resolved_at(before, completed_id))
+        if after:
+            _add(deltas, after, 1, _resolved_at(after, completed_id))
+    _apply(session, deltas)
+
+
+def _state_columns(session, model):
+    # Пересчёт вызывают и миграции до появления completed_at (0012):
+    # отсутствующие колонки читаются как NULL
+    existing = {column['name'] for column in inspect(session.connection()).get_columns(model.__tablename__)}
+    return [
+        model.__table__.c[column.name] if column.name in existing
+        else literal(None, type_=column.type).label(column.name)
+        for column in _STATE_COLUMNS
+    ]
+
+
+def rebuild(session, batch_size=5000):
+    reference_data.load(session)
+    completed_id = reference_data.completed_status_id()
+    session.execute(delete(IncidentStat))
+    deltas = _new_deltas()
+    stmt = select(*_state_columns(session, Incident))
+    if incident_archive.is_available(session):
+        # архивированные инциденты (services/incident_archive.py) тоже в статистике
+        stmt = incident_archive.across_archive(lambda model: select(*_state_columns(session, model)))
+    result = session.execute(stmt.execution_options(yield_per=batch_size)).mappings()
+    for state in result:
+        _add(deltas, state, 1, _resolved_at(state, completed_id))
+    _apply(session, deltas)
+
+
+# 📊 Дашборд
+def _parse_window(args, name, default, maximum):
+    try:
+        value = int(args.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"Параметр {name} должен быть целым числом")
+    return max(1, min(value, maximum))
+
+
+def _entry(row):
+    return {
+        'count': row.incident_count,
+        'resolved': row.resolved_count,
+        'mean_resolve_seconds': round(row.resolve_seconds / row.resolved_count) if row.resolved_count else None,
+    }
+
+
+def _id(key):
+    return int(key) if key else None
+
+
+def stats_statement(days, hours, now=None):
+    now = now or datetime.utcnow()
+    first_day = (now - timedelta(days=days - 1)).strftime(_DAY_FORMAT)
+    first_hour = (now - timedelta(hours=hours - 1)).strftime(_HOUR_FORMAT)
+    return (
+        select(IncidentStat)
+        .where(IncidentStat.incident_count > 0)
+        .where(or_(
+            IncidentStat.dimension.in_(FIXED_DIMENSIONS),
+            (IncidentStat.dimension == 'day') & (IncidentStat.key >= first_day),
+            (IncidentStat.dimension == 'hour') & (IncidentStat.key >= first_hour),
+        ))
+        .order_by(IncidentStat.dimension, IncidentStat.key)
+    )
+
+
+def stats_payload(session, args):
+    # ValueError — на некорректные days/hours
+    days = _parse_window(args, 'days', DEFAULT_STATS_DAYS, MAX_STATS_DAYS)
+    hours = _parse_window(args, 'hours', DEFAULT_STATS_HOURS, MAX_STATS_HOURS)
+
+    rows = defaultdict(list)
+    for row in session.execute(stats_statement(days, hours)).scalars():
+        rows[row.dimension].append(row)
+
+    assignee_ids = [_id(row.key) for row in rows['assignee'] if row.key]
+    names = {
+        id_: f"{first_name} {last_name}"
+        for id_, first_name, last_name in session.execute(
+            select(Employee.id, Employee.first_name, Employee.last_name).where(Employee.id.in_(assignee_ids))
+        )
+    } if assignee_ids else {}
+
+    # Инциденты удалённого сотрудника (assigned_employee_id обнулён при
+    # удалении) учитываются как неназначенные
+    by_assignee = {}
+    for row in rows['assignee']:
+        id_ = _id(row.key) if _id(row.key) in names else None
+        entry = by_assignee.setdefault(id_, {'id': id_, 'name': names.get(id_), 'count': 0,
+                                             'resolved': 0, 'resolve_seconds': 0})
+        entry['count'] += row.incident_count
+        entry['resolved'] += row.resolved_count
+        entry['resolve_seconds'] += row.resolve_seconds
+    for entry in by_assignee.values():
+        seconds = entry.pop('resolve_seconds')
+        entry['mean_resolve_seconds'] = round(seconds / entry['resolved']) if entry['resolved'] else None
+
+    total = rows['total'][0] if rows['total'] else None
+    return {
+        'total': _entry(total) if total else {'count': 0, 'resolved': 0, 'mean_resolve_seconds': None},
+        'by_status': [
+            dict(_entry(row), id=_id(row.key), name=reference_data.status_name(_id(row.key)))
+            for row in rows['status']
+        ],
+        'by_type': [dict(_entry(row), incident_type=row.key) for row in rows['type']],
+        'by_location': [
+            dict(_entry(row), id=_id(row.key),
+                 location_name=(reference_data.location(_id(row.key)) or {}).get('location_name'))
+            for row in rows['location']
+        ],
+        'by_assignee': list(by_assignee.values()),
+        'by_day': [dict(_entry(row), day=row.key) for row in rows['day']],
+        'by_hour': [dict(_entry(row), hour=row.key) for row in rows['hour']],
+    }
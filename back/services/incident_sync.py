@@ -0,0 +1,160 @@
+# services/incident_sync.py
+# Дельта-синхронизация инцидентов для мобильных клиентов.
+#
+# Клиент хранит непрозрачный sync_token и передаёт его в ?since=. В ответ
+# приходят инциденты, изменённые после токена (по updated_at), id удалённых
+# и перенесённых в архив (журнал incident_tombstones) и новый токен. Оба источника читаются
+# диапазоном по составным индексам (updated_at, id) и (deleted_at, id),
+# поэтому стоимость запроса зависит от размера дельты, а не таблицы.
+#
+# События двух источников сливаются в одну ленту по времени и режутся на
+# страницы (has_more). Применять ответ нужно в порядке: сначала deleted,
+# затем incidents.
+#
+# updated_at проставляется до коммита, и транзакция, начатая раньше, может
+# закоммититься позже отданного токена. Поэтому последний токен дельты
+# отступает на SYNC_SETTLE_S назад: такие строки придут при следующей
+# синхронизации (изменения последних секунд могут прийти повторно).
+import base64
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, tuple_
+
+from models import Incident, IncidentTombstone
+from services import incident_changes
+from services.incident_queries import _parse_int
+from services.serializers import SYNC_INCIDENT, incident_rows, incidents_payload
+
+DEFAULT_SYNC_LIMIT = 200
+MAX_SYNC_LIMIT = 1000
+
+SYNC_SETTLE_S = 5
+# Сколько хранится журнал удалений; более старый токен требует полной синхронизации
+TOMBSTONE_RETENTION_DAYS = 30
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class SyncTokenExpired(ValueError):
+    pass
+
+
+def encode_token(incidents_key, tombstones_key):
+    payload = json.dumps({
+        'u': incidents_key[0].isoformat(), 'i': incidents_key[1],
+        'd': tombstones_key[0].isoformat(), 't': tombstones_key[1],
+    })
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (
+            (datetime.fromisoformat(payload['u']), int(payload['i'])),
+            (datetime.fromisoformat(payload['d']), int(payload['t'])),
+        )
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Некорректный sync_token")
+
+
+def _settled(key, now):
+    # Не дальше now - SYNC_SETTLE_S: (t, 0) включает все строки с моментом t
+    bound = now - timedelta(seconds=SYNC_SETTLE_S)
+    return key if key[0] < bound else (bound, 0)
+
+
+def sync_payload(session, since=None, user_id=None, limit=DEFAULT_SYNC_LIMIT):
+    # user_id — только инциденты сотрудника (и снятые с него); None — все
+    now = datetime.utcnow()
+    if since:
+        incidents_key, tombstones_key = decode_token(since)
+        if tombstones_key[0] < now - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+            raise SyncTokenExpired("sync_token устарел, нужна полная синхронизация")
+    else:
+        # Первая синхронизация: все инциденты, удаления — с момента её начала
+        incidents_key = (_EPOCH, 0)
+        tombstones_key = _settled((now, 0), now)
+
+    stmt = (
+        select(Incident)
+        .where(tuple_(Incident.updated_at, Incident.id) > tuple_(*incidents_key))
+        .order_by(Incident.updated_at, Incident.id)
+        .limit(limit + 1)
+    )
+    tombstones = (
+        select(IncidentTombstone.id, IncidentTombstone.incident_id, IncidentTombstone.deleted_at)
+        .where(tuple_(IncidentTombstone.deleted_at, IncidentTombstone.id) > tuple_(*tombstones_key))
+        .order_by(IncidentTombstone.deleted_at, IncidentTombstone.id)
+        .limit(limit + 1)
+    )
+    if user_id is None:
+        # снятие с сотрудника администратору не важно: инцидент остаётся в выдаче
+        tombstones = tombstones.where(IncidentTombstone.reason.in_(('deleted', 'archived')))
+    else:
+        stmt = stmt.where(Incident.assigned_employee_id == user_id)
+        tombstones = tombstones.where(IncidentTombstone.assigned_employee_id == user_id)
+
+    # Общая лента по времени; страница — первые limit событий
+    timeline = sorted(
+        [(row.updated_at, 0, row) for row in incident_rows(session, stmt, SYNC_INCIDENT)]
+        + [(row.deleted_at, 1, row) for row in session.execute(tombstones)],
+        key=lambda item: (item[0], item[1], item[2].id),
+    )
+    has_more = len(timeline) > limit
+    rows, deleted = [], []
+    for moment, kind, row in timeline[:limit]:
+        if kind == 0:
+            rows.append(row)
+            incidents_key = (moment, row.id)
+        else:
+            deleted.append(row.incident_id)
+            tombstones_key = (moment, row.id)
+    if not has_more:
+        incidents_key = _settled(incidents_key, now)
+        tombstones_key = _settled(tombstones_key, now)
+
+    # Инцидент, видимый сейчас, изменён позже любого своего удаления из выдачи
+    visible = {row.id for row in rows}
+    return {
+        'incidents': incidents_payload(session, rows, SYNC_INCIDENT),
+        'deleted': [incident_id for incident_id in dict.fromkeys(deleted) if incident_id not in visible],
+        'sync_token': encode_token(incidents_key, tombstones_key),
+        'has_more': has_more,
+    }
+
+
+def parse_sync_args(args):
+    limit = _parse_int(args.get('limit', DEFAULT_SYNC_LIMIT), 'limit')
+    return {'since': args.get('since') or None, 'limit': max(1, min(limit, MAX_SYNC_LIMIT))}
+
+
+# 🪦 Журнал удалений
+@incident_changes.on_before_commit
+def _record_tombstones(session, changes):
+    now = datetime.utcnow()
+    rows = []
+    for change in changes:
+        before, after = change['before'], change['after']
+        if before is None:
+            continue
+        previous = before['assigned_employee_id']
+        if after is None:
+            reason = 'deleted'
+        elif previous is not None and after['assigned_employee_id'] != previous:
+            reason = 'unassigned'
+        else:
+            continue
+        rows.append({'incident_id': change['incident_id'], 'assigned_employee_id': previous,
+                     'reason': reason, 'deleted_at': now})
+    if rows:
+        session.execute(insert(IncidentTombstone), rows)
+
+
+def prune_tombstones(session, days=TOMBSTONE_RETENTION_DAYS):
+    result = session.execute(
+        delete(IncidentTombstone).where(IncidentTombstone.deleted_at < datetime.utcnow() - timedelta(days=days))
+    )
+    return result.rowcount
@@ -0,0 +1,199 @@
+# services/metrics.py
+# Метрики в текстовом формате Prometheus (GET /metrics).
+#
+# На каждый HTTP-запрос по blueprint/endpoint записываются длительность,
+# число SQL-запросов и время в БД (гистограммы), а также время рендеринга
+# PDF-отчётов. SQL считается событиями движка before/after_cursor_execute в
+# счётчик текущего запроса. Счётчик лежит в ContextVar, поэтому работает и
+# в потоках Flask, и в задачах asyncio ASGI-приложения. Запрос, выполнивший
+# больше METRICS_QUERY_BUDGET SQL-запросов, пишется в лог предупреждением:
+# так видны N+1.
+#
+# Длительность и SQL учитываются до начала ответа. Для потоковых ответов
+# (экспорт, SSE) запросы при отдаче тела в метрики не попадают.
+#
+# Метрики хранятся в памяти процесса: при нескольких воркерах каждый отдаёт
+# свои, суммирует их Prometheus.
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+RENDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# endpoint запроса, не попавшего ни в один маршрут (404)
+UNMATCHED = 'unmatched'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values)
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [счётчики по корзинам (последняя — +Inf), сумма]
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        bounds = [_number(float(bound)) for bound in self.buckets] + ['+Inf']
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', bound)])} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+_REQUEST_LABELS = ('method', 'blueprint', 'endpoint', 'status')
+_ENDPOINT_LABELS = ('blueprint', 'endpoint')
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Время обработки HTTP-запроса до начала ответа.',
+    _REQUEST_LABELS, LATENCY_BUCKETS,
+)
+request_queries = Histogram(
+    'http_request_sql_queries', 'Число SQL-запросов на HTTP-запрос.',
+    _ENDPOINT_LABELS, QUERY_COUNT_BUCKETS,
+)
+request_db_time = Histogram(
+    'http_request_db_seconds', 'Суммарное время SQL-запросов HTTP-запроса.',
+    _ENDPOINT_LABELS, DB_TIME_BUCKETS,
+)
+over_query_budget = Counter(
+    'http_requests_over_query_budget_total', 'HTTP-запросы, превысившие METRICS_QUERY_BUDGET.',
+    _ENDPOINT_LABELS,
+)
+report_render = Histogram(
+    'report_render_seconds', 'Время рендеринга PDF-отчёта в процессе пула.',
+    (), RENDER_BUCKETS,
+)
+
+REGISTRY = (request_duration, request_queries, request_db_time, over_query_budget, report_render)
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# ⏱️ Текущий запрос
+class RequestStats:
+    __slots__ = ('started', 'queries', 'db_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def begin_request():
+    # Токен передаётся в end_request
+    return _current.set(RequestStats())
+
+
+def current_request():
+    return _current.get()
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def observe_request(stats, method, blueprint, endpoint, status, budget=0, logger=None, path=None):
+    elapsed = time.perf_counter() - stats.started
+    endpoint = endpoint or UNMATCHED
+    blueprint = blueprint or ''
+    request_duration.observe(elapsed, method, blueprint, endpoint, str(status))
+    request_queries.observe(stats.queries, blueprint, endpoint)
+    request_db_time.observe(stats.db_seconds, blueprint, endpoint)
+    if budget and stats.queries > budget:
+        over_query_budget.inc(blueprint, endpoint)
+        if logger is not None:
+            logger.warning(
+                f"🐢 {method} {path or endpoint}: {stats.queries} SQL-запросов (бюджет {budget}), "
+                f"{stats.db_seconds * 1000:.1f} мс в БД, всего {elapsed * 1000:.1f} мс"
+            )
+
+
+def observe_report_render(seconds):
+    report_render.observe(seconds)
+
+
+# 🗄️ Учёт SQL (синхронный движок; для асинхронного — engine.sync_engine)
+def install_sql_metrics(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _current.get() is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        started = getattr(context, '_metrics_started', None)
+        if stats is None or started is None:
+            return
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
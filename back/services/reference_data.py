@@ -0,0 +1,115 @@
+# services/reference_data.py
+# Кеш справочников (статусы инцидентов и локации) в памяти процесса.
+#
+# Справочники почти не меняются, поэтому читаются из БД один раз (при старте
+# или при первом обращении) и перечитываются не чаще, чем раз в
+# REFERENCE_DATA_TTL секунд. Маршруты получают отсюда соответствие
+# id <-> имя статуса и сравнивают status_id вместо join по IncidentStatus.name.
+# Для каждого справочника считается версия (ETag) по его содержимому.
+import hashlib
+import json
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select
+
+from extensions import db
+from models import IncidentStatus, Location
+
+COMPLETED_STATUS = 'завершён'
+# Статусы, в которых инцидент нельзя переназначить
+CLOSED_STATUSES = ('завершён', 'закрыт')
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def _version(items):
+    payload = json.dumps(items, ensure_ascii=False, sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()
+
+
+def load(session=None):
+    global _snapshot
+    session = session or db.session
+    statuses = [
+        {'id': s.id, 'name': s.name, 'description': s.description}
+        for s in session.execute(select(IncidentStatus).order_by(IncidentStatus.id)).scalars()
+    ]
+    locations = [
+        {'id': l.id, 'location_name': l.location_name, 'location_type': l.location_type}
+        for l in session.execute(select(Location).order_by(Location.id)).scalars()
+    ]
+    status_ids = {s['name'].lower(): s['id'] for s in statuses}
+    snapshot = {
+        'statuses': statuses,
+        'locations': locations,
+        'status_ids': status_ids,
+        'status_names': {s['id']: s['name'] for s in statuses},
+        'statuses_by_id': {s['id']: s for s in statuses},
+        'locations_by_id': {l['id']: l for l in locations},
+        'closed_status_ids': frozenset(status_ids[n] for n in CLOSED_STATUSES if n in status_ids),
+        'etags': {'statuses': _version(statuses), 'locations': _version(locations)},
+        'expires_at': time.monotonic() + current_app.config.get('REFERENCE_DATA_TTL', 300),
+    }
+    with _lock:
+        _snapshot = snapshot
+    return snapshot
+
+
+def invalidate():
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def is_stale():
+    snapshot = _snapshot
+    return snapshot is None or snapshot['expires_at'] < time.monotonic()
+
+
+def _current():
+    if is_stale():
+        return load()
+    return _snapshot
+
+
+def statuses():
+    return _current()['statuses']
+
+
+def locations():
+    return _current()['locations']
+
+
+def etag(kind):
+    return _current()['etags'][kind]
+
+
+def status_id(name):
+    return _current()['status_ids'].get(name.lower())
+
+
+def status_name(id_):
+    return _current()['status_names'].get(id_)
+
+
+def status(id_):
+    return _current()['statuses_by_id'].get(id_)
+
+
+def location(id_):
+    return _current()['locations_by_id'].get(id_)
+
+
+def completed_status_id():
+    return status_id(COMPLETED_STATUS)
+
+
+def closed_status_ids():
+    return _current()['closed_status_ids']
+
+
+def is_completed(status_id_):
+    return status_id_ is not None and status_id_ == completed_status_id()
@@ -0,0 +1,184 @@
+# services/report_archive.py
+# ZIP-архив PDF-отчётов по набору завершённых инцидентов.
+#
+# Отсутствующие или устаревшие отчёты перегенерируются параллельно в пуле
+# процессов services.reports. Отчёт устарел, если хеш содержимого, собранного
+# из текущей строки инцидента, не совпадает с хешем последней готовой задачи
+# в report_jobs (для отчётов, созданных до report_jobs, — если файл старше
+# updated_at инцидента). Архив
+# собирается на лету: каждый готовый PDF сразу дописывается в поток ответа,
+# целиком архив в памяти не хранится. Имя файла из ссылки проверяется
+# (services/report_files.py): инцидент с посторонней ссылкой в архив не попадает.
+import os
+import zipfile
+from concurrent.futures import as_completed
+from datetime import datetime
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Location, Employee, ReportJob
+from services import reports, reference_data, report_files
+from services.incident_archive import across_archive
+from services.incident_queries import apply_filters
+
+# Не более стольких инцидентов в одном архиве
+ARCHIVE_MAX_INCIDENTS = 2000
+
+
+class _ZipStream:
+    # Минимальный файловый объект без seek: zipfile пишет сюда, генератор забирает
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _archive_select(model, ids, args):
+    stmt = (
+        select(
+            model.id.label('id'),
+            model.title,
+            model.incident_type,
+            model.description,
+            model.conclusion,
+            model.updated_at,
+            model.completed_at,
+            Location.location_name,
+            Employee.first_name,
+            Employee.last_name,
+        )
+        .outerjoin(Location, Location.id == model.location_id)
+        .outerjoin(Employee, Employee.id == model.assigned_employee_id)
+        .where(model.status_id == reference_data.completed_status_id())
+    )
+    if ids is not None:
+        stmt = stmt.where(model.id.in_(ids))
+    return apply_filters(stmt, args, model)
+
+
+def archive_statement(ids=None, args=None):
+    # Завершённые инциденты, в том числе перенесённые в архив
+    # (services/incident_archive.py); ValueError — на некорректные фильтры
+    stmt = across_archive(lambda model: _archive_select(model, ids, args or {}))
+    return stmt.order_by(stmt.selected_columns.id).limit(ARCHIVE_MAX_INCIDENTS)
+
+
+def _latest_jobs(incident_ids):
+    # Последняя готовая задача по каждому инциденту: ссылка, payload и хеш
+    stmt = (
+        select(ReportJob)
+        .where(ReportJob.incident_id.in_(incident_ids), ReportJob.status == reports.JOB_DONE)
+        .order_by(ReportJob.incident_id, ReportJob.created_at)
+    )
+    return {job.incident_id: job for job in db.session.execute(stmt).scalars()} if incident_ids else {}
+
+
+def _report_file(row, job, target_dir):
+    # Ссылка из задачи: у архивного инцидента conclusion не обновляется.
+    # None — имя из ссылки не является отчётом этого инцидента
+    url = job.pdf_url if job is not None and job.pdf_url else row.conclusion
+    if url and url.startswith(reports.REPORTS_URL + '/'):
+        filename = url[len(reports.REPORTS_URL) + 1:]
+    else:
+        filename = f"incident-{row.id}.pdf"
+    if not report_files.is_report_name(filename, row.id):
+        return None
+    return filename, os.path.join(target_dir, filename)
+
+
+def _is_stale(path, row, job, payload):
+    if not os.path.exists(path):
+        return True
+    if job is not None:
+        return reports.content_digest(payload) != job.content_digest
+    if row.updated_at is None:
+        return False
+    return datetime.utcfromtimestamp(os.path.getmtime(path)) < row.updated_at
+
+
+def _payload(row, job):
+    # Кто и когда завершил — из задачи, без неё — completed_at инцидента
+    payload = {
+        'id': row.id,
+        'title': row.title,
+        'incident_type': row.incident_type,
+        'description': row.description,
+        'location_name': row.location_name or '-',
+        'resolved_by': f"{row.first_name} {row.last_name}" if row.first_name else '-',
+        'resolved_at': (row.completed_at or row.updated_at or datetime.utcnow()).strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    if job is not None:
+        payload['resolved_by'] = job.payload.get('resolved_by', payload['resolved_by'])
+        payload['resolved_at'] = job.payload.get('resolved_at', payload['resolved_at'])
+    return payload
+
+
+def plan_archive(app, stmt):
+    # Делит отчёты на готовые и требующие генерации: [(имя в архиве, путь)], [payload]
+    target_dir = reports.reports_dir(app)
+    rows = db.session.execute(stmt).all()
+    jobs = _latest_jobs([row.id for row in rows])
+    ready, missing = [], []
+    for row in rows:
+        job = jobs.get(row.id)
+        report_file = _report_file(row, job, target_dir)
+        if report_file is None:
+            app.logger.warning(f"⚠️ Инцидент #{row.id} пропущен: ссылка на отчёт не похожа на отчёт инцидента")
+            continue
+        filename, path = report_file
+        payload = _payload(row, job)
+        if _is_stale(path, row, job, payload):
+            missing.append(payload)
+        else:
+            ready.append((filename, path))
+    return ready, missing
+
+
+def stream_archive(app, ready, missing):
+    target_dir = reports.reports_dir(app)
+    executor = reports.get_executor(app.config)
+    futures = {
+        executor.submit(reports.render_incident_report, payload, target_dir, reports.font_path(app)): payload
+        for payload in missing
+    }
+
+    out = _ZipStream()
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for filename, path in ready:
+            archive.write(path, filename)
+            yield out.drain()
+
+        regenerated = []
+        for future in as_completed(futures):
+            payload = futures[future]
+            try:
+                filename = reports.observe_render(future.result())
+            except Exception as e:
+                app.logger.exception(f"💥 Не удалось сгенерировать отчёт для инцидента #{payload['id']}: {e}")
+                continue
+            archive.write(os.path.join(target_dir, filename), filename)
+            regenerated.append((payload, f"{reports.REPORTS_URL}/{filename}"))
+            yield out.drain()
+
+    yield out.drain()
+
+    # Перегенерированные отчёты записываются готовыми задачами: по их хешу
+    # следующий архив увидит, что отчёт актуален
+    for payload, pdf_url in regenerated:
+        reports.new_job(db.session, payload, status=reports.JOB_DONE, pdf_url=pdf_url)
+        reports.set_conclusion(db.session, payload['id'], pdf_url)
+    if regenerated:
+        db.session.commit()
+        for payload, pdf_url in regenerated:
+            reports.remove_previous_reports(target_dir, payload['id'], pdf_url.rpartition('/')[2])
@@ -0,0 +1,82 @@
+# services/report_files.py
+# Отдача PDF-отчётов (/static/reports/<имя>).
+#
+# Имя incident-<id>-<хеш>.pdf (services.reports) адресует содержимое, поэтому
+# ETag берётся из имени, а ответ кешируется навсегда (immutable). Старые
+# отчёты incident-<id>.pdf могут меняться на месте: ETag считается по
+# содержимому, кеш — только с перепроверкой.
+#
+# REPORTS_SENDFILE позволяет отдать сам файл веб-серверу:
+#   'x-accel-redirect' — nginx, internal location REPORTS_ACCEL_PREFIX;
+#   'x-sendfile'       — Apache mod_xsendfile / lighttpd.
+# Диапазоны (Range) и условные запросы в этих режимах обрабатывает веб-сервер.
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+from services import reports
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+SENDFILE_MODES = ('x-accel-redirect', 'x-sendfile')
+
+_REPORT_NAME = re.compile(r'^incident-(?P<id>\d+)(?:-(?P<digest>[0-9a-f]{16}))?\.pdf$')
+
+# Сколько ETag отчётов со старыми именами держать в памяти процесса
+LEGACY_ETAG_CACHE_SIZE = 1024
+
+
+def is_report_name(filename, incident_id=None):
+    # Только имя файла отчёта, без каталогов; с incident_id — отчёт этого инцидента
+    match = _REPORT_NAME.fullmatch(filename)
+    return match is not None and (incident_id is None or int(match.group('id')) == incident_id)
+
+
+def report_path(app, filename):
+    # None — имя не похоже на отчёт (в том числе попытки выйти из каталога)
+    if not is_report_name(filename):
+        return None
+    path = os.path.join(reports.reports_dir(app), filename)
+    return path if os.path.isfile(path) else None
+
+
+# Ключ — (путь, mtime_ns, размер): изменённый на месте файл получает новую
+# запись, старая вытесняется по LRU
+@lru_cache(maxsize=LEGACY_ETAG_CACHE_SIZE)
+def _content_etag(path, mtime_ns, size):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def _legacy_etag(path):
+    stat = os.stat(path)
+    return _content_etag(path, stat.st_mtime_ns, stat.st_size)
+
+
+def report_headers(filename, path):
+    digest = _REPORT_NAME.match(filename).group('digest')
+    return {
+        'ETag': f'"{digest or _legacy_etag(path)}"',
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if digest else REVALIDATE_CACHE_CONTROL,
+        'Accept-Ranges': 'bytes',
+    }
+
+
+def not_modified(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(',')}
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+def sendfile_headers(app, filename, path):
+    # Заголовки для отдачи файла веб-сервером или None, если режим выключен
+    mode = app.config.get('REPORTS_SENDFILE')
+    if mode == 'x-accel-redirect':
+        prefix = app.config.get('REPORTS_ACCEL_PREFIX', '/protected/reports').rstrip('/')
+        return {'X-Accel-Redirect': f"{prefix}/{filename}"}
+    if mode == 'x-sendfile':
+        return {'X-Sendfile': os.path.abspath(path)}
+    return None
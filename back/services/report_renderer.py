@@ -0,0 +1,185 @@
+# services/report_renderer.py
+# Рендеринг PDF-отчёта об инциденте.
+#
+# Что здесь ускорено по сравнению с прямым вызовом FPDF:
+#   * метрики шрифта загружаются один раз на процесс, а не add_font() на каждый отчёт;
+#   * разбор таблиц cmap/hmtx/loca и готовые подмножества шрифта кешируются;
+#   * контрольные суммы TTF считаются через struct, а не побайтово;
+#   * из встраиваемого подмножества выбрасывается таблица name (~15 КБ),
+#     она не нужна для FontFile2 в PDF.
+# Сам шрифт, как и раньше, встраивается только с использованными глифами.
+#
+# Переопределяются внутренние методы fpdf 1.7.2 (makeSubset, endTTFile,
+# _putTTfontwidths, _putfonts), поэтому версия закреплена в requirements.txt
+# и проверяется при импорте. Кеширующий класс шрифта получает только
+# ReportPDF — модуль fpdf не меняется.
+import functools
+import os
+import types
+from collections import OrderedDict
+from struct import pack, unpack
+
+import fpdf
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile, sub32
+
+FPDF_VERSION = '1.7.2'
+
+if fpdf.FPDF_VERSION != FPDF_VERSION:
+    raise RuntimeError(f"report_renderer рассчитан на fpdf=={FPDF_VERSION}, установлена {fpdf.FPDF_VERSION}")
+
+FONT_FAMILY = 'DejaVu'
+
+# Таблицы TTF, которые не встраиваются в PDF
+DROPPED_TABLES = ('name',)
+
+SUBSET_CACHE_SIZE = 256
+
+# Шаблон отчёта: заголовок + строки (подпись, ключ payload)
+REPORT_TITLE = "Incident Resolution Report"
+REPORT_FIELDS = (
+    ("Incident ID", 'id'),
+    ("Title", 'title'),
+    ("Type", 'incident_type'),
+    ("Description", 'description'),
+    ("Location", 'location_name'),
+    ("Resolved by", 'resolved_by'),
+    ("Resolved at", 'resolved_at'),
+)
+
+
+def _checksum(data):
+    data += b'\0' * (-len(data) % 4)
+    total = sum(unpack('>%dL' % (len(data) // 4), data)) & 0xFFFFFFFF
+    return (total >> 16, total & 0xFFFF)
+
+
+class CachedTTFontFile(TTFontFile):
+    _table_cache = {}
+    _subset_cache = OrderedDict()
+
+    def _cached_cmap(self, parse, offset, glyphToChar, charToGlyph):
+        key = (self.filename, parse.__name__, offset)
+        if key not in self._table_cache:
+            g2c, c2g = {}, {}
+            parse(self, offset, g2c, c2g)
+            self._table_cache[key] = (g2c, c2g, self.maxUniChar)
+        g2c, c2g, self.maxUniChar = self._table_cache[key]
+        glyphToChar.update(g2c)
+        charToGlyph.update(c2g)
+
+    def getCMAP4(self, unicode_cmap_offset, glyphToChar, charToGlyph):
+        self._cached_cmap(TTFontFile.getCMAP4, unicode_cmap_offset, glyphToChar, charToGlyph)
+
+    def getCMAP12(self, unicode_cmap_offset, glyphToChar, charToGlyph):
+        self._cached_cmap(TTFontFile.getCMAP12, unicode_cmap_offset, glyphToChar, charToGlyph)
+
+    # Ширины и смещения глифов не зависят от подмножества — разбираем один раз на файл
+    def getHMTX(self, numberOfHMetrics, numGlyphs, glyphToChar, scale):
+        key = (self.filename, 'hmtx')
+        if key not in self._table_cache:
+            TTFontFile.getHMTX(self, numberOfHMetrics, numGlyphs, glyphToChar, scale)
+            self._table_cache[key] = (self.charWidths, getattr(self, 'defaultWidth', 0))
+        self.charWidths, self.defaultWidth = self._table_cache[key]
+
+    def getLOCA(self, indexToLocFormat, numGlyphs):
+        key = (self.filename, 'loca')
+        if key not in self._table_cache:
+            TTFontFile.getLOCA(self, indexToLocFormat, numGlyphs)
+            self._table_cache[key] = self.glyphPos
+        self.glyphPos = self._table_cache[key]
+
+    def makeSubset(self, file, subset):
+        key = (file, tuple(subset))
+        cached = self._subset_cache.get(key)
+        if cached is None:
+            stream = TTFontFile.makeSubset(self, file, subset)
+            cached = (stream, self.codeToGlyph, self.maxUni)
+            self._subset_cache[key] = cached
+            if len(self._subset_cache) > SUBSET_CACHE_SIZE:
+                self._subset_cache.popitem(last=False)
+        else:
+            self._subset_cache.move_to_end(key)
+        stream, self.codeToGlyph, self.maxUni = cached
+        return stream
+
+    # Та же сборка файла, что в TTFontFile.endTTFile, но без DROPPED_TABLES
+    # и с быстрым подсчётом контрольных сумм
+    def endTTFile(self, stm):
+        tables = sorted((tag, data) for tag, data in self.otables.items() if tag not in DROPPED_TABLES)
+        numTables = len(tables)
+        searchRange = 1
+        entrySelector = 0
+        while searchRange * 2 <= numTables:
+            searchRange = searchRange * 2
+            entrySelector = entrySelector + 1
+        searchRange = searchRange * 16
+        rangeShift = numTables * 16 - searchRange
+
+        parts = [pack(">LHHHH", 0x00010000, numTables, searchRange, entrySelector, rangeShift)]
+        offset = 12 + numTables * 16
+        head_start = 0
+        for tag, data in tables:
+            if tag == 'head':
+                head_start = offset
+            hi, lo = _checksum(data)
+            parts.append(tag.encode('latin1') + pack(">HHLL", hi, lo, offset, len(data)))
+            offset += (len(data) + 3) & ~3
+        for tag, data in tables:
+            parts.append(data + b'\0' * (-len(data) % 4))
+
+        stm = b''.join(parts)
+        checksum = sub32((0xB1B0, 0xAFBA), _checksum(stm))
+        return self.splice(stm, head_start + 8, pack(">HH", checksum[0], checksum[1]))
+
+
+# FPDF создаёт TTFontFile внутри _putfonts по имени из глобалей модуля fpdf.
+# Копия метода с собственными глобалями видит CachedTTFontFile, сам модуль
+# и другие FPDF процесса остаются с исходным классом
+def _with_font_class(method, font_class):
+    namespace = dict(method.__globals__, TTFontFile=font_class)
+    return types.FunctionType(method.__code__, namespace, method.__name__, method.__defaults__, method.__closure__)
+
+
+@functools.lru_cache(maxsize=None)
+def _font_entry(ttf_path):
+    # add_font читает метрики из .pkl рядом с .ttf (или разбирает сам .ttf)
+    pdf = FPDF()
+    pdf.add_font(FONT_FAMILY, '', ttf_path, uni=True)
+    fontkey = FONT_FAMILY.lower()
+    font = dict(pdf.fonts[fontkey])
+    # в закешированных метриках может лежать путь с другой машины
+    font['ttffile'] = ttf_path
+    return fontkey, font, dict(pdf.font_files[fontkey])
+
+
+class ReportPDF(FPDF):
+    def __init__(self, ttf_path):
+        FPDF.__init__(self)
+        fontkey, font, font_file = _font_entry(ttf_path)
+        self.fonts[fontkey] = dict(font, i=len(self.fonts) + 1, subset=list(font['subset']))
+        self.font_files[fontkey] = dict(font_file)
+        self.font_files[ttf_path] = {'type': 'TTF'}
+
+    _putfonts = _with_font_class(FPDF._putfonts, CachedTTFontFile)
+
+    # FPDF проверяет принадлежность подмножеству поиском по списку для каждого кода
+    def _putTTfontwidths(self, font, maxUni):
+        FPDF._putTTfontwidths(self, dict(font, subset=frozenset(font['subset'])), maxUni)
+
+    def header(self):
+        self.set_font(FONT_FAMILY, '', 14)
+        self.cell(200, 10, txt=REPORT_TITLE, ln=True, align="C")
+        self.ln(10)
+        self.set_font(FONT_FAMILY, '', 12)
+
+
+def render_report(payload, path, ttf_path):
+    pdf = ReportPDF(ttf_path)
+    pdf.add_page()
+    for label, key in REPORT_FIELDS:
+        value = payload.get(key)
+        if key == 'resolved_at':
+            value = f"{value} UTC"
+        pdf.cell(200, 10, txt=f"{label}: {value if value not in (None, '') else '-'}", ln=True)
+    pdf.output(path)
@@ -0,0 +1,394 @@
+# services/reports.py
+# Фоновая генерация PDF-отчётов по завершённым инцидентам.
+#
+# Рендеринг выполняется в пуле процессов, чтобы не занимать веб-воркер.
+# Задача записывается в таблицу report_jobs в той же транзакции, что и
+# завершение инцидента, поэтому её статус виден любому воркеру, а задача не
+# теряется, если отправить её в пул не удалось (пул сломан, воркер
+# перезапущен): потерянные pending- и упавшие задачи перезапускает команда
+# flask sweep-reports (cron, systemd-таймер).
+#
+# Итоги рендеринга разбирает отдельный поток приложения (report-results):
+# колбэк future выполняется в служебном потоке ProcessPoolExecutor и только
+# кладёт результат в очередь. Пока задача стоит в пуле, этот поток отмечает
+# её heartbeat_at — по отметке sweep-reports отличает потерянную задачу от
+# ждущей своей очереди.
+#
+# Файл отчёта адресуется содержимым: incident-<id>-<sha256[:16]>.pdf. PDF
+# пишется во временный файл и переносится на место атомарно (os.replace),
+# поэтому по ссылке из conclusion никогда не отдаётся недописанный или
+# перезаписанный файл, и её можно кешировать навсегда.
+import glob
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, or_, select, update
+
+from extensions import db
+from models import Incident, ReportJob
+from services import incident_changes, metrics
+
+REPORTS_URL = '/static/reports'
+
+JOB_PENDING = 'pending'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Процесс, отправивший задачу в пул, отмечает её heartbeat_at каждые
+# JOB_HEARTBEAT_INTERVAL секунд; pending-задача без отметки дольше
+# JOB_STALE_AFTER считается потерянной. Упавшая перезапускается, пока
+# попыток меньше JOB_MAX_ATTEMPTS
+JOB_HEARTBEAT_INTERVAL = 30
+JOB_STALE_AFTER = timedelta(minutes=2)
+JOB_MAX_ATTEMPTS = 3
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def reports_dir(app):
+    return os.path.join(app.root_path, 'static', 'reports')
+
+
+def font_path(app):
+    return os.path.join(app.root_path, 'static', 'fonts', 'DejaVuSans.ttf')
+
+
+def report_payload(incident, user, resolved_at):
+    return {
+        'id': incident.id,
+        'title': incident.title,
+        'incident_type': incident.incident_type,
+        'description': incident.description,
+        'location_name': incident.location.location_name if incident.location else '-',
+        'resolved_by': f"{user.first_name} {user.last_name}",
+        'resolved_at': resolved_at.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def content_digest(payload):
+    # Хеш содержимого отчёта: по нему видно, устарел ли готовый PDF
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def report_filename(incident_id, digest):
+    return f"incident-{incident_id}-{digest[:16]}.pdf"
+
+
+# 🧾 Выполняется в процессе пула: payload — обычный dict, без ORM-объектов.
+# Возвращает (имя файла, время рендеринга в секундах) — время записывается
+# в метрики уже в процессе приложения (observe_render)
+def render_incident_report(payload, target_dir, ttf_path):
+    from services.report_renderer import render_report
+
+    os.makedirs(target_dir, exist_ok=True)
+    tmp_path = os.path.join(target_dir, f".incident-{payload['id']}-{uuid.uuid4().hex}.tmp")
+    try:
+        started = time.perf_counter()
+        render_report(payload, tmp_path, ttf_path)
+        elapsed = time.perf_counter() - started
+        filename = report_filename(payload['id'], _file_digest(tmp_path))
+        os.replace(tmp_path, os.path.join(target_dir, filename))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return filename, elapsed
+
+
+def observe_render(result):
+    filename, elapsed = result
+    metrics.observe_report_render(elapsed)
+    return filename
+
+
+def remove_previous_reports(target_dir, incident_id, keep):
+    # Прежние версии отчёта инцидента после записи новой ссылки в conclusion
+    for path in glob.glob(os.path.join(target_dir, f"incident-{incident_id}-*.pdf")):
+        if os.path.basename(path) != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def get_executor(config):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=config.get('REPORT_WORKERS') or None)
+        return _executor
+
+
+def _discard_broken_executor():
+    # Упавший процесс пула ломает весь пул: следующая задача создаст новый
+    global _executor
+    with _executor_lock:
+        if _executor is not None and getattr(_executor, '_broken', False):
+            _executor = None
+
+
+# 🗂 Задачи (report_jobs)
+def new_job(session, payload, status=JOB_PENDING, pdf_url=None):
+    # Добавляет задачу в сессию; коммит — вместе с завершением инцидента
+    job_id = f"{payload['id']}-{uuid.uuid4().hex}"
+    now = datetime.utcnow()
+    session.add(ReportJob(
+        id=job_id,
+        incident_id=payload['id'],
+        status=status,
+        payload=payload,
+        content_digest=content_digest(payload),
+        pdf_url=pdf_url,
+        attempts=1,
+        created_at=now,
+        updated_at=now,
+        heartbeat_at=now,
+    ))
+    return job_id
+
+
+def set_conclusion(session, incident_id, pdf_url):
+    # Ссылка пишется через ORM и track(): updated_at сдвигается, поэтому
+    # клиенты /sync и /events узнают об отчёте. Архивный инцидент не меняется
+    incident = session.get(Incident, incident_id)
+    if incident is None:
+        return
+    before = incident_changes.snapshot(incident)
+    incident.conclusion = pdf_url
+    incident_changes.track('updated', incident_id, before, incident_changes.snapshot(incident), session=session)
+
+
+def job_update(job_id, **values):
+    return update(ReportJob).where(ReportJob.id == job_id).values(updated_at=datetime.utcnow(), **values)
+
+
+def heartbeat_statement(job_ids, now):
+    # Отметка задач, которые процесс ещё держит в пуле; updated_at не меняется
+    return (
+        update(ReportJob)
+        .where(ReportJob.id.in_(job_ids), ReportJob.status == JOB_PENDING)
+        .values(heartbeat_at=now)
+    )
+
+
+def finish_job(session, job_id, incident_id, pdf_url=None, error=None):
+    # Итог рендеринга: ссылка в conclusion и статус задачи — одной транзакцией
+    if error is not None:
+        session.execute(job_update(job_id, status=JOB_FAILED, error=error))
+        return
+    set_conclusion(session, incident_id, pdf_url)
+    session.execute(job_update(job_id, status=JOB_DONE, pdf_url=pdf_url, error=None))
+
+
+def job_payload(job):
+    return {
+        'job_id': job.id,
+        'incident_id': job.incident_id,
+        'status': job.status,
+        'pdf_url': job.pdf_url,
+        'error': job.error,
+    }
+
+
+def get_job(session, job_id):
+    job = session.get(ReportJob, job_id)
+    return job_payload(job) if job is not None else None
+
+
+# 🧵 Поток итогов рендеринга: один на приложение
+class ResultWorker:
+    def __init__(self, app):
+        self.app = app
+        self.results = queue.Queue()
+        self.inflight = set()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name='report-results', daemon=True)
+        self.thread.start()
+
+    def add(self, job_id):
+        with self.lock:
+            self.inflight.add(job_id)
+
+    def put(self, job_id, incident_id, future):
+        # Вызывается в служебном потоке пула — только очередь, без работы с БД
+        self.results.put((job_id, incident_id, future))
+
+    def run(self):
+        next_beat = time.monotonic() + JOB_HEARTBEAT_INTERVAL
+        while True:
+            try:
+                job_id, incident_id, future = self.results.get(timeout=max(0, next_beat - time.monotonic()))
+            except queue.Empty:
+                pass
+            else:
+                with self.lock:
+                    self.inflight.discard(job_id)
+                _finish_job(self.app, job_id, incident_id, future)
+            if time.monotonic() >= next_beat:
+                self.heartbeat()
+                next_beat = time.monotonic() + JOB_HEARTBEAT_INTERVAL
+
+    def heartbeat(self):
+        with self.lock:
+            job_ids = list(self.inflight)
+        if not job_ids:
+            return
+        with self.app.app_context():
+            try:
+                db.session.execute(heartbeat_statement(job_ids, datetime.utcnow()))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception("💥 Не удалось отметить задачи отчётов в пуле")
+            finally:
+                db.session.remove()
+
+
+_workers_lock = threading.Lock()
+
+
+def result_worker(app):
+    with _workers_lock:
+        worker = app.extensions.get('report_results')
+        if worker is None:
+            worker = app.extensions['report_results'] = ResultWorker(app)
+        return worker
+
+
+# 🧾 Отправка в пул
+def submit_report(app, job_id, payload):
+    # Ошибка отправки не отменяет завершение инцидента: задача остаётся
+    # pending в report_jobs, её перезапустит flask sweep-reports
+    try:
+        future = get_executor(app.config).submit(
+            render_incident_report, payload, reports_dir(app), font_path(app),
+        )
+    except Exception as e:
+        if isinstance(e, BrokenExecutor):
+            _discard_broken_executor()
+        app.logger.exception(f"💥 Не удалось поставить отчёт #{payload['id']} в очередь: {e}")
+        return False
+    worker = result_worker(app)
+    worker.add(job_id)
+    future.add_done_callback(lambda f: worker.put(job_id, payload['id'], f))
+    return True
+
+
+def rendered_url(future):
+    filename = observe_render(future.result())
+    return f"{REPORTS_URL}/{filename}"
+
+
+# Вызывается в потоке report-results после завершения рендеринга
+def _finish_job(app, job_id, incident_id, future):
+    with app.app_context():
+        try:
+            pdf_url = rendered_url(future)
+            error = None
+        except Exception as e:
+            app.logger.exception(f"💥 Ошибка генерации отчёта для инцидента #{incident_id}: {e}")
+            pdf_url, error = None, str(e)
+        try:
+            finish_job(db.session, job_id, incident_id, pdf_url, error)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception(f"💥 Не удалось сохранить результат задачи {job_id}")
+            return
+        finally:
+            db.session.remove()
+        if pdf_url:
+            remove_previous_reports(reports_dir(app), incident_id, pdf_url.rpartition('/')[2])
+            app.logger.info(f"📎 PDF для инцидента #{incident_id}: {pdf_url}")
+
+
+# 🧹 Перезапуск потерянных и упавших задач (flask sweep-reports)
+def stale_jobs_statement(now):
+    return (
+        select(ReportJob)
+        .where(or_(
+            and_(ReportJob.status == JOB_PENDING, ReportJob.heartbeat_at < now - JOB_STALE_AFTER),
+            and_(ReportJob.status == JOB_FAILED, ReportJob.attempts < JOB_MAX_ATTEMPTS),
+        ))
+        .order_by(ReportJob.created_at)
+    )
+
+
+def _claim(session, job):
+    # Условный UPDATE: параллельный запуск не возьмёт ту же задачу, а задачу,
+    # отмеченную после выборки, не возьмёт никто
+    now = datetime.utcnow()
+    result = session.execute(
+        update(ReportJob)
+        .where(
+            ReportJob.id == job.id,
+            ReportJob.status == job.status,
+            ReportJob.updated_at == job.updated_at,
+            ReportJob.heartbeat_at == job.heartbeat_at,
+        )
+        .values(status=JOB_PENDING, attempts=ReportJob.attempts + 1, updated_at=now, heartbeat_at=now)
+    )
+    return result.rowcount == 1
+
+
+def sweep(session, app, log=print):
+    # Рендерит задачи заново и ждёт результата, отмечая ещё не готовые;
+    # возвращает (готово, с ошибкой)
+    jobs = session.execute(stale_jobs_statement(datetime.utcnow())).scalars().all()
+    claimed = [(job.id, job.incident_id, job.payload) for job in jobs if _claim(session, job)]
+    session.commit()
+
+    executor = get_executor(app.config)
+    pending = {
+        executor.submit(render_incident_report, payload, reports_dir(app), font_path(app)): (job_id, incident_id)
+        for job_id, incident_id, payload in claimed
+    }
+    done = failed = 0
+    next_beat = time.monotonic() + JOB_HEARTBEAT_INTERVAL
+    while pending:
+        finished, _ = wait(pending, timeout=max(0, next_beat - time.monotonic()), return_when=FIRST_COMPLETED)
+        for future in finished:
+            job_id, incident_id = pending.pop(future)
+            try:
+                pdf_url, error = rendered_url(future), None
+            except Exception as e:
+                if isinstance(e, BrokenExecutor):
+                    _discard_broken_executor()
+                pdf_url, error = None, str(e)
+            finish_job(session, job_id, incident_id, pdf_url, error)
+            session.commit()
+            if pdf_url:
+                remove_previous_reports(reports_dir(app), incident_id, pdf_url.rpartition('/')[2])
+                done += 1
+            else:
+                failed += 1
+            log(f"  {job_id}: {pdf_url or error}")
+        if pending and time.monotonic() >= next_beat:
+            session.execute(heartbeat_statement([job_id for job_id, _ in pending.values()], datetime.utcnow()))
+            session.commit()
+            next_beat = time.monotonic() + JOB_HEARTBEAT_INTERVAL
+    return done, failed
+
+
+# Задачи удалённого инцидента больше не нужны
+@incident_changes.on_before_commit
+def _drop_deleted_jobs(session, changes):
+    deleted = [change['incident_id'] for change in changes if change['after'] is None]
+    if deleted:
+        session.execute(delete(ReportJob).where(ReportJob.incident_id.in_(deleted)))
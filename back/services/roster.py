@@ -0,0 +1,161 @@
+# services/roster.py
+# Список сотрудников вместе с их текущим незавершённым инцидентом.
+#
+# Вместо запроса на каждого сотрудника весь список строится одним запросом:
+# оконная функция выбирает по одному (самому свежему) открытому инциденту на
+# сотрудника. При ROSTER_ACTIVE_PROJECTION = True используется заранее
+# поддерживаемая таблица employee_active_incidents, и стоимость запроса не
+# зависит от объёма истории инцидентов.
+#
+# ?fields= / ?expand= (services/fieldsets.py): без is_busy и assigned_incident
+# открытые инциденты не присоединяются вовсе, без их заголовка и статуса —
+# не присоединяется таблица incidents.
+from flask import current_app
+from sqlalchemy import select, func, delete, insert, true
+
+from extensions import db
+from models import Employee, Incident, EmployeeActiveIncident
+from services import incident_changes, reference_data
+from services.fieldsets import parse_fieldset
+
+# name собирается из first_name и last_name; is_busy — только в списке администратора
+ROSTER_FIELDS = ('id', 'name', 'email', 'role', 'is_busy')
+ROSTER_RELATIONS = {'assigned_incident': ('id', 'title', 'status')}
+# поле -> колонки employees
+_ROSTER_COLUMNS = {
+    'id': (Employee.id,),
+    'name': (Employee.first_name, Employee.last_name),
+    'email': (Employee.email,),
+    'role': (Employee.role,),
+}
+
+
+def open_incident_filter():
+    completed_id = reference_data.completed_status_id()
+    if completed_id is None:
+        return true()
+    return Incident.status_id != completed_id
+
+
+def open_incidents_query(employee_id):
+    return Incident.query.filter(
+        Incident.assigned_employee_id == employee_id,
+        open_incident_filter(),
+    )
+
+
+def _ranked_active_incidents(employee_ids=None):
+    rn = func.row_number().over(
+        partition_by=Incident.assigned_employee_id,
+        order_by=(Incident.incident_datetime.desc(), Incident.id.desc()),
+    )
+    stmt = (
+        select(
+            Incident.assigned_employee_id.label('employee_id'),
+            Incident.id.label('incident_id'),
+            rn.label('rn'),
+        )
+        .where(Incident.assigned_employee_id.is_not(None))
+        .where(open_incident_filter())
+    )
+    if employee_ids is not None:
+        stmt = stmt.where(Incident.assigned_employee_id.in_(employee_ids))
+    ranked = stmt.subquery()
+    return select(ranked.c.employee_id, ranked.c.incident_id).where(ranked.c.rn == 1)
+
+
+def parse_roster_fieldset(args, with_busy=True):
+    fields = ROSTER_FIELDS if with_busy else ROSTER_FIELDS[:-1]
+    return parse_fieldset(args, fields, ROSTER_RELATIONS)
+
+
+def roster_statement(fieldset=None):
+    fieldset = fieldset or parse_roster_fieldset({})
+    columns = [Employee.id]
+    for name, employee_columns in _ROSTER_COLUMNS.items():
+        if name != 'id' and fieldset.wants(name):
+            columns.extend(employee_columns)
+    stmt = select(*columns).order_by(Employee.id)
+    if not (fieldset.wants('is_busy') or fieldset.expands('assigned_incident')):
+        return stmt
+
+    if current_app.config.get('ROSTER_ACTIVE_PROJECTION'):
+        active = select(EmployeeActiveIncident.employee_id, EmployeeActiveIncident.incident_id).subquery()
+    else:
+        active = _ranked_active_incidents().subquery()
+    stmt = stmt.add_columns(active.c.incident_id).outerjoin(active, active.c.employee_id == Employee.id)
+
+    # заголовок и статус — из самого инцидента
+    incident_columns = [
+        column for name, column in (
+            ('title', Incident.title.label('incident_title')),
+            ('status', Incident.status_id.label('incident_status_id')),
+        ) if fieldset.wants_sub('assigned_incident', name)
+    ]
+    if incident_columns:
+        stmt = stmt.add_columns(*incident_columns).outerjoin(Incident, Incident.id == active.c.incident_id)
+    return stmt
+
+
+def roster_entry(row, with_busy=True, fieldset=None):
+    fieldset = fieldset or parse_roster_fieldset({}, with_busy)
+    entry = {}
+    if fieldset.wants('id'):
+        entry['id'] = row.id
+    if fieldset.wants('name'):
+        entry['name'] = f"{row.first_name} {row.last_name}"
+    if fieldset.wants('email'):
+        entry['email'] = row.email
+    if fieldset.wants('role'):
+        entry['role'] = row.role
+    if with_busy and fieldset.wants('is_busy'):
+        entry['is_busy'] = row.incident_id is not None
+    if fieldset.expands('assigned_incident'):
+        incident = None
+        if row.incident_id is not None:
+            incident = {}
+            if fieldset.wants_sub('assigned_incident', 'id'):
+                incident['id'] = row.incident_id
+            if fieldset.wants_sub('assigned_incident', 'title'):
+                incident['title'] = row.incident_title
+            if fieldset.wants_sub('assigned_incident', 'status'):
+                incident['status'] = reference_data.status_name(row.incident_status_id)
+        entry['assigned_incident'] = incident
+    return entry
+
+
+def get_roster(with_busy=True, fieldset=None):
+    fieldset = fieldset or parse_roster_fieldset({}, with_busy)
+    rows = db.session.execute(roster_statement(fieldset)).all()
+    return [roster_entry(row, with_busy, fieldset) for row in rows]
+
+
+# 🔁 Поддержка проекции employee_active_incidents
+def refresh_active_incidents(session, employee_ids):
+    if not employee_ids:
+        return
+    employee_ids = list(employee_ids)
+    session.execute(
+        delete(EmployeeActiveIncident).where(EmployeeActiveIncident.employee_id.in_(employee_ids))
+    )
+    session.execute(
+        insert(EmployeeActiveIncident).from_select(
+            ['employee_id', 'incident_id'], _ranked_active_incidents(employee_ids)
+        )
+    )
+
+
+def rebuild_active_incidents(session):
+    session.execute(delete(EmployeeActiveIncident))
+    session.execute(
+        insert(EmployeeActiveIncident).from_select(
+            ['employee_id', 'incident_id'], _ranked_active_incidents()
+        )
+    )
+
+
+@incident_changes.on_before_commit
+def _maintain_active_incidents(session, changes):
+    if not current_app.config.get('ROSTER_ACTIVE_PROJECTION'):
+        return
+    refresh_active_incidents(session, incident_changes.affected_employee_ids(changes))
@@ -0,0 +1,331 @@
+# services/serializers.py
+# Быстрая сериализация инцидентов без marshmallow.
+#
+# Ответ собирается из колоночных выборок: страница инцидентов, затем по
+# одному запросу на ответы, источники, вложения и сотрудников всей страницы
+# (плюс один агрегат для is_busy). Статусы и локации берутся из кеша
+# справочников. Число запросов не зависит от размера страницы, ORM-объекты
+# и ленивые загрузки не создаются. Формат совпадает с IncidentSchema.dump.
+#
+# ?fields= и ?expand= (services/fieldsets.py) сужают ответ: выбираются только
+# нужные колонки, а запросы за связями, которых нет в наборе, не выполняются.
+#
+# Кодирование в JSON — orjson, если установлен (datetime он сериализует сам),
+# иначе стандартный json.
+import json
+from datetime import date
+
+from flask import Response
+from sqlalchemy import select
+
+from models import Incident, IncidentArchive, Employee, IncidentResponse, IncidentSource, Attachment
+from services import reference_data
+from services.fieldsets import Fieldset, parse_fieldset
+from services.roster import open_incident_filter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+INCIDENT_COLUMNS = tuple(Incident.__table__.c)
+# Хеш пароля в ответы не попадает (как и в EmployeeSchema)
+EMPLOYEE_COLUMNS = tuple(c for c in Employee.__table__.c if c.name != 'password')
+RESPONSE_COLUMNS = tuple(IncidentResponse.__table__.c)
+SOURCE_COLUMNS = tuple(IncidentSource.__table__.c)
+ATTACHMENT_COLUMNS = tuple(Attachment.__table__.c)
+
+# 🧩 Поля для ?fields= / ?expand=
+EMPLOYEE_FIELDS = tuple(c.name for c in EMPLOYEE_COLUMNS) + ('full_name', 'is_busy')
+# Список инцидентов: колонки, статус и локация (из кеша справочников) и связи
+INCIDENT_FIELDS = tuple(c.name for c in INCIDENT_COLUMNS) + ('status', 'location')
+INCIDENT_RELATIONS = {
+    'assigned_employee': EMPLOYEE_FIELDS,
+    'responses': tuple(c.name for c in RESPONSE_COLUMNS) + ('responder',),
+    'sources': tuple(c.name for c in SOURCE_COLUMNS),
+    'attachments': tuple(c.name for c in ATTACHMENT_COLUMNS),
+}
+# Короткое представление (GET /api/incidents/<id>, поиск)
+SUMMARY_FIELDS = (
+    'id', 'title', 'description', 'incident_type', 'incident_datetime', 'location', 'status',
+    'conclusion', 'created_at', 'updated_at',
+)
+SUMMARY_RELATIONS = {'assigned_employee': ('id', 'first_name', 'last_name', 'email')}
+
+
+def parse_incident_fieldset(args):
+    return parse_fieldset(args, INCIDENT_FIELDS, INCIDENT_RELATIONS)
+
+
+def parse_summary_fieldset(args):
+    return parse_fieldset(args, SUMMARY_FIELDS, SUMMARY_RELATIONS)
+
+
+FULL_INCIDENT = parse_incident_fieldset({})
+FULL_SUMMARY = parse_summary_fieldset({})
+# Дельта-синхронизация: инцидент со всеми связями, исполнитель — только
+# карточка (явный список: новая колонка Employee в /sync сама не попадёт)
+SYNC_EMPLOYEE_FIELDS = ('id', 'first_name', 'last_name', 'position', 'email', 'phone', 'role', 'full_name')
+SYNC_INCIDENT = Fieldset(INCIDENT_FIELDS, dict(
+    FULL_INCIDENT.expand, assigned_employee=frozenset(SYNC_EMPLOYEE_FIELDS),
+))
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, default=_default).encode()
+
+
+def json_response(data, status=200):
+    return Response(dumps(data), status=status, mimetype='application/json')
+
+
+def _dicts(result):
+    # Ключи берутся один раз на выборку, а не для каждой строки (RowMapping)
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def _columns(columns, names):
+    # Колонки в порядке таблицы; names=None — все
+    return columns if names is None else tuple(c for c in columns if c.name in names)
+
+
+def _pick(item, names):
+    return item if names is None else {key: value for key, value in item.items() if key in names}
+
+
+def _by_incident(session, columns, model, incident_ids, names=None, extra=()):
+    # names — поля в ответе (None — все), extra — колонки, нужные только для сборки
+    grouped = {}
+    if not incident_ids:
+        return grouped
+    selected = _columns(columns, None if names is None else {'incident_id', *names, *extra})
+    stmt = select(*selected).where(model.incident_id.in_(incident_ids)).order_by(model.id)
+    for item in _dicts(session.execute(stmt)):
+        grouped.setdefault(item['incident_id'], []).append(item)
+    if names is not None:
+        kept = {*names, *extra}
+        for items in grouped.values():
+            items[:] = [_pick(item, kept) for item in items]
+    return grouped
+
+
+def _busy_employee_ids(session, employee_ids):
+    # Сотрудники, у которых есть незавершённый инцидент (EmployeeSchema.is_busy)
+    stmt = (
+        select(Incident.assigned_employee_id)
+        .where(Incident.assigned_employee_id.in_(employee_ids), open_incident_filter())
+        .distinct()
+    )
+    return set(session.execute(stmt).scalars())
+
+
+def employees_by_id(session, employee_ids, names=None):
+    # names — поля сотрудника (None — все, как EmployeeSchema.dump)
+    employee_ids = [i for i in set(employee_ids) if i is not None]
+    if not employee_ids:
+        return {}
+    wanted = set(EMPLOYEE_FIELDS) if names is None else set(names)
+    selected = {'id'} | wanted
+    if 'full_name' in wanted:
+        selected |= {'first_name', 'last_name'}
+    busy = _busy_employee_ids(session, employee_ids) if 'is_busy' in wanted else ()
+    employees = {}
+    stmt = select(*_columns(EMPLOYEE_COLUMNS, selected)).where(Employee.id.in_(employee_ids))
+    for employee in _dicts(session.execute(stmt)):
+        if 'full_name' in wanted:
+            employee['full_name'] = f"{employee['first_name']} {employee['last_name']}"
+        if 'is_busy' in wanted:
+            employee['is_busy'] = employee['id'] in busy
+        employees[employee['id']] = employee if names is None else _pick(employee, wanted)
+    return employees
+
+
+def incidents_payload(session, rows, fieldset=FULL_INCIDENT):
+    # rows — строки с колонками incident_columns(fieldset), порядок сохраняется
+    ids = [row.id for row in rows]
+    with_responders = fieldset.wants_sub('responses', 'responder')
+    related = {}
+    for name, columns, model, extra in (
+        ('responses', RESPONSE_COLUMNS, IncidentResponse, ('performed_by_id',) if with_responders else ()),
+        ('sources', SOURCE_COLUMNS, IncidentSource, ()),
+        ('attachments', ATTACHMENT_COLUMNS, Attachment, ()),
+    ):
+        if fieldset.expands(name):
+            related[name] = _by_incident(session, columns, model, ids, fieldset.subfields(name), extra)
+
+    # Исполнители и авторы мер реагирования — одним запросом
+    employee_ids = set()
+    if fieldset.expands('assigned_employee'):
+        employee_ids.update(row.assigned_employee_id for row in rows)
+    if with_responders:
+        for items in related['responses'].values():
+            employee_ids.update(item['performed_by_id'] for item in items)
+    employee_names = None if with_responders else fieldset.subfields('assigned_employee')
+    employees = employees_by_id(session, employee_ids, employee_names)
+    if with_responders:
+        responses_names = fieldset.subfields('responses')
+        for items in related['responses'].values():
+            for item in items:
+                item['responder'] = employees.get(item['performed_by_id'])
+                if responses_names is not None and 'performed_by_id' not in responses_names:
+                    del item['performed_by_id']
+    assignee_names = fieldset.subfields('assigned_employee') if with_responders else None
+
+    payload = []
+    keys = tuple(rows[0]._fields) if rows else ()
+    keep = [index for index, key in enumerate(keys) if fieldset.wants(key)]
+    for row in rows:
+        incident = {keys[index]: row[index] for index in keep}
+        if fieldset.expands('assigned_employee'):
+            employee = employees.get(row.assigned_employee_id)
+            incident['assigned_employee'] = _pick(employee, assignee_names) if employee else None
+        if fieldset.wants('status'):
+            incident['status'] = reference_data.status(row.status_id)
+        if fieldset.wants('location'):
+            incident['location'] = reference_data.location(row.location_id)
+        for name in ('responses', 'sources', 'attachments'):
+            if name in related:
+                incident[name] = related[name].get(row.id, [])
+        payload.append(incident)
+    return payload
+
+
+def incident_columns(fieldset=FULL_INCIDENT):
+    # Запрошенные колонки плюс ключ страницы (incident_datetime, id) и
+    # колонки, из которых собираются статус, локация и исполнитель
+    if fieldset is FULL_INCIDENT:
+        return INCIDENT_COLUMNS
+    names = {'id', 'incident_datetime'} | set(fieldset.fields)
+    for field, column in (('status', 'status_id'), ('location', 'location_id')):
+        if fieldset.wants(field):
+            names.add(column)
+    if fieldset.expands('assigned_employee'):
+        names.add('assigned_employee_id')
+    return _columns(INCIDENT_COLUMNS, names)
+
+
+def incident_rows(session, stmt, fieldset=FULL_INCIDENT):
+    # stmt — select(Incident) с фильтрами и сортировкой; выбираются только колонки
+    return session.execute(stmt.with_only_columns(*incident_columns(fieldset))).all()
+
+
+def incident_payload(session, incident_id):
+    rows = incident_rows(session, select(Incident).where(Incident.id == incident_id))
+    return incidents_payload(session, rows)[0] if rows else None
+
+
+# Короткое представление инцидента (Incident.to_dict и GET /api/incidents/<id>)
+def _summary_location(incident):
+    location = reference_data.location(incident.location_id)
+    return {
+        'id': location['id'],
+        'location_name': location['location_name']
+    } if location else None
+
+
+def _summary_status(incident):
+    return {
+        'id': incident.status_id,
+        'name': reference_data.status_name(incident.status_id)
+    } if incident.status_id is not None else None
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# поле -> (колонки incidents, значение)
+_SUMMARY_VALUES = {
+    'id': (('id',), lambda incident: incident.id),
+    'title': (('title',), lambda incident: incident.title),
+    'description': (('description',), lambda incident: incident.description),
+    'incident_type': (('incident_type',), lambda incident: incident.incident_type),
+    'incident_datetime': (('incident_datetime',), lambda incident: _isoformat(incident.incident_datetime)),
+    'location': (('location_id',), _summary_location),
+    'status': (('status_id',), _summary_status),
+    'conclusion': (('conclusion',), lambda incident: incident.conclusion),
+    'created_at': (('created_at',), lambda incident: _isoformat(incident.created_at)),
+    'updated_at': (('updated_at',), lambda incident: _isoformat(incident.updated_at)),
+}
+_SUMMARY_ORDER = (
+    'id', 'title', 'description', 'incident_type', 'incident_datetime', 'location', 'status',
+    'assigned_employee', 'conclusion', 'created_at', 'updated_at',
+)
+
+
+def incident_summary(incident, employee, fieldset=FULL_SUMMARY):
+    # employee — {'id', 'first_name', 'last_name', 'email'} или None
+    summary = {}
+    for name in _SUMMARY_ORDER:
+        if name == 'assigned_employee':
+            if fieldset.expands(name):
+                summary[name] = employee
+        elif fieldset.wants(name):
+            summary[name] = _SUMMARY_VALUES[name][1](incident)
+    return summary
+
+
+def employee_ref(employee):
+    if employee is None:
+        return None
+    return {
+        'id': employee.id,
+        'first_name': employee.first_name,
+        'last_name': employee.last_name,
+        'email': employee.email
+    }
+
+
+def incident_summary_statement(incident_ids, model=Incident, fieldset=FULL_SUMMARY):
+    # model — Incident или IncidentArchive; исполнитель присоединяется, только
+    # если он есть в наборе полей
+    names = {'id'}
+    for name in fieldset.fields:
+        names.update(_SUMMARY_VALUES[name][0])
+    stmt = select(*(model.__table__.c[column.name] for column in _columns(INCIDENT_COLUMNS, names)))
+    if fieldset.expands('assigned_employee'):
+        stmt = stmt.add_columns(
+            Employee.id.label('employee_id'),
+            Employee.first_name,
+            Employee.last_name,
+            Employee.email,
+        ).outerjoin(Employee, Employee.id == model.assigned_employee_id)
+    return stmt.where(model.id.in_(incident_ids))
+
+
+def incident_summaries(session, incident_ids, fieldset=FULL_SUMMARY):
+    # {incident_id: короткое представление} одним запросом (и ещё одним —
+    # по архиву, если нашлись не все)
+    if not incident_ids:
+        return {}
+    rows = session.execute(incident_summary_statement(incident_ids, fieldset=fieldset)).all()
+    missing = set(incident_ids) - {row.id for row in rows}
+    if missing:
+        # завершённые инциденты могли уйти в архив (services/incident_archive.py)
+        rows += session.execute(incident_summary_statement(missing, IncidentArchive, fieldset)).all()
+    employee_names = fieldset.subfields('assigned_employee')
+    summaries = {}
+    for row in rows:
+        employee = None
+        if fieldset.expands('assigned_employee') and row.employee_id is not None:
+            employee = _pick({
+                'id': row.employee_id,
+                'first_name': row.first_name,
+                'last_name': row.last_name,
+                'email': row.email
+            }, employee_names)
+        summaries[row.id] = incident_summary(row, employee, fieldset)
+    return summaries
+
+
+def incident_summary_payload(session, incident_id, fieldset=FULL_SUMMARY):
+    return incident_summaries(session, [incident_id], fieldset).get(incident_id)
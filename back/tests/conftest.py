@@ -0,0 +1,88 @@
+# tests/conftest.py
+# Общие фикстуры: приложение на отдельной SQLite-базе для каждого теста,
+# начальные данные (services.bootstrap) и вход под администратором.
+#
+#   cd back && python -m pytest -q
+import pytest
+
+from config import Config
+from extensions import db
+from services import authz, incident_search, reference_data, reports
+from services.bootstrap import ADMIN, ADMIN_PASSWORD, bootstrap
+
+
+@pytest.fixture(autouse=True)
+def reports_dir(tmp_path, monkeypatch):
+    # PDF-отчёты тестов — во временном каталоге, а не в static/reports
+    path = tmp_path / 'reports'
+    monkeypatch.setattr(reports, 'reports_dir', lambda app: str(path))
+    return path
+
+
+@pytest.fixture
+def app(tmp_path):
+    from app import create_app
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.sqlite'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        TESTING = True
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    # кеши процесса живут дольше одной базы
+    reference_data.invalidate()
+    with authz._roles_lock:
+        authz._roles.clear()
+    with incident_search._available_lock:
+        incident_search._available.clear()
+    bootstrap(app)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, email, password):
+    r = client.post('/api/auth/login', json={'email': email, 'password': password})
+    assert r.status_code == 200, r.get_json()
+    return {'Authorization': f"Bearer {r.get_json()['access_token']}"}
+
+
+@pytest.fixture
+def admin(client):
+    return login(client, ADMIN['email'], ADMIN_PASSWORD)
+
+
+@pytest.fixture
+def make_employee(client, admin):
+    # -> (id, заголовки входа под сотрудником)
+    counter = iter(range(1, 1000))
+
+    def make(**fields):
+        n = next(counter)
+        data = {'first_name': 'Иван', 'last_name': f'Сотрудник{n}', 'email': f'user{n}@airport.com',
+                'phone': str(n), 'position': 'инспектор', 'password': 'pw', 'role': 'user', **fields}
+        r = client.post('/api/employees/', json=data, headers=admin)
+        assert r.status_code == 201, r.get_json()
+        return r.get_json()['id'], login(client, data['email'], data['password'])
+
+    return make
+
+
+@pytest.fixture
+def make_incident(client, admin):
+    def make(**fields):
+        data = {'title': 'Задымление', 'description': 'дым у выхода', 'incident_type': 'пожар',
+                'location_id': 1, **fields}
+        r = client.post('/api/incidents', json=data, headers=admin)
+        assert r.status_code == 201, r.get_json()
+        return r.get_json()
+
+    return make
@@ -0,0 +1,55 @@
+# Асинхронный сервер (asgi/) на той же базе, что и Flask-приложение
+import pytest
+from fastapi.testclient import TestClient
+
+from asgi import main
+from services import reports
+from services.bootstrap import ADMIN, ADMIN_PASSWORD
+from tests.test_reports import wait_job
+
+
+@pytest.fixture
+def asgi_client(app, monkeypatch):
+    monkeypatch.setitem(main.flask_app.config, 'SQLALCHEMY_DATABASE_URI', app.config['SQLALCHEMY_DATABASE_URI'])
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_tokens_work_across_servers(client, admin, asgi_client):
+    r = asgi_client.post('/api/auth/login', json={'email': ADMIN['email'], 'password': ADMIN_PASSWORD})
+    assert r.status_code == 200
+    asgi_admin = {'Authorization': f"Bearer {r.json()['access_token']}"}
+
+    assert client.get('/api/auth/profile', headers=asgi_admin).status_code == 200
+    assert asgi_client.get('/api/auth/profile', headers=admin).json()['email'] == ADMIN['email']
+    assert asgi_client.get('/api/auth/profile').status_code == 401
+
+
+def test_incident_payloads_match_flask(client, admin, asgi_client, make_employee, make_incident):
+    employee_id, _ = make_employee()
+    for _ in range(3):
+        make_incident(assigned_employee_id=employee_id)
+
+    flask_page = client.get('/api/incidents/', query_string={'limit': 2}, headers=admin)
+    asgi_page = asgi_client.get('/api/incidents/', params={'limit': 2}, headers=admin)
+    assert asgi_page.status_code == 200
+    assert asgi_page.json() == flask_page.get_json()
+    assert asgi_page.headers['X-Next-Cursor'] == flask_page.headers['X-Next-Cursor']
+
+    incident_id = flask_page.get_json()[0]['id']
+    assert asgi_client.get(f'/api/incidents/{incident_id}', headers=admin).json() == \
+        client.get(f'/api/incidents/{incident_id}', headers=admin).get_json()
+    assert asgi_client.get('/api/incidents/', params={'cursor': 'zz'}, headers=admin).status_code == 400
+
+
+def test_complete_renders_report(client, asgi_client, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+
+    r = asgi_client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+    assert r.status_code == 202
+    # статус задачи — из report_jobs, его видит и Flask-приложение
+    job = wait_job(asgi_client, headers, r.json()['status_url'], json=lambda response: response.json())
+    assert job['status'] == reports.JOB_DONE
+    assert client.get(r.json()['status_url'], headers=headers).get_json() == job
+    assert client.get(f"/api/incidents/{incident['id']}", headers=headers).get_json()['conclusion'] == job['pdf_url']
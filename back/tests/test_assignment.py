@@ -0,0 +1,66 @@
+# Автоназначение по нагрузке (services/assignment.py)
+from sqlalchemy import select
+
+from extensions import db
+from models import EmployeeLoad
+from services import assignment
+from tests.test_reports import wait_job
+
+
+def assignee(incident):
+    return incident['assigned_employee']['id'] if incident['assigned_employee'] else None
+
+
+def loads(app):
+    with app.app_context():
+        return db.session.execute(
+            select(EmployeeLoad.employee_id, EmployeeLoad.open_count)
+            .where(EmployeeLoad.eligible.is_(True))
+            .order_by(EmployeeLoad.employee_id)
+        ).all()
+
+
+def test_auto_assign_balances_load(app, client, make_employee, make_incident):
+    first_id, _ = make_employee()
+    second_id, headers = make_employee()
+    incidents = [make_incident(auto_assign=True) for _ in range(4)]
+    assert sorted(assignee(i) for i in incidents) == [first_id, first_id, second_id, second_id]
+
+    # завершённый инцидент освобождает сотрудника: у второго теперь меньше открытых
+    incident = next(i for i in incidents if assignee(i) == second_id)
+    r = client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+    wait_job(client, headers, r.get_json()['status_url'])
+    assert assignee(make_incident(auto_assign=True)) == second_id
+
+    incremental = loads(app)
+    with app.app_context():
+        assignment.rebuild(db.session)
+        db.session.commit()
+    assert loads(app) == incremental
+
+
+def test_location_staff_come_first(app, make_employee, make_incident):
+    app.config['ASSIGNMENT_BY_LOCATION'] = True
+    make_employee()
+    local_id, _ = make_employee(location_id=2)
+    make_incident(assigned_employee_id=local_id)
+
+    assert assignee(make_incident(auto_assign=True, location_id=2)) == local_id
+    # за локацией 1 никто не закреплён — выбор из всех
+    assert assignee(make_incident(auto_assign=True, location_id=1)) != local_id
+
+
+def test_admins_are_not_assigned(make_employee, make_incident):
+    make_employee(role='admin')
+    assert assignee(make_incident(auto_assign=True)) is None
+
+
+def test_deleted_employee_incidents_are_redistributed(client, admin, make_employee, make_incident):
+    leaving_id, _ = make_employee()
+    first_id, _ = make_employee()
+    second_id, _ = make_employee()
+    incidents = [make_incident(assigned_employee_id=leaving_id) for _ in range(2)]
+
+    assert client.delete(f'/api/employees/{leaving_id}', headers=admin).status_code == 200
+    picked = [assignee(client.get(f"/api/incidents/{i['id']}", headers=admin).get_json()) for i in incidents]
+    assert sorted(picked) == [first_id, second_id]
@@ -0,0 +1,43 @@
+# Проверка прав администратора (services/authz.py)
+from flask_jwt_extended import decode_token
+
+from services import authz
+
+
+def test_role_is_in_token_claims(app, client, make_employee):
+    _, headers = make_employee(role='admin')
+    with app.app_context():
+        claims = decode_token(headers['Authorization'].split()[1])
+    assert claims['role'] == authz.ADMIN_ROLE
+
+
+def test_demoted_admin_loses_access(client, admin, make_employee):
+    employee_id, headers = make_employee(role='admin')
+    assert client.get('/api/incidents/', headers=headers).status_code == 200
+
+    r = client.put(f'/api/employees/{employee_id}', json={'role': 'user'}, headers=admin)
+    assert r.status_code == 200
+    # токен всё ещё с role=admin, но кеш ролей сброшен при изменении
+    assert client.get('/api/incidents/', headers=headers).status_code == 403
+
+
+def test_claims_are_trusted_without_live_check(app, client, admin, make_employee):
+    app.config['AUTHZ_LIVE_CHECK'] = False
+    employee_id, headers = make_employee(role='admin')
+    client.put(f'/api/employees/{employee_id}', json={'role': 'user'}, headers=admin)
+    assert client.get('/api/incidents/', headers=headers).status_code == 200
+
+
+def test_employee_is_forbidden(client, make_employee):
+    _, headers = make_employee()
+    r = client.get('/api/incidents/', headers=headers)
+    assert r.status_code == 403 and r.get_json() == {'error': 'Доступ запрещён'}
+
+
+def test_role_cache_is_bounded(app):
+    app.config['AUTHZ_ROLE_CACHE_SIZE'] = 2
+    with app.app_context():
+        for user_id in (1, 2, 3):
+            authz.remember_role(user_id, 'user')
+    assert list(authz._roles) == [2, 3]
+    assert authz.cached_role(1) == (False, None)
@@ -0,0 +1,30 @@
+# Синтетический набор данных и сравнение результатов (benchmarks/)
+from argparse import Namespace
+
+from benchmarks import compare, dataset
+from extensions import db
+from tests.conftest import login
+
+
+def test_dataset_is_usable_through_the_api(app, client, admin):
+    args = Namespace(seed=1, responses=1.5, sources=1.0, attachments=0.25, chunk_size=20)
+    with app.app_context():
+        dataset.generate(db.session, {'employees': 5, 'locations': 3, 'incidents': 50}, args, log=lambda message: None)
+
+    # пароль сотрудников набора — BENCH_PASSWORD
+    employee = client.get('/api/employees/', headers=admin).get_json()[-1]
+    assert login(client, employee['email'], dataset.BENCH_PASSWORD)
+    # проекции пересчитаны вместе с загрузкой
+    assert client.get('/api/incidents/stats', headers=admin).get_json()['total']['count'] == 50
+    assert len(client.get('/api/incidents/', query_string={'limit': 200}, headers=admin).get_json()) == 50
+
+
+def test_compare_flags_p95_regressions():
+    def result(p95, rps):
+        return {'operations': {'list': {'p95_ms': p95, 'throughput_rps': rps}}, 'total': {'p95_ms': p95}}
+
+    rows = compare.compare(result(100, 50), result(120, 40))
+    assert ('list', 'p95_ms', 100, 120, 20.0) in rows
+    assert [row[0] for row in compare.regressions(rows, 10)] == ['list', 'ИТОГО']
+    assert compare.regressions(rows, 25) == []
+    assert [row[0] for row in compare.regressions(rows, 10, metric='throughput_rps')] == ['list']
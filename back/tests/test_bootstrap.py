@@ -0,0 +1,34 @@
+# Начальные данные и фабрика приложения (services/bootstrap.py, app.py)
+from extensions import db
+from models import Employee, IncidentStatus, Location
+from services.bootstrap import ADMIN, ADMIN_PASSWORD, DEFAULT_STATUSES, bootstrap
+from tests.conftest import login
+
+
+def test_bootstrap_is_idempotent(app, client):
+    # первый запуск — в фикстуре app
+    assert bootstrap(app) == []
+    with app.app_context():
+        assert db.session.query(IncidentStatus).count() == len(DEFAULT_STATUSES)
+        assert db.session.query(Employee).filter_by(email=ADMIN['email']).count() == 1
+    assert login(client, ADMIN['email'], ADMIN_PASSWORD)
+
+
+def test_bootstrap_fills_only_missing_data(app):
+    with app.app_context():
+        db.session.query(Employee).delete()
+        db.session.commit()
+    assert bootstrap(app) == ['admin']
+
+
+def test_reference_data_is_served_after_bootstrap(client, admin):
+    statuses = client.get('/api/incident_statuses', headers=admin).get_json()
+    assert [status['name'] for status in statuses] == [status['name'] for status in DEFAULT_STATUSES]
+    assert client.get('/api/locations', headers=admin).get_json()
+    with client.application.app_context():
+        assert db.session.query(Location).count() == len(client.get('/api/locations', headers=admin).get_json())
+
+
+def test_factory_registers_commands(app):
+    commands = set(app.cli.list_commands(None))
+    assert {'bootstrap', 'sweep-reports', 'rebuild-incident-stats', 'archive-incidents'} <= commands
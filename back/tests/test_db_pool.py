@@ -0,0 +1,35 @@
+# Пул соединений и его статистика (services/db_pool.py)
+import pytest
+from sqlalchemy import create_engine, exc
+
+from services.db_pool import TimedQueuePool, engine_options, pool_stats
+
+
+@pytest.fixture
+def engine(tmp_path):
+    options = engine_options(pool_size=1, max_overflow=0, pool_timeout=0.05, pool_recycle=1800,
+                             pre_ping=False, use_nullpool=False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.sqlite'}", **options)
+    yield engine
+    engine.dispose()
+
+
+def test_pool_counts_checkouts_and_timeouts(engine):
+    assert isinstance(engine.pool, TimedQueuePool)
+    with engine.connect():
+        stats = pool_stats(engine)
+        assert stats['checked_out'] == 1 and stats['size'] == 1
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    stats = pool_stats(engine)
+    assert stats['pool_class'] == 'TimedQueuePool'
+    assert stats['checkouts'] == 2 and stats['timeouts'] == 1
+    assert stats['wait_max_ms'] >= 50
+
+
+def test_pool_endpoint_is_admin_only(client, admin, make_employee):
+    r = client.get('/api/admin/pool', headers=admin)
+    assert r.status_code == 200 and r.get_json()['pool_class']
+    _, headers = make_employee()
+    assert client.get('/api/admin/pool', headers=headers).status_code == 403
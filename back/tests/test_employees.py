@@ -0,0 +1,20 @@
+# Список сотрудников (services/roster.py)
+
+
+def test_roster_shows_latest_open_incident(client, admin, make_employee, make_incident):
+    employee_id, _ = make_employee()
+    make_incident(title='Старый', assigned_employee_id=employee_id, incident_datetime='2026-01-01T10:00:00')
+    latest = make_incident(title='Новый', assigned_employee_id=employee_id, incident_datetime='2026-02-01T10:00:00')
+
+    roster = {entry['id']: entry for entry in client.get('/api/employees/', headers=admin).get_json()}
+
+    entry = roster[employee_id]
+    assert entry['is_busy'] is True
+    assert entry['assigned_incident'] == {'id': latest['id'], 'title': 'Новый', 'status': 'новый'}
+    assert roster[1]['is_busy'] is False and roster[1]['assigned_incident'] is None
+
+
+def test_roster_without_busy_flag(client, make_employee):
+    _, headers = make_employee()
+    roster = client.get('/api/employees', headers=headers).get_json()
+    assert roster and all('is_busy' not in entry for entry in roster)
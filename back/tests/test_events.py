@@ -0,0 +1,102 @@
+# Уведомления об изменениях инцидентов (services/incident_events.py)
+import queue
+
+import pytest
+
+from services import incident_events
+from services.incident_events import RESYNC, Subscription, bus
+
+
+@pytest.fixture
+def subscription():
+    subscription = bus.subscribe(user_id=None, admin=True)
+    yield subscription
+    bus.unsubscribe(subscription)
+
+
+def _drain(subscription):
+    events = []
+    while True:
+        try:
+            events.append(subscription.queue.get_nowait())
+        except queue.Empty:
+            return events
+
+
+def test_admin_receives_write_events(client, admin, make_employee, make_incident, subscription):
+    employee_id, _ = make_employee()
+    incident = make_incident()
+    client.put(f"/api/incidents/{incident['id']}", json={'assigned_employee_id': employee_id}, headers=admin)
+
+    events = [(e['type'], e['incident_id']) for e in _drain(subscription)]
+    assert events == [('created', incident['id']), ('assigned', incident['id'])]
+
+
+def test_employee_sees_only_own_incidents():
+    own = Subscription(user_id=7, admin=False)
+    assert own.accepts({'type': 'updated', 'assigned_employee_id': 7, 'previous_assigned_employee_id': None})
+    assert own.accepts({'type': 'assigned', 'assigned_employee_id': 8, 'previous_assigned_employee_id': 7})
+    assert not own.accepts({'type': 'updated', 'assigned_employee_id': 8, 'previous_assigned_employee_id': None})
+
+
+def test_overflow_replaces_backlog_with_resync(monkeypatch):
+    monkeypatch.setattr(incident_events, 'SUBSCRIBER_QUEUE_SIZE', 2)
+    subscription = Subscription(user_id=None, admin=True)
+    for n in range(3):
+        subscription.put({'type': 'updated', 'n': n})
+    assert _drain(subscription) == [RESYNC]
+
+
+def test_overflow_tolerates_concurrent_reader():
+    class RacingQueue(queue.Queue):
+        # читатель успел забрать всё между put_nowait и очисткой
+        def put_nowait(self, item):
+            if item is not RESYNC:
+                raise queue.Full
+            super().put_nowait(item)
+
+        def get_nowait(self):
+            raise queue.Empty
+
+    subscription = Subscription(user_id=None, admin=True)
+    subscription.queue = RacingQueue(2)
+    subscription.put({'type': 'updated'})
+    assert list(subscription.queue.queue) == [RESYNC]
+
+
+def test_failing_subscriber_does_not_fail_write(client, admin, subscription, monkeypatch):
+    broken = bus.subscribe(user_id=None, admin=True)
+
+    def fail(event):
+        raise RuntimeError('цикл событий закрыт')
+
+    monkeypatch.setattr(broken, 'put', fail)
+    r = client.post('/api/incidents', json={'title': 'Дым', 'incident_type': 'пожар', 'location_id': 1},
+                    headers=admin)
+
+    assert r.status_code == 201
+    assert [e['type'] for e in _drain(subscription)] == ['created']
+    assert broken not in bus._subscribers
+
+
+def test_flask_stream_disabled_by_default(client, admin):
+    r = client.get('/api/incidents/events', headers=admin)
+    assert r.status_code == 503
+    assert 'asgi.main:app' in r.get_json()['error']
+
+
+def test_flask_streams_limited_per_process(app, client, admin):
+    app.config['EVENTS_FLASK_STREAMS'] = 1
+    first = client.get('/api/incidents/events', headers=admin)
+    assert first.status_code == 200
+    assert next(first.response).startswith(b'retry:')
+
+    busy = client.get('/api/incidents/events', headers=admin)
+    assert busy.status_code == 503
+    assert busy.headers['Retry-After'] == '3'
+
+    first.close()
+    again = client.get('/api/incidents/events', headers=admin)
+    assert again.status_code == 200
+    again.close()
+    assert incident_events.stream_limit.active == 0
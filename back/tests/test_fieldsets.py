@@ -0,0 +1,48 @@
+# ?fields= и ?expand= (services/fieldsets.py)
+import pytest
+
+
+@pytest.fixture
+def incident(make_employee, make_incident):
+    employee_id, _ = make_employee()
+    return make_incident(assigned_employee_id=employee_id)
+
+
+def get(client, headers, url, **params):
+    r = client.get(url, query_string=params, headers=headers)
+    assert r.status_code == 200, r.get_json()
+    return r.get_json()
+
+
+def test_list_fields_and_expansions(client, admin, incident):
+    [row] = get(client, admin, '/api/incidents/', fields='id,title,status')
+    assert set(row) == {'id', 'title', 'status'}
+
+    [row] = get(client, admin, '/api/incidents/', fields='id,assigned_employee.full_name')
+    assert row == {'id': incident['id'], 'assigned_employee': {'full_name': incident['assigned_employee']['full_name']}}
+
+    [row] = get(client, admin, '/api/incidents/', fields='id', expand='responses,sources')
+    assert set(row) == {'id', 'responses', 'sources'}
+
+
+def test_defaults_are_unchanged(client, admin, incident):
+    [row] = get(client, admin, '/api/incidents/')
+    assert {'assigned_employee', 'responses', 'sources', 'attachments', 'status', 'location'} <= set(row)
+    assert get(client, admin, f"/api/incidents/{incident['id']}", fields='id,title') == \
+        {'id': incident['id'], 'title': incident['title']}
+
+
+def test_employee_fields(client, admin, incident):
+    rows = get(client, admin, '/api/employees/', fields='id,name', expand='assigned_incident.id')
+    assert all(set(row) <= {'id', 'name', 'assigned_incident'} for row in rows)
+    assert {'id': incident['id']} in [row.get('assigned_incident') for row in rows]
+
+
+@pytest.mark.parametrize('url, params', [
+    ('/api/incidents/', {'fields': 'id,nope'}),
+    ('/api/incidents/', {'expand': 'assigned_employee.password'}),
+    ('/api/incidents/', {'fields': 'assigned_employee.password'}),
+    ('/api/employees/', {'fields': 'password'}),
+])
+def test_unknown_fields_are_400(client, admin, url, params):
+    assert client.get(url, query_string=params, headers=admin).status_code == 400
@@ -0,0 +1,46 @@
+# Импорт инцидентов из CSV / JSON Lines (services/incident_import.py)
+import json
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Incident
+
+
+def _jsonl(*records):
+    return '\n'.join(json.dumps(record, ensure_ascii=False) for record in records)
+
+
+def test_import_reports_line_errors(app, client, admin):
+    body = _jsonl(
+        {'title': 'Пожар', 'incident_type': 'пожар', 'conclusion': 'ок', 'location_name': 'Терминал A',
+         'incident_datetime': '2024-01-01T00:00:00+03:00'},
+        {'title': '', 'incident_type': 'пожар', 'conclusion': 'ок'},
+        {'title': 'Дым', 'incident_type': 'пожар', 'conclusion': 'ок', 'incident_datetime': 'вчера'},
+    ) + '\n{не json}\n'
+    r = client.post('/api/incidents/import', data=body, content_type='application/x-ndjson', headers=admin)
+    assert r.status_code == 200
+    report = r.get_json()
+    assert report['imported'] == 1 and report['failed'] == 3
+    assert [error['line'] for error in report['errors']] == [2, 3, 4]
+    assert 'title' in report['errors'][0]['errors']
+    assert 'incident_datetime' in report['errors'][1]['errors']
+
+    with app.app_context():
+        incident = db.session.execute(select(Incident)).scalar_one()
+        # смещение +03:00 переведено в UTC, колонка хранит время без пояса
+        assert incident.incident_datetime.isoformat() == '2023-12-31T21:00:00'
+        assert incident.location_id == 1
+
+
+def test_import_csv(client, admin):
+    body = 'title,incident_type,conclusion,incident_datetime\nСбой,техника,ок,2024-05-01T10:00:00Z\n'
+    r = client.post('/api/incidents/import?format=csv', data=body.encode(), headers=admin)
+    assert r.get_json()['imported'] == 1
+    page = client.get('/api/incidents/', headers=admin).get_json()
+    assert page[0]['incident_datetime'].startswith('2024-05-01T10:00:00')
+
+
+def test_import_requires_admin(client, make_employee):
+    _, headers = make_employee()
+    assert client.post('/api/incidents/import', data='', headers=headers).status_code == 403
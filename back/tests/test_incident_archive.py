@@ -0,0 +1,91 @@
+# Архив завершённых инцидентов (services/incident_archive.py)
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from extensions import db
+from models import Incident, IncidentArchive, IncidentResponseArchive
+from services import incident_archive, incident_stats, incident_sync
+from tests.test_reports import wait_job
+from tests.test_sync import sync
+
+
+def complete(client, headers, incident):
+    r = client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+    wait_job(client, headers, r.get_json()['status_url'])
+
+
+def age(app, ids, days=200, column='completed_at'):
+    with app.app_context():
+        db.session.execute(update(Incident).where(Incident.id.in_(ids))
+                           .values({column: datetime.utcnow() - timedelta(days=days)}))
+        db.session.commit()
+
+
+def test_archived_incidents_stay_readable(app, client, admin, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    completed = [make_incident(assigned_employee_id=employee_id) for _ in range(2)]
+    for incident in completed:
+        complete(client, headers, incident)
+    recent = make_incident()
+    stats_before = client.get('/api/incidents/stats', headers=admin).get_json()
+
+    ids = [incident['id'] for incident in completed]
+    age(app, ids)
+    with app.app_context():
+        assert incident_archive.archive_completed(db.session, batch_size=1, log=lambda message: None) == 2
+        assert db.session.get(Incident, ids[0]) is None
+
+    # списки — только горячие инциденты, карточка и выгрузка — вместе с архивом
+    assert [i['id'] for i in client.get('/api/incidents/', headers=admin).get_json()] == [recent['id']]
+    detail = client.get(f'/api/incidents/{ids[0]}', headers=admin).get_json()
+    assert detail['title'] == completed[0]['title'] and detail['conclusion']
+    exported = client.get('/api/incidents/export', headers=admin).data.decode().splitlines()
+    assert len(exported) == 3
+
+    # архивный инцидент не редактируется и не удаляется
+    assert client.put(f'/api/incidents/{ids[0]}', json={'title': 'x'}, headers=admin).status_code == 404
+    assert client.delete(f'/api/incidents/{ids[0]}', headers=admin).status_code == 404
+
+    with app.app_context():
+        incident_stats.rebuild(db.session)
+        db.session.commit()
+    assert client.get('/api/incidents/stats', headers=admin).get_json()['total'] == stats_before['total']
+
+
+def test_recent_completed_incidents_stay_hot(app, client, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+    complete(client, headers, incident)
+    # возраст считается от завершения, а не от последней правки
+    age(app, [incident['id']], column='updated_at')
+
+    with app.app_context():
+        assert incident_archive.archive_completed(db.session, log=lambda message: None) == 0
+
+
+def test_archived_incident_leaves_sync_and_its_id_is_not_reused(app, client, admin, make_employee, make_incident,
+                                                                monkeypatch):
+    monkeypatch.setattr(incident_sync, 'SYNC_SETTLE_S', 0)
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+    complete(client, headers, incident)
+    tokens = {'employee': sync(client, headers)['sync_token'], 'admin': sync(client, admin)['sync_token']}
+    age(app, [incident['id']])
+    with app.app_context():
+        completed_at = db.session.get(Incident, incident['id']).completed_at
+        # самый новый инцидент тоже уходит в архив
+        assert incident_archive.archive_completed(db.session, log=lambda message: None) == 1
+        assert db.session.query(IncidentArchive.completed_at).filter_by(id=incident['id']).scalar() == completed_at
+
+    assert sync(client, headers, tokens['employee'])['deleted'] == [incident['id']]
+    assert sync(client, admin, tokens['admin'])['deleted'] == [incident['id']]
+    assert make_incident()['id'] > incident['id']
+
+
+def test_employee_can_be_deleted_before_archive_exists(app, client, admin, make_employee):
+    employee_id, _ = make_employee()
+    with app.app_context():
+        IncidentResponseArchive.__table__.drop(db.engine)
+        IncidentArchive.__table__.drop(db.engine)
+    assert client.delete(f"/api/employees/{employee_id}", headers=admin).status_code == 200
@@ -0,0 +1,63 @@
+# Пакетное назначение и смена статусов (services/incident_batch.py)
+from services import incident_batch
+from tests.test_reports import wait_job
+
+
+def batch(client, headers, operations):
+    return client.post('/api/incidents/batch', json={'operations': operations}, headers=headers)
+
+
+def test_batch_rules(client, admin, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    first, second, third = make_incident(), make_incident(), make_incident(assigned_employee_id=employee_id)
+    r = client.post(f"/api/incidents/{third['id']}/complete", headers=headers)
+    wait_job(client, headers, r.get_json()['status_url'])
+
+    r = batch(client, admin, [
+        {'incident_id': first['id'], 'employee_id': employee_id},
+        {'incident_id': second['id'], 'status_id': 2},
+        {'incident_id': first['id'], 'status_id': 2},
+        {'incident_id': third['id'], 'employee_id': employee_id},
+        {'incident_id': 999999, 'status_id': 2},
+        {'incident_id': second['id'], 'employee_id': 999999},
+        {'incident_id': 'один', 'status_id': 2},
+        {'incident_id': first['id']},
+    ])
+    assert r.status_code == 200
+    body = r.get_json()
+    assert [result['result'] for result in body['results']] == [
+        'updated', 'updated', 'error', 'error', 'error', 'error', 'error', 'error',
+    ]
+    errors = [result.get('error') for result in body['results']]
+    assert errors[2] == "Инцидент уже изменяется в этом пакете"
+    assert errors[3] == "Нельзя редактировать завершённый инцидент"
+    assert errors[4] == "Incident not found"
+    assert errors[5] == "Инцидент уже изменяется в этом пакете"
+    assert errors[7] == "Нужно указать employee_id или status_id"
+    assert (body['updated'], body['failed']) == (2, 6)
+
+    assert client.get(f"/api/incidents/{first['id']}", headers=admin).get_json()['assigned_employee']['id'] == employee_id
+    assert client.get(f"/api/incidents/{second['id']}", headers=admin).get_json()['status']['id'] == 2
+
+
+def test_batch_checks_employee_and_status(client, admin, make_incident):
+    incident = make_incident()
+    results = batch(client, admin, [
+        {'incident_id': incident['id'], 'employee_id': 999999},
+    ]).get_json()['results'] + batch(client, admin, [
+        {'incident_id': incident['id'], 'status_id': 3},
+    ]).get_json()['results'] + batch(client, admin, [
+        {'incident_id': incident['id'], 'status_id': 1},
+    ]).get_json()['results']
+    assert [result.get('error', result['result']) for result in results] == [
+        "Employee not found", "Завершение инцидента — через /complete", 'unchanged',
+    ]
+
+
+def test_batch_rejects_bad_requests(client, admin, make_employee, monkeypatch):
+    assert batch(client, admin, []).status_code == 400
+    assert client.post('/api/incidents/batch', json={}, headers=admin).status_code == 400
+    monkeypatch.setattr(incident_batch, 'BATCH_MAX_OPERATIONS', 1)
+    assert batch(client, admin, [{'incident_id': 1, 'status_id': 2}] * 2).status_code == 400
+    _, headers = make_employee()
+    assert batch(client, headers, [{'incident_id': 1, 'status_id': 2}]).status_code == 403
@@ -0,0 +1,45 @@
+# Потоковая выгрузка инцидентов (routes/incident_export.py)
+import csv
+import io
+import json
+
+from routes import incident_export
+
+
+def test_jsonl_export(client, admin, make_incident):
+    first = make_incident()
+    make_incident(incident_type='утечка')
+
+    r = client.get('/api/incidents/export', query_string={'incident_type': 'пожар'}, headers=admin)
+    assert r.status_code == 200
+    assert r.mimetype == 'application/x-ndjson'
+    [row] = [json.loads(line) for line in r.data.decode().splitlines()]
+    assert row['id'] == first['id']
+    assert set(row) == set(incident_export.EXPORT_COLUMNS)
+    assert row['status_name'] and row['location_name']
+
+
+def test_csv_export_has_single_header(client, admin, make_incident, monkeypatch):
+    monkeypatch.setattr(incident_export, 'EXPORT_CHUNK_SIZE', 1)
+    ids = [make_incident()['id'] for _ in range(3)]
+
+    r = client.get('/api/incidents/export', query_string={'format': 'csv'}, headers=admin)
+    assert r.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(r.data.decode())))
+    assert [int(row['id']) for row in rows] == ids
+
+
+def test_export_round_trips_through_import(client, admin, make_incident):
+    make_incident(incident_datetime='2024-05-01T08:30:00')
+    exported = client.get('/api/incidents/export', headers=admin).data
+
+    r = client.post('/api/incidents/import', data=exported, content_type='application/x-ndjson', headers=admin)
+    assert r.status_code == 200, r.get_json()
+    assert r.get_json()['imported'] == 1
+
+
+def test_export_rejects_bad_requests(client, admin, make_employee):
+    assert client.get('/api/incidents/export', query_string={'format': 'xml'}, headers=admin).status_code == 400
+    assert client.get('/api/incidents/export', query_string={'status_id': 'x'}, headers=admin).status_code == 400
+    _, headers = make_employee()
+    assert client.get('/api/incidents/export', headers=headers).status_code == 403
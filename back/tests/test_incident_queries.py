@@ -0,0 +1,66 @@
+# Постраничная выдача инцидентов по курсору (services/incident_queries.py)
+import pytest
+
+
+@pytest.fixture
+def incidents(make_incident):
+    # пять инцидентов, два — в одну и ту же минуту (порядок решает id)
+    times = ['2024-01-01T10:00:00', '2024-01-02T10:00:00', '2024-01-02T10:00:00',
+             '2024-01-03T10:00:00', '2024-01-04T10:00:00']
+    return [make_incident(incident_datetime=t, incident_type='пожар' if n % 2 else 'утечка')
+            for n, t in enumerate(times)]
+
+
+def pages(client, headers, **params):
+    seen, cursor = [], None
+    while True:
+        r = client.get('/api/incidents/', query_string=dict(params, **({'cursor': cursor} if cursor else {})),
+                       headers=headers)
+        assert r.status_code == 200
+        seen.append([i['id'] for i in r.get_json()])
+        cursor = r.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return seen
+        assert 'rel="next"' in r.headers['Link']
+
+
+def test_cursor_round_trip(client, admin, incidents):
+    ids = [i['id'] for i in incidents]
+    assert pages(client, admin, limit=2) == [[ids[4], ids[3]], [ids[2], ids[1]], [ids[0]]]
+    assert pages(client, admin, limit=2, order='asc') == [[ids[0], ids[1]], [ids[2], ids[3]], [ids[4]]]
+
+
+def test_filters_apply_to_every_page(client, admin, incidents):
+    ids = [i['id'] for i in incidents if i['incident_type'] == 'пожар']
+    assert pages(client, admin, limit=1, incident_type='пожар') == [[ids[1]], [ids[0]]]
+    assert pages(client, admin, date_from='2024-01-02T00:00:00', date_to='2024-01-03T00:00:00') == \
+        [[incidents[2]['id'], incidents[1]['id']]]
+
+
+@pytest.mark.parametrize('params', [
+    {'cursor': 'не-курсор'},
+    {'order': 'sideways'},
+    {'limit': 'много'},
+    {'date_from': 'вчера'},
+])
+def test_bad_parameters_are_400(client, admin, params):
+    assert client.get('/api/incidents/', query_string=params, headers=admin).status_code == 400
+
+
+def test_cursor_is_bound_to_order(client, admin, incidents):
+    cursor = client.get('/api/incidents/', query_string={'limit': 1}, headers=admin).headers['X-Next-Cursor']
+    r = client.get('/api/incidents/', query_string={'cursor': cursor, 'order': 'asc'}, headers=admin)
+    assert r.status_code == 400
+
+
+def test_incident_datetime_cannot_be_null(client, admin, make_incident):
+    r = client.post('/api/incidents', json={'title': 'Дым', 'incident_type': 'пожар', 'location_id': 1,
+                                            'incident_datetime': None}, headers=admin)
+    assert r.status_code == 400
+    incident = make_incident()
+    r = client.put(f"/api/incidents/{incident['id']}", json={'incident_datetime': None}, headers=admin)
+    assert r.status_code == 400
+
+    # без даты в запросе — момент создания, страницы идут по ней
+    second = make_incident()
+    assert pages(client, admin, limit=1) == [[second['id']], [incident['id']]]
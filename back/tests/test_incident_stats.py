@@ -0,0 +1,54 @@
+# Агрегаты для дашборда (services/incident_stats.py)
+import time
+
+from extensions import db
+from services import incident_stats
+from tests.test_reports import wait_job
+
+
+def stats(client, headers):
+    r = client.get('/api/incidents/stats', headers=headers)
+    assert r.status_code == 200
+    return r.get_json()
+
+
+def test_incremental_stats_match_rebuild(app, client, admin, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    kept = make_incident(assigned_employee_id=employee_id)
+    make_incident(incident_type='утечка', location_id=2)
+    removed = make_incident()
+    client.post('/api/incidents/batch', json={'operations': [{'incident_id': removed['id'], 'status_id': 2}]},
+                headers=admin)
+    client.delete(f"/api/incidents/{removed['id']}", headers=admin)
+    r = client.post(f"/api/incidents/{kept['id']}/complete", headers=headers)
+    # запись ссылки на отчёт сдвигает updated_at — агрегаты должны сойтись
+    wait_job(client, headers, r.get_json()['status_url'])
+
+    incremental = stats(client, admin)
+    assert incremental['total']['count'] == 2 and incremental['total']['resolved'] == 1
+    assert {row['incident_type']: row['count'] for row in incremental['by_type']} == {'пожар': 1, 'утечка': 1}
+    [assignee] = [row for row in incremental['by_assignee'] if row['id'] == employee_id]
+    assert assignee['resolved'] == 1 and assignee['mean_resolve_seconds'] is not None
+
+    with app.app_context():
+        incident_stats.rebuild(db.session)
+        db.session.commit()
+    assert stats(client, admin) == incremental
+
+    # удаление сотрудника обнуляет исполнителя и сдвигает updated_at без
+    # track — время завершения (completed_at) от этого не меняется
+    time.sleep(1.1)
+    assert client.delete(f"/api/employees/{employee_id}", headers=admin).status_code == 200
+    incremental = stats(client, admin)
+    [unassigned] = [row for row in incremental['by_assignee'] if row['id'] is None]
+    assert unassigned['resolved'] == 1
+    with app.app_context():
+        incident_stats.rebuild(db.session)
+        db.session.commit()
+    assert stats(client, admin) == incremental
+
+
+def test_stats_validation(client, admin, make_employee):
+    assert client.get('/api/incidents/stats', query_string={'days': 'неделя'}, headers=admin).status_code == 400
+    _, headers = make_employee()
+    assert client.get('/api/incidents/stats', headers=headers).status_code == 403
@@ -0,0 +1,39 @@
+# Метрики Prometheus (services/metrics.py)
+from services import metrics
+
+
+def samples(client):
+    r = client.get('/metrics')
+    assert r.status_code == 200
+    assert r.content_type == metrics.CONTENT_TYPE
+    values = {}
+    for line in r.data.decode().splitlines():
+        if line and not line.startswith('#'):
+            name, _, value = line.rpartition(' ')
+            values[name] = float(value)
+    return values
+
+
+def test_request_latency_and_sql_are_recorded(client, admin, make_incident):
+    make_incident()
+    before = samples(client)
+    assert client.get('/api/incidents/', headers=admin).status_code == 200
+    after = samples(client)
+
+    labels = '{method="GET",blueprint="incidents",endpoint="incidents.get_all_incidents",status="200"}'
+    key = f'http_request_duration_seconds_count{labels}'
+    assert after[key] == before.get(key, 0) + 1
+    assert after[f'http_request_duration_seconds_bucket{labels[:-1]},le="+Inf"}}'] == after[key]
+
+    queries = 'http_request_sql_queries_sum{blueprint="incidents",endpoint="incidents.get_all_incidents"}'
+    assert after[queries] > before.get(queries, 0)
+
+
+def test_query_budget_overrun_is_counted(app, client, admin, make_incident, caplog):
+    make_incident()
+    app.config['METRICS_QUERY_BUDGET'] = 1
+    key = 'http_requests_over_query_budget_total{blueprint="incidents",endpoint="incidents.get_all_incidents"}'
+    before = samples(client).get(key, 0)
+    client.get('/api/incidents/', headers=admin)
+    assert samples(client)[key] == before + 1
+    assert any('🐢' in record.getMessage() for record in caplog.records)
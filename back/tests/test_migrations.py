@@ -0,0 +1,60 @@
+# Миграции схемы (migrations/)
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from scripts import explain_queries
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'migrations.sqlite'}"
+
+
+def alembic(database_url, *args):
+    # env.py создаёт приложение с DATABASE_URL — поэтому отдельный процесс
+    result = subprocess.run(
+        [sys.executable, '-m', 'alembic', *args], cwd=BACK_DIR, capture_output=True, text=True,
+        env=dict(os.environ, DATABASE_URL=database_url),
+    )
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+def test_migrations_match_models_and_downgrade(database_url):
+    alembic(database_url, 'upgrade', 'head')
+    alembic(database_url, 'check')
+
+    engine = create_engine(database_url)
+    inspector = inspect(engine)
+    for name, table, columns in explain_queries._performance_indexes():
+        assert {'name': name, 'columns': columns} in [
+            {'name': index['name'], 'columns': index['column_names']} for index in inspector.get_indexes(table)
+        ]
+    engine.dispose()
+
+    alembic(database_url, 'downgrade', 'base')
+    engine = create_engine(database_url)
+    assert inspect(engine).get_table_names() == ['alembic_version']
+    engine.dispose()
+
+
+def test_empty_incident_datetime_is_filled_from_created_at(database_url):
+    alembic(database_url, 'upgrade', '0009')
+    engine = create_engine(database_url)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO incidents (id, title, incident_type, status_id, created_at, updated_at) "
+            "VALUES (1, 'Задымление', 'пожар', 1, '2024-01-01 10:00:00', '2024-01-01 10:00:00')"
+        ))
+    alembic(database_url, 'upgrade', 'head')
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT incident_datetime FROM incidents")).scalar() == '2024-01-01 10:00:00'
+        assert not next(c for c in inspect(connection).get_columns('incidents')
+                        if c['name'] == 'incident_datetime')['nullable']
+    engine.dispose()
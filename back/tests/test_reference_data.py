@@ -0,0 +1,14 @@
+# Справочники статусов и локаций из кеша с ETag (services/reference_data.py)
+import pytest
+
+
+@pytest.mark.parametrize('url', ['/api/locations', '/api/incident_statuses'])
+def test_reference_etag_round_trip(client, admin, url):
+    r = client.get(url, headers=admin)
+    assert r.status_code == 200 and r.get_json()
+    etag = r.headers['ETag']
+
+    cached = client.get(url, headers={**admin, 'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+
@@ -0,0 +1,85 @@
+# ZIP-архив PDF-отчётов (services/report_archive.py)
+import io
+import os
+import zipfile
+
+from sqlalchemy import update
+
+from extensions import db
+from models import Incident, ReportJob
+from services import reports
+from services.report_archive import archive_statement, plan_archive
+from tests.test_reports import wait_job
+
+
+def test_report_is_fresh_until_content_changes(app, client, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+    r = client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+    assert wait_job(client, headers, r.get_json()['status_url'])['status'] == reports.JOB_DONE
+
+    with app.app_context():
+        # запись ссылки сдвинула updated_at, но содержимое отчёта то же
+        ready, missing = plan_archive(app, archive_statement([incident['id']]))
+        assert len(ready) == 1 and missing == []
+
+        db.session.execute(update(Incident).where(Incident.id == incident['id']).values(title='Пожар'))
+        db.session.commit()
+        ready, missing = plan_archive(app, archive_statement([incident['id']]))
+        assert ready == [] and [payload['title'] for payload in missing] == ['Пожар']
+
+
+def test_regenerated_report_is_recorded(app, client, admin, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+    r = client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+    pdf_url = wait_job(client, headers, r.get_json()['status_url'])['pdf_url']
+    os.remove(os.path.join(reports.reports_dir(app), pdf_url.rpartition('/')[2]))
+
+    r = client.post('/api/incidents/export/reports', json={'ids': [incident['id']]}, headers=admin)
+    assert r.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(r.data)) as archive:
+        [filename] = archive.namelist()
+
+    assert client.get(f"/api/incidents/{incident['id']}", headers=admin).get_json()['conclusion'] == \
+        f"{reports.REPORTS_URL}/{filename}"
+    with app.app_context():
+        ready, missing = plan_archive(app, archive_statement([incident['id']]))
+        assert ready == [(filename, os.path.join(reports.reports_dir(app), filename))] and missing == []
+
+
+def test_zip_contains_every_completed_incident(client, admin, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    completed = []
+    for _ in range(3):
+        incident = make_incident(assigned_employee_id=employee_id)
+        r = client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+        completed.append(wait_job(client, headers, r.get_json()['status_url'])['pdf_url'].rpartition('/')[2])
+    make_incident()
+
+    r = client.post('/api/incidents/export/reports', headers=admin)
+    assert r.status_code == 200 and r.mimetype == 'application/zip'
+    with zipfile.ZipFile(io.BytesIO(r.data)) as archive:
+        assert sorted(archive.namelist()) == sorted(completed)
+        assert all(archive.read(name).startswith(b'%PDF') for name in completed)
+
+
+def test_foreign_report_links_are_skipped(app, client, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+    r = client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+    assert wait_job(client, headers, r.get_json()['status_url'])['status'] == reports.JOB_DONE
+
+    for url in (f"{reports.REPORTS_URL}/../../config.py", f"{reports.REPORTS_URL}/incident-{incident['id'] + 1}.pdf"):
+        with app.app_context():
+            db.session.execute(update(ReportJob).where(ReportJob.incident_id == incident['id']).values(pdf_url=url))
+            db.session.execute(update(Incident).where(Incident.id == incident['id']).values(conclusion=url))
+            db.session.commit()
+            assert plan_archive(app, archive_statement([incident['id']])) == ([], [])
+
+
+def test_zip_rejects_bad_requests(client, admin, make_incident):
+    make_incident()
+    assert client.post('/api/incidents/export/reports', json={'ids': 'все'}, headers=admin).status_code == 400
+    # незавершённые инциденты в архив не попадают
+    assert client.post('/api/incidents/export/reports', headers=admin).status_code == 404
@@ -0,0 +1,54 @@
+# Отдача PDF-отчётов (services/report_files.py)
+import os
+
+import pytest
+
+from services import report_files, reports
+
+
+@pytest.fixture
+def legacy_report(app):
+    target_dir = reports.reports_dir(app)
+    os.makedirs(target_dir, exist_ok=True)
+    path = os.path.join(target_dir, 'incident-1.pdf')
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.4 old')
+    return path
+
+
+def test_legacy_report_revalidates_by_content(client, legacy_report):
+    r = client.get('/static/reports/incident-1.pdf')
+    assert r.status_code == 200
+    assert r.headers['Cache-Control'] == report_files.REVALIDATE_CACHE_CONTROL
+    etag = r.headers['ETag']
+    assert client.get('/static/reports/incident-1.pdf', headers={'If-None-Match': etag}).status_code == 304
+
+    with open(legacy_report, 'wb') as f:
+        f.write(b'%PDF-1.4 regenerated')
+    r = client.get('/static/reports/incident-1.pdf', headers={'If-None-Match': etag})
+    assert r.status_code == 200 and r.headers['ETag'] != etag
+
+
+def test_legacy_etag_cache_is_bounded(legacy_report):
+    report_files._content_etag.cache_clear()
+    for n in range(report_files.LEGACY_ETAG_CACHE_SIZE + 10):
+        report_files._content_etag(legacy_report, n, 12)
+    info = report_files._content_etag.cache_info()
+    assert info.maxsize == report_files.LEGACY_ETAG_CACHE_SIZE
+    assert info.currsize == report_files.LEGACY_ETAG_CACHE_SIZE
+
+
+def test_hashed_report_is_immutable_and_ranged(app, client):
+    target_dir = reports.reports_dir(app)
+    os.makedirs(target_dir, exist_ok=True)
+    with open(os.path.join(target_dir, 'incident-2-0123456789abcdef.pdf'), 'wb') as f:
+        f.write(b'%PDF-1.4 content')
+
+    r = client.get('/static/reports/incident-2-0123456789abcdef.pdf', headers={'Range': 'bytes=0-3'})
+    assert r.status_code == 206 and r.data == b'%PDF'
+    assert r.headers['ETag'] == '"0123456789abcdef"'
+    assert r.headers['Cache-Control'] == report_files.IMMUTABLE_CACHE_CONTROL
+
+
+def test_unknown_name_is_404(client):
+    assert client.get('/static/reports/..%2Fapp.py').status_code == 404
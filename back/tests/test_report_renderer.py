@@ -0,0 +1,30 @@
+# Рендеринг PDF (services/report_renderer.py)
+import os
+
+import fpdf
+from fpdf import fpdf as fpdf_module
+from fpdf.ttfonts import TTFontFile
+
+from services import report_renderer, reports
+
+
+def test_fpdf_version_is_pinned():
+    # Переопределённые внутренние методы есть только в этой версии fpdf
+    assert fpdf.FPDF_VERSION == report_renderer.FPDF_VERSION
+    with open(os.path.join(os.path.dirname(__file__), '..', '..', 'requirements.txt')) as f:
+        assert f"fpdf=={report_renderer.FPDF_VERSION}" in f.read().split()
+    for name in ('makeSubset', 'endTTFile', 'getCMAP4', 'getCMAP12', 'getHMTX', 'getLOCA'):
+        assert callable(getattr(TTFontFile, name))
+    for name in ('_putfonts', '_putTTfontwidths'):
+        assert callable(getattr(fpdf.FPDF, name))
+
+
+def test_cached_font_class_is_local_to_report_pdf(app, tmp_path):
+    report_renderer.CachedTTFontFile._subset_cache.clear()
+    path = tmp_path / 'report.pdf'
+    report_renderer.render_report({'id': 1, 'title': 'Пожар', 'resolved_at': '2026-01-01 00:00:00'}, str(path), reports.font_path(app))
+
+    assert path.read_bytes().startswith(b'%PDF')
+    assert report_renderer.CachedTTFontFile._subset_cache
+    assert fpdf_module.TTFontFile is TTFontFile
+    assert fpdf.FPDF._putfonts.__globals__['TTFontFile'] is TTFontFile
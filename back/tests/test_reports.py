@@ -0,0 +1,112 @@
+# Фоновая генерация PDF-отчётов (services/reports.py)
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from extensions import db
+from models import ReportJob
+from services import reports
+
+
+def wait_job(client, headers, status_url, timeout=30, json=lambda response: response.get_json()):
+    # json — разбор ответа: у тестового клиента ASGI это response.json()
+    deadline = time.monotonic() + timeout
+    while True:
+        job = json(client.get(status_url, headers=headers))
+        if job['status'] != reports.JOB_PENDING or time.monotonic() > deadline:
+            return job
+        time.sleep(0.2)
+
+
+def test_complete_queues_report_job(client, admin, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+
+    r = client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+    assert r.status_code == 202
+    body = r.get_json()
+    assert body['job_id'].startswith(f"{incident['id']}-")
+
+    job = wait_job(client, headers, body['status_url'])
+    assert job['status'] == reports.JOB_DONE
+    assert job['pdf_url'].startswith(reports.REPORTS_URL + '/')
+    assert client.get(f"/api/incidents/{incident['id']}", headers=admin).get_json()['conclusion'] == job['pdf_url']
+    assert client.get(job['pdf_url']).status_code == 200
+
+
+def test_unknown_job_is_404(client, admin):
+    assert client.get('/api/incidents/reports/1-nope', headers=admin).status_code == 404
+
+
+def test_failed_submit_keeps_job_for_sweep(app, client, make_employee, make_incident, monkeypatch):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+
+    def broken(config):
+        raise RuntimeError('пул недоступен')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(reports, 'get_executor', broken)
+        r = client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+    # завершение не откатывается, задача остаётся в report_jobs
+    assert r.status_code == 202
+    status_url = r.get_json()['status_url']
+    assert client.get(status_url, headers=headers).get_json()['status'] == reports.JOB_PENDING
+
+    monkeypatch.setattr(reports, 'JOB_STALE_AFTER', timedelta(0))
+    with app.app_context():
+        assert reports.sweep(db.session, app, log=lambda message: None) == (1, 0)
+    job = client.get(status_url, headers=headers).get_json()
+    assert job['status'] == reports.JOB_DONE and job['pdf_url']
+
+
+def test_report_result_is_saved_on_results_thread(client, make_employee, make_incident, monkeypatch):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+    threads = []
+    finish = reports._finish_job
+
+    def recording(*args):
+        threads.append(threading.current_thread().name)
+        finish(*args)
+
+    monkeypatch.setattr(reports, '_finish_job', recording)
+    r = client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+    assert wait_job(client, headers, r.get_json()['status_url'])['status'] == reports.JOB_DONE
+    assert threads == ['report-results']
+
+
+def _pending_job(app, incident_id, heartbeat_at):
+    with app.app_context():
+        job_id = reports.new_job(db.session, {'id': incident_id})
+        db.session.flush()
+        db.session.execute(update(ReportJob).where(ReportJob.id == job_id).values(heartbeat_at=heartbeat_at))
+        db.session.commit()
+        return job_id
+
+
+def test_sweep_skips_jobs_with_fresh_heartbeat(app, make_incident):
+    incident = make_incident()
+    now = datetime.utcnow()
+    alive = _pending_job(app, incident['id'], now)
+    lost = _pending_job(app, incident['id'], now - reports.JOB_STALE_AFTER - timedelta(seconds=1))
+    with app.app_context():
+        stale = db.session.execute(reports.stale_jobs_statement(now)).scalars().all()
+        assert [job.id for job in stale] == [lost]
+        assert alive not in {job.id for job in stale}
+
+
+def test_results_worker_heartbeats_inflight_jobs(app, make_incident):
+    incident = make_incident()
+    old = datetime.utcnow() - timedelta(hours=1)
+    job_id = _pending_job(app, incident['id'], old)
+    worker = reports.result_worker(app)
+    worker.add(job_id)
+    worker.heartbeat()
+    with app.app_context():
+        job = db.session.get(ReportJob, job_id)
+        assert job.heartbeat_at > old
+        assert job.updated_at < job.heartbeat_at
+        assert not db.session.execute(reports.stale_jobs_statement(datetime.utcnow())).scalars().all()
@@ -0,0 +1,35 @@
+# Полнотекстовый поиск (services/incident_search.py)
+import pytest
+
+from extensions import db
+from services import incident_search
+
+
+@pytest.fixture
+def search_index(app):
+    with app.app_context():
+        incident_search.rebuild(db.session)
+        db.session.commit()
+
+
+def test_search_highlight_escapes_incident_text(client, admin, make_incident, search_index):
+    incident = make_incident(title='<img src=x onerror=alert(1)> пожар',
+                             description='<script>alert(1)</script> пожар у выхода')
+
+    results = client.get('/api/incidents/search?q=пожар', headers=admin).get_json()
+
+    assert [result['id'] for result in results] == [incident['id']]
+    highlight = results[0]['highlight']
+    assert '<img' not in highlight['title'] and '&lt;img' in highlight['title']
+    assert '<mark>пожар</mark>' in highlight['title']
+    assert '<script>' not in highlight['snippet'] and '&lt;script&gt;' in highlight['snippet']
+
+
+def test_employee_searches_only_own_incidents(client, admin, make_employee, make_incident, search_index):
+    employee_id, headers = make_employee()
+    own = make_incident(title='Утечка топлива', assigned_employee_id=employee_id)
+    make_incident(title='Утечка воды')
+
+    assert [r['id'] for r in client.get('/api/incidents/search?q=утечка', headers=headers).get_json()] == [own['id']]
+    assert len(client.get('/api/incidents/search?q=утечка', headers=admin).get_json()) == 2
+    assert client.get('/api/incidents/search', headers=admin).status_code == 400
@@ -0,0 +1,44 @@
+# Сериализация инцидентов из проекций колонок (services/serializers.py)
+from extensions import db
+from models import IncidentResponse
+
+
+def _walk(value):
+    # все ключи вложенных объектов ответа
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield key
+            yield from _walk(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _walk(item)
+
+
+def test_incident_payloads_never_contain_password(app, client, admin, make_employee, make_incident):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+    with app.app_context():
+        db.session.add(IncidentResponse(incident_id=incident['id'], action_taken='оцеплено',
+                                        performed_by_id=employee_id))
+        db.session.commit()
+
+    page = client.get('/api/incidents/', headers=admin).get_json()
+    assert page[0]['assigned_employee']['full_name'] == "Иван Сотрудник1"
+    assert page[0]['responses'][0]['responder']['id'] == employee_id
+    for url in ('/api/incidents/', f"/api/incidents/{incident['id']}", '/api/incidents/my',
+                '/api/incidents/sync', '/api/employees/'):
+        body = client.get(url, headers=admin if url != '/api/incidents/my' else headers).get_json()
+        assert 'password' not in set(_walk(body)), url
+    assert 'password' not in incident['assigned_employee']
+
+
+def test_password_is_not_a_selectable_field(client, admin):
+    r = client.get('/api/incidents/?fields=id,assigned_employee.password', headers=admin)
+    assert r.status_code == 400
+
+
+def test_employee_write_responses_hide_password(client, admin, make_employee):
+    employee_id, _ = make_employee()
+    r = client.put(f'/api/employees/{employee_id}', json={'phone': '42', 'password': 'new'}, headers=admin)
+    assert r.status_code == 200
+    assert r.get_json()['phone'] == '42' and 'password' not in r.get_json()
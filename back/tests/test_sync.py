@@ -0,0 +1,86 @@
+# Дельта-синхронизация (services/incident_sync.py)
+import time
+from datetime import timedelta
+
+import pytest
+
+from extensions import db
+from services import incident_sync, reports
+
+
+@pytest.fixture(autouse=True)
+def no_settle(monkeypatch):
+    # без отступа токена назад дельта содержит только новые изменения
+    monkeypatch.setattr(incident_sync, 'SYNC_SETTLE_S', 0)
+
+
+def sync(client, headers, since=None):
+    r = client.get('/api/incidents/sync', query_string={'since': since} if since else {}, headers=headers)
+    assert r.status_code == 200
+    return r.get_json()
+
+
+def test_report_link_reaches_sync_clients(app, client, make_employee, make_incident, monkeypatch):
+    employee_id, headers = make_employee()
+    incident = make_incident(assigned_employee_id=employee_id)
+    def broken(config):
+        raise RuntimeError('пул недоступен')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(reports, 'get_executor', broken)
+        client.post(f"/api/incidents/{incident['id']}/complete", headers=headers)
+
+    token = sync(client, headers)['sync_token']
+    time.sleep(0.01)
+    monkeypatch.setattr(reports, 'JOB_STALE_AFTER', timedelta(0))
+    with app.app_context():
+        reports.sweep(db.session, app, log=lambda message: None)
+
+    delta = sync(client, headers, token)
+    assert [i['id'] for i in delta['incidents']] == [incident['id']]
+    assert delta['incidents'][0]['conclusion'].startswith(reports.REPORTS_URL + '/')
+
+
+def test_delta_with_tombstones(client, admin, make_employee, make_incident):
+    kept, removed = make_incident(), make_incident()
+    token = sync(client, admin)['sync_token']
+
+    time.sleep(0.01)
+    client.put(f"/api/incidents/{kept['id']}", json={'title': 'Пожар'}, headers=admin)
+    assert client.delete(f"/api/incidents/{removed['id']}", headers=admin).status_code == 200
+
+    delta = sync(client, admin, token)
+    assert [(i['id'], i['title']) for i in delta['incidents']] == [(kept['id'], 'Пожар')]
+    assert delta['deleted'] == [removed['id']]
+    assert delta['has_more'] is False
+
+    assert sync(client, admin, delta['sync_token'])['incidents'] == []
+
+
+def test_unassigned_incident_is_deleted_for_employee(client, admin, make_employee, make_incident):
+    first_id, headers = make_employee()
+    second_id, _ = make_employee()
+    incident = make_incident(assigned_employee_id=first_id)
+    token = sync(client, headers)['sync_token']
+
+    time.sleep(0.01)
+    client.put(f"/api/incidents/{incident['id']}", json={'assigned_employee_id': second_id}, headers=admin)
+
+    delta = sync(client, headers, token)
+    assert delta['incidents'] == [] and delta['deleted'] == [incident['id']]
+
+
+def test_sync_hides_employee_password(client, admin, make_employee, make_incident):
+    employee_id, _ = make_employee()
+    make_incident(assigned_employee_id=employee_id)
+
+    [incident] = sync(client, admin)['incidents']
+    assert incident['assigned_employee']['id'] == employee_id
+    assert 'password' not in incident['assigned_employee']
+    assert incident['assigned_employee']['full_name']
+
+
+def test_expired_token_is_410(client, admin, monkeypatch):
+    token = sync(client, admin)['sync_token']
+    monkeypatch.setattr(incident_sync, 'TOMBSTONE_RETENTION_DAYS', -1)
+    assert client.get('/api/incidents/sync', query_string={'since': token}, headers=admin).status_code == 410
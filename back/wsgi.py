@@ -0,0 +1,18 @@
+# wsgi.py
+# Точка входа для gunicorn (см. gunicorn.conf.py):
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# С preload_app модуль импортируется один раз в мастер-процессе: приложение
+# создаётся, начальные данные проверяются одной транзакцией, тяжёлые модули
+# прогреваются — и всё это наследуют воркеры после fork. Соединения с БД,
+# открытые мастером, закрываются до fork: воркеры открывают свои.
+from app import create_app
+from extensions import db
+from services.bootstrap import bootstrap, warm_up
+
+app = create_app()
+bootstrap(app)
+warm_up()
+
+with app.app_context():
+    db.engine.dispose()